@@ -4,17 +4,22 @@ Secure, authenticated endpoints for AI-powered financial guidance
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field, validator
+import asyncio
 import uuid
+import json
+import time
 from datetime import datetime
 import logging
 
-from app.core.database import get_db
-from app.auth.security import get_current_user
+from app.auth.security import get_current_user, require_admin
 from app.models.schemas import User
+from app.config import settings
+from app.llm.bulkhead import BulkheadFull
+from app.llm.deadline import request_deadline
 from app.services.islamic_finance_ai import islamic_finance_ai
 from app.security.rate_limiting import rate_limit
 
@@ -78,7 +83,6 @@ class HealthResponse(BaseModel):
 async def chat_islamic_finance(
     chat_request: ChatMessage,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
     request: Request = None
 ):
     """
@@ -110,12 +114,22 @@ async def chat_islamic_finance(
             f"- Message length: {len(chat_request.message)}"
         )
         
-        # Get AI response
-        ai_response = await islamic_finance_ai.get_response(
-            user_message=chat_request.message,
-            user_id=user_session_id,
-            include_context=chat_request.include_context
-        )
+        # Get AI response; queueing, retries and timeouts share one budget
+        with request_deadline(settings.chat_timeout):
+            ai_response = await islamic_finance_ai.get_response(
+                user_message=chat_request.message,
+                user_id=user_session_id,
+                include_context=chat_request.include_context
+            )
+        
+        # Shed load with a retry hint instead of queueing past the deadline
+        if ai_response["status"] == "overloaded":
+            logger.warning(f"AI service overloaded, refusing request from user {current_user.id}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI service is busy. Please try again shortly.",
+                headers={"Retry-After": str(ai_response["retry_after"])}
+            )
         
         # Check if AI service returned an error
         if ai_response["status"] == "error":
@@ -170,6 +184,97 @@ async def chat_islamic_finance(
             detail="An unexpected error occurred. Please try again."
         )
 
+def _format_sse(event: Dict[str, Any]) -> str:
+    """Encode a stream event as a Server-Sent Events frame"""
+    data = {key: value for key, value in event.items() if key != "event"}
+    return f"event: {event['event']}\ndata: {json.dumps(data)}\n\n"
+
+def _format_ndjson(event: Dict[str, Any]) -> str:
+    """Encode a stream event as one line of newline-delimited JSON"""
+    return json.dumps(event) + "\n"
+
+@router.post("/islamic-finance/stream")
+@rate_limit(calls=20, period=60)  # Shares the chat message budget
+async def stream_chat_islamic_finance(
+    chat_request: ChatMessage,
+    current_user: User = Depends(get_current_user),
+    request: Request = None
+):
+    """
+    Stream a reply from the Islamic Finance AI Expert token by token
+    
+    Responds with Server-Sent Events (`text/event-stream`) by default, or
+    newline-delimited JSON when the client sends `Accept: application/x-ndjson`.
+    
+    Responds 503 with `Retry-After` before streaming when the AI service
+    is at capacity.
+    
+    Events:
+    - **start**: intent, model and conversation ID, sent before the first token
+    - **delta**: a chunk of the reply as soon as the model produces it
+    - **done**: final status and suggestions (or the full message when no
+      model call was needed, e.g. off-topic questions)
+    
+    **Authentication required**: This endpoint requires a valid JWT token.
+    **Rate limited**: Maximum 20 messages per minute per user.
+    """
+    
+    conversation_id = chat_request.conversation_id or f"conv_{uuid.uuid4().hex[:12]}"
+    user_session_id = f"user_{current_user.id}_{conversation_id}"
+    
+    client_ip = getattr(request.client, 'host', 'unknown') if request else 'unknown'
+    logger.info(
+        f"Streaming chat request from user {current_user.id} "
+        f"from IP {client_ip} - Message length: {len(chat_request.message)}"
+    )
+    
+    # The budget runs from arrival, not from when the body starts streaming
+    deadline_at = time.monotonic() + settings.chat_timeout
+    
+    # Refuse now with 503 + Retry-After: once the stream has started the
+    # status is already 200
+    try:
+        with request_deadline(deadline_at - time.monotonic()):
+            islamic_finance_ai.check_capacity()
+    except BulkheadFull as e:
+        logger.warning(f"AI service overloaded, refusing stream for user {current_user.id}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service is busy. Please try again shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    accept = request.headers.get("accept", "") if request else ""
+    if "application/x-ndjson" in accept:
+        media_type, encode = "application/x-ndjson", _format_ndjson
+    else:
+        media_type, encode = "text/event-stream", _format_sse
+    
+    async def event_stream():
+        # Bounds everything up to the first token; later chunks are bounded
+        # by the gap between them
+        with request_deadline(deadline_at - time.monotonic()):
+            async for event in islamic_finance_ai.stream_response(
+                user_message=chat_request.message,
+                user_id=user_session_id,
+                include_context=chat_request.include_context
+            ):
+                if event["event"] != "delta":
+                    event["conversation_id"] = conversation_id
+                    event.pop("error", None)  # Don't expose technical details
+                yield encode(event)
+        
+        logger.info(f"Streaming chat response completed for user {current_user.id}")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type=media_type,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx proxy buffering
+        }
+    )
+
 @router.get("/health", response_model=HealthResponse)
 async def chat_health_check(
     current_user: User = Depends(get_current_user)
@@ -280,11 +385,9 @@ async def clear_conversation(
         user_session_id = f"user_{current_user.id}_{conversation_id}"
         
         # Clear conversation from AI service memory
-        if hasattr(islamic_finance_ai, 'conversation_memory'):
-            if user_session_id in islamic_finance_ai.conversation_memory:
-                del islamic_finance_ai.conversation_memory[user_session_id]
-                logger.info(f"Conversation {conversation_id} cleared for user {current_user.id}")
-                return {"message": "Conversation history cleared successfully"}
+        if await islamic_finance_ai.clear_conversation(user_session_id):
+            logger.info(f"Conversation {conversation_id} cleared for user {current_user.id}")
+            return {"message": "Conversation history cleared successfully"}
         
         return {"message": "No conversation history found to clear"}
         
@@ -293,4 +396,31 @@ async def clear_conversation(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to clear conversation history"
-        )
\ No newline at end of file
+        )
+
+@router.delete("/cache")
+async def purge_response_cache(
+    admin_user: Dict[str, Any] = Depends(require_admin)
+):
+    """
+    Purge cached answers for repeated questions
+    
+    Use after changing the system prompt guidance or when cached answers
+    need to be refreshed before their TTL expires.
+    
+    **Admin only**: Requires a JWT for an email listed in ADMIN_EMAILS.
+    """
+    
+    removed = islamic_finance_ai.response_cache.purge()
+    semantic_removed = await asyncio.to_thread(islamic_finance_ai.semantic_cache.purge)
+    logger.info(
+        f"Response cache purged by {admin_user.get('email')} - "
+        f"{removed} exact and {semantic_removed} semantic entries removed"
+    )
+    
+    return {
+        "message": "Response cache purged",
+        "entries_removed": removed,
+        "semantic_entries_removed": semantic_removed,
+        "timestamp": datetime.utcnow().isoformat()
+    }
@@ -166,6 +166,19 @@ def get_current_active_user(current_user: Dict[str, Any] = Depends(get_current_u
     # Add additional user status checks here if needed
     return current_user
 
+def require_admin(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    Dependency restricting an endpoint to configured administrators
+    """
+    email = (current_user.get("email") or "").lower()
+    admin_emails = {admin.lower() for admin in settings.admin_emails}
+    if not email or email not in admin_emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator privileges required"
+        )
+    return current_user
+
 # API Key authentication for external services
 class APIKeyManager:
     """
@@ -203,5 +216,6 @@ __all__ = [
     "token_manager", 
     "get_current_user", 
     "get_current_active_user",
+    "require_admin",
     "api_key_manager"
 ]
\ No newline at end of file
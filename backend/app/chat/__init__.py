@@ -0,0 +1,18 @@
+"""
+Chat helpers for Nisab Wisdom AI
+Keyword matching and canned fallback answers shared by the chat service and
+the *_main.py entry points
+
+Independent of app.config so the standalone scripts can use it without the
+full application settings.
+"""
+
+from .keywords import KeywordMatcher
+from .fallback import FallbackResponder, FallbackRule, get_fallback_response
+
+__all__ = [
+    "KeywordMatcher",
+    "FallbackResponder",
+    "FallbackRule",
+    "get_fallback_response",
+]
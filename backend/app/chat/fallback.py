@@ -0,0 +1,326 @@
+"""
+Deterministic fallback answers
+Canned topic responses for when no language model is reachable
+"""
+
+from typing import Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+import re
+import zlib
+
+from .keywords import KeywordMatcher
+
+# Placeholder replaced with the user's message
+QUERY = "{query}"
+
+# Every fallback answer, indexed by topic; topics with several variants
+# pick one per message, deterministically
+TEMPLATES: Dict[str, Tuple[str, ...]] = {
+    "welcome": ("""**As-salaam alaikum! Welcome to Nisab Wisdom AI! 🕌**
+
+I'm your Islamic Finance assistant, ready to help with:
+
+📿 **Zakat Calculations:** How much you owe, nisab values, asset types
+💰 **Halal Investing:** Stock screening, Islamic funds, crypto guidance
+🏦 **Islamic Banking:** Shariah-compliant loans, mortgages, financing
+📊 **Business Ethics:** Partnerships, contracts, trade principles
+
+**Try asking me:**
+- "How do I calculate Zakat on $10,000?"
+- "Is Tesla stock halal to invest in?"
+- "Can I get an Islamic mortgage?"
+- "Is Bitcoin permissible in Islam?"
+
+What would you like to learn about Islamic finance today?""",),
+
+    "zakat": ("""**Zakat Calculation Guidance:**
+
+📊 **Current Nisab (2025):**
+- Gold: 85 grams (≈ $5,500 USD)
+- Silver: 595 grams (≈ $400 USD)
+
+💰 **Zakat Rate:** 2.5% of savings held for one lunar year
+
+✅ **Assets Subject to Zakat:**
+- Cash, bank savings, investments
+- Gold, silver, cryptocurrency
+- Business inventory and profits
+- Stocks and mutual funds
+
+❌ **Exempt Assets:**
+- Primary residence, personal car
+- Work tools, household items
+- Pension funds (401k, etc.)
+
+**Formula:** (Total zakatable assets - debts) × 2.5% if above nisab
+
+**Example:** $10,000 savings above nisab = $250 Zakat due""",),
+
+    "halal_investing": ("""**Halal Investment Guidelines:**
+
+✅ **Permissible Sectors:**
+- Technology, healthcare, education
+- Renewable energy, infrastructure
+- Halal food, Islamic finance
+- Real estate (non-speculative)
+
+❌ **Prohibited Sectors:**
+- Alcohol, gambling, tobacco
+- Conventional banking, insurance
+- Pork-related businesses
+- Adult entertainment, weapons
+
+🔍 **Screening Criteria:**
+- Debt-to-equity ratio < 33%
+- Interest income < 5% of total
+- Cash/interest-bearing assets < 33%
+- No prohibited business activities
+
+📈 **Recommended:** Shariah-compliant ETFs, Islamic mutual funds, direct halal stock investments
+
+**Popular Halal Stocks:** Apple, Microsoft, Tesla, Google (after screening)""",),
+
+    "halal_principles": ("""**Islamic Finance Principles** ☪️
+
+**Halal (Permitted):**
+• Profit-sharing (Mudarabah)
+• Asset-backed financing
+• Trade-based transactions
+• Ethical investments
+
+**Haram (Prohibited):**
+• Interest (Riba)
+• Gambling (Maysir)
+• Excessive uncertainty (Gharar)
+• Non-halal business sectors
+
+What specific aspect would you like to know more about?""",),
+
+    "crypto": ("""**Cryptocurrency in Islam:**
+
+✅ **Generally Permissible:**
+- Bitcoin, Ethereum (utility-based)
+- Stablecoins for transactions
+- Long-term holding (not speculation)
+- Blockchain technology projects
+
+⚠️ **Conditions for Permissibility:**
+- Must have genuine utility/value
+- Avoid excessive speculation (gambling)
+- No interest-based lending (DeFi caution)
+- Comply with local regulations
+
+❌ **Avoid:**
+- Meme coins, pump-and-dump schemes
+- Interest-bearing crypto lending
+- Gambling-based tokens
+- Excessive day trading
+
+💡 **Scholarly Opinion:** Most contemporary scholars permit Bitcoin and major cryptocurrencies when used as digital assets, not for speculation.
+
+**Recommendation:** Long-term investment in established cryptocurrencies with real utility.""",),
+
+    "islamic_banking": ("""**Islamic Banking Principles:**
+
+🏛️ **Core Principles:**
+- No Riba (interest/usury)
+- No Gharar (excessive uncertainty)
+- No Maysir (gambling/speculation)
+- Asset-backed transactions
+
+✅ **Islamic Finance Products:**
+- **Murabaha:** Cost-plus financing (home, car purchases)
+- **Ijara:** Islamic leasing
+- **Mudaraba:** Profit-sharing partnership
+- **Musharaka:** Joint venture financing
+
+🏠 **Islamic Mortgages:**
+- Diminishing Musharaka (co-ownership)
+- Ijara wa Iqtina (lease-to-own)
+- Murabaha home financing
+
+🏦 **Islamic Banks in US:**
+- University Bank, Guidance Residential
+- Devon Bank, Lariba Bank
+- Check local credit unions for Shariah-compliant products
+
+💳 **Banking Tips:** Avoid interest-based accounts, use Islamic banks or dividend-paying accounts.""",),
+
+    "islamic_finance_overview": ("""**Welcome to Islamic Finance Guidance! 🕌**
+
+I'm here to help with Shariah-compliant financial decisions:
+
+📿 **Zakat & Charity:** Calculations, nisab values, distribution
+💰 **Halal Investing:** Stock screening, Islamic funds, real estate
+₿ **Cryptocurrency:** Permissibility, guidelines, scholarly opinions
+🏦 **Islamic Banking:** Shariah-compliant financing, avoiding riba
+📊 **Business Ethics:** Partnership rules, contract principles
+
+**Ask me specific questions like:**
+- "How much Zakat do I owe on $15,000?"
+- "Is Apple stock halal to invest in?"
+- "Can I get an Islamic mortgage?"
+- "Is Bitcoin permissible in Islam?"
+
+*All guidance based on mainstream scholarly opinions. Consult local scholars for specific situations.*""",),
+
+    "islamic_finance_specialty": (
+        "I specialize in Islamic finance! Ask me about Zakat, halal investing, Sukuk, "
+        "or any Shariah-compliant financial topics.",
+    ),
+
+    "greeting": (
+        "Hello! I'm here to help you with any questions you have.",
+        "Hi there! What can I assist you with today?",
+        "Hey! Feel free to ask me anything - Islamic finance, general knowledge, or anything else.",
+        "Good to see you! How can I help you today?"
+    ),
+
+    "math": ("I can help with basic math! Try asking something like '5 + 3' or 'what is 10 * 7?'",),
+
+    "code": ("""**Programming Help** 💻
+
+I can assist with:
+• Python, JavaScript, React
+• API development
+• Web applications
+• Database design
+• Best practices
+
+Regarding "{query}" - what specific technical challenge are you facing?""",),
+
+    "question": ("""I understand you're asking: "{query}"
+
+I can help with:
+📚 General knowledge and facts
+🧮 Math and calculations
+💰 Islamic finance and Zakat
+💻 Programming and technology
+📈 Business and economics
+
+Could you provide a bit more context so I can give you a more detailed answer?""",),
+
+    "general": (
+        "I received your message: '{query}'. How can I help you with that?",
+        "Thanks for reaching out! Regarding '{query}' - could you tell me more about what you'd like to know?",
+        "I'm here to help! About '{query}' - what specific information are you looking for?",
+        "I understand you mentioned '{query}'. I can assist with Islamic finance, general questions, math, or technology topics."
+    ),
+}
+
+_ARITHMETIC_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([+\-*/])\s*(\d+(?:\.\d+)?)')
+
+
+def solve_arithmetic(message: str) -> Optional[str]:
+    """Answer a single binary arithmetic expression such as '12 * 7'"""
+    match = _ARITHMETIC_RE.search(message)
+    if not match:
+        return None
+    left, operator, right = match.groups()
+    left, right = float(left), float(right)
+    if operator == "+":
+        result = left + right
+    elif operator == "-":
+        result = left - right
+    elif operator == "*":
+        result = left * right
+    elif right != 0:
+        result = left / right
+    else:
+        result = "Cannot divide by zero"
+    return f"The answer is: {result}"
+
+
+class FallbackRule(NamedTuple):
+    """Keywords that select a template; `solver` may answer first"""
+
+    topic: str
+    keywords: Sequence[str]
+    template: str
+    solver: Optional[Callable[[str], Optional[str]]] = None
+
+
+class FallbackResponder:
+    """
+    Pick a canned answer for a message
+
+    Rules are checked in order through one KeywordMatcher, so a message is
+    scanned once; the first rule whose keywords occur selects its template
+    (after giving its solver, if any, a chance to answer). Messages matching
+    no rule get `default`. Variant choice is a hash of the message, so the
+    same question always gets the same answer.
+    """
+
+    def __init__(self, rules: Sequence[FallbackRule], default: str):
+        for template in [rule.template for rule in rules] + [default]:
+            if template not in TEMPLATES:
+                raise ValueError(f"Unknown fallback template: {template}")
+        self.rules = {rule.topic: rule for rule in rules}
+        self.default = default
+        self._matcher = KeywordMatcher({rule.topic: rule.keywords for rule in rules})
+
+    def topic(self, message: str) -> Optional[str]:
+        """Topic of the first matching rule, or None"""
+        return self._matcher.first(message)
+
+    def respond(self, message: str) -> str:
+        rule = self.rules.get(self.topic(message))
+        if rule is None:
+            return render(self.default, message)
+        if rule.solver is not None:
+            answer = rule.solver(message)
+            if answer:
+                return answer
+        return render(rule.template, message)
+
+
+def render(template: str, message: str) -> str:
+    """Fill in a template (choosing its variant from the message)"""
+    variants = TEMPLATES[template]
+    text = variants[zlib.crc32(message.encode("utf-8")) % len(variants)] if len(variants) > 1 else variants[0]
+    return text.replace(QUERY, message) if QUERY in text else text
+
+
+# Islamic finance assistant (simple_main, free_ai_main, IslamicFinanceAI)
+ISLAMIC_FINANCE_FALLBACK = FallbackResponder([
+    FallbackRule("greeting", ["hi", "hello", "hey", "how are you", "how r u", "gg", "test"], "welcome"),
+    FallbackRule("zakat", ["zakat", "nisab", "charity"], "zakat"),
+    FallbackRule("investing", ["halal", "investment", "stock", "shares"], "halal_investing"),
+    FallbackRule("crypto", ["bitcoin", "crypto", "ethereum", "blockchain"], "crypto"),
+    FallbackRule("banking", ["banking", "loan", "mortgage", "finance"], "islamic_banking"),
+], default="islamic_finance_overview")
+
+# General assistant (final_ai_main): Islamic finance topics before math and code
+GENERAL_FALLBACK = FallbackResponder([
+    FallbackRule("greeting", [
+        "hello", "hi", "hey", "sup", "how are you", "how r u",
+        "good morning", "good afternoon", "good evening"
+    ], "greeting"),
+    FallbackRule("zakat", ["zakat", "nisab"], "zakat"),
+    FallbackRule("halal", ["halal", "haram"], "halal_principles"),
+    FallbackRule("islamic_finance", ["islamic", "shariah", "riba", "sukuk"], "islamic_finance_specialty"),
+    FallbackRule("math", ["math", "calculate", "equation", "solve", "+", "-", "*", "/"], "math", solve_arithmetic),
+    FallbackRule("code", ["code", "programming", "python", "javascript", "app", "website", "api"], "code"),
+    FallbackRule("question", ["?", "what", "how", "why", "when", "where", "who"], "question"),
+], default="general")
+
+# General assistant (real_ai_main): math and code before Islamic finance, as
+# it always answered, so "calculate zakat on 5+3" gets the arithmetic
+GENERAL_MATH_FIRST_FALLBACK = FallbackResponder([
+    FallbackRule("greeting", ["hi", "hello", "hey", "how are you", "how r u", "gg", "test", "sup"], "greeting"),
+    FallbackRule("math", ["calculate", "math", "equation", "solve", "+"], "math", solve_arithmetic),
+    FallbackRule("code", ["code", "programming", "python", "javascript", "app", "website"], "code"),
+    FallbackRule("zakat", ["zakat"], "zakat"),
+    FallbackRule("halal", ["halal", "investment", "stock"], "halal_investing"),
+    FallbackRule("islamic_finance", ["nisab", "haram", "islamic", "shariah", "riba"], "islamic_finance_specialty"),
+], default="general")
+
+FALLBACKS: Dict[str, FallbackResponder] = {
+    "islamic_finance": ISLAMIC_FINANCE_FALLBACK,
+    "general": GENERAL_FALLBACK,
+    "general_math_first": GENERAL_MATH_FIRST_FALLBACK,
+}
+
+
+def get_fallback_response(message: str, profile: str = "islamic_finance") -> str:
+    """Canned answer for a message under the given assistant profile"""
+    return FALLBACKS[profile].respond(message)
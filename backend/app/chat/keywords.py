@@ -0,0 +1,127 @@
+"""
+Keyword matching for intent classification and topic gating
+One pass over a message finds every keyword category it mentions
+"""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+import re
+
+_WORD_RE = re.compile(r"\w+")
+
+# Inflected forms accepted for keywords of 4+ letters ("invest" matches
+# "investments", "bank" matches "banking", "trade" matches "trading");
+# short keywords like "hi" only ever match as whole words
+_SUFFIXES = ("s", "es", "ed", "er", "ers", "ing", "ings", "ment", "ments")
+_MIN_INFLECTED = 4
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text"""
+    return _WORD_RE.findall(text.lower())
+
+
+def _forms(word: str, inflections: bool) -> Set[str]:
+    """A keyword word plus the inflected forms it should also match"""
+    forms = {word}
+    if inflections and len(word) >= _MIN_INFLECTED and word.isalpha():
+        stems = {word, word[:-1]} if word.endswith("e") else {word}
+        forms.update(stem + suffix for stem in stems for suffix in _SUFFIXES)
+    return forms
+
+
+class KeywordMatcher:
+    """
+    Whole-word keyword matcher over named categories
+
+    Keywords (single words or multi-word phrases) are expanded once, at
+    construction, into a lookup table of every accepted form. `match()`
+    splits the text into words with one compiled regex and intersects them
+    with that table, so the cost is one scan of the message no matter how
+    many keywords there are; phrases are only checked when their first
+    word occurs. Matching is on whole words: "hi" matches "hi there" but
+    not "this". Keywords containing symbols ("+", "2.5%") have no word
+    boundaries and are matched as plain substrings.
+
+    Categories keep their definition order, which `first()` uses as
+    priority for if/elif style classification. Results for the last
+    `cache_size` texts are memoized, so gating and classifying the same
+    message costs a single scan.
+    """
+
+    def __init__(
+        self,
+        categories: Mapping[str, Iterable[str]],
+        inflections: bool = True,
+        cache_size: int = 256
+    ):
+        self.categories: Tuple[str, ...] = tuple(categories)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+        words: Dict[str, Set[str]] = {}
+        phrases: Dict[str, Dict[Tuple[str, ...], Set[str]]] = {}
+        symbols: Dict[str, Set[str]] = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                keyword = keyword.lower().strip()
+                parts = keyword.split()
+                if not parts:
+                    continue
+                if tokenize(keyword) != parts:
+                    symbols.setdefault(keyword, set()).add(category)
+                    continue
+                for last in _forms(parts[-1], inflections):
+                    if len(parts) == 1:
+                        words.setdefault(last, set()).add(category)
+                    else:
+                        rest = tuple(parts[1:-1]) + (last,)
+                        phrases.setdefault(parts[0], {}).setdefault(rest, set()).add(category)
+
+        self._words: Dict[str, FrozenSet[str]] = {
+            word: frozenset(found) for word, found in words.items()
+        }
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], FrozenSet[str]]]] = {
+            first: [(rest, frozenset(found)) for rest, found in tails.items()]
+            for first, tails in phrases.items()
+        }
+        self._symbols: List[Tuple[str, FrozenSet[str]]] = [
+            (symbol, frozenset(found)) for symbol, found in symbols.items()
+        ]
+        self._word_keys = frozenset(self._words)
+        self._phrase_keys = frozenset(self._phrases)
+
+    def _phrase_categories(self, tokens: List[str], starts: Set[str]) -> Set[str]:
+        found: Set[str] = set()
+        for index, token in enumerate(tokens):
+            if token in starts:
+                for rest, categories in self._phrases[token]:
+                    if tuple(tokens[index + 1:index + 1 + len(rest)]) == rest:
+                        found |= categories
+        return found
+
+    def _match(self, text: str) -> FrozenSet[str]:
+        """Every category with at least one keyword in the text"""
+        lowered = text.lower()
+        tokens = _WORD_RE.findall(lowered)
+        found: Set[str] = set()
+        for token in self._word_keys.intersection(tokens):
+            found |= self._words[token]
+        starts = self._phrase_keys.intersection(tokens)
+        if starts:
+            found |= self._phrase_categories(tokens, starts)
+        for symbol, categories in self._symbols:
+            if symbol in lowered:
+                found |= categories
+        return frozenset(found)
+
+    def first(self, text: str, categories: Optional[Sequence[str]] = None) -> Optional[str]:
+        """Highest-priority matched category (among `categories` if given), or None"""
+        found = self.match(text)
+        for category in categories or self.categories:
+            if category in found:
+                return category
+        return None
+
+    def matches_any(self, text: str) -> bool:
+        """Whether the text contains any keyword at all"""
+        return bool(self.match(text))
@@ -37,13 +37,32 @@ class Settings(BaseSettings):
     allowed_methods: List[str] = Field(default=["GET", "POST"], env="ALLOWED_METHODS")
     allowed_headers: List[str] = Field(default=["Authorization", "Content-Type"], env="ALLOWED_HEADERS")
     
+    # Administration (emails allowed to call admin endpoints)
+    admin_emails: List[str] = Field(default=[], env="ADMIN_EMAILS")
+    
     # Rate Limiting
     rate_limit_requests_per_minute: int = Field(default=60, env="RATE_LIMIT_REQUESTS_PER_MINUTE")
     rate_limit_burst: int = Field(default=100, env="RATE_LIMIT_BURST")
     
+    # Batch and streamed (uploaded ledger) Zakat calculations
+    zakat_batch_max_items: int = Field(default=1000, env="ZAKAT_BATCH_MAX_ITEMS")
+    zakat_stream_chunk_rows: int = Field(default=1000, env="ZAKAT_STREAM_CHUNK_ROWS")
+    
     # External APIs
     coingecko_api_key: Optional[str] = Field(default=None, env="COINGECKO_API_KEY")
     coingecko_base_url: str = Field(default="https://api.coingecko.com/api/v3", env="COINGECKO_BASE_URL")
+    coingecko_api_timeout: float = Field(default=10.0, env="COINGECKO_API_TIMEOUT")
+    
+    # Metal price cache (fresh for the TTL, then served stale while it refreshes)
+    price_cache_ttl_seconds: float = Field(default=300.0, env="PRICE_CACHE_TTL_SECONDS")
+    price_cache_stale_seconds: float = Field(default=3600.0, env="PRICE_CACHE_STALE_SECONDS")
+    price_cache_retry_seconds: float = Field(default=30.0, env="PRICE_CACHE_RETRY_SECONDS")
+    
+    # Price refresher: one worker per host polls CoinGecko and shares a snapshot file
+    price_refresher_enabled: bool = Field(default=True, env="PRICE_REFRESHER_ENABLED")
+    price_refresh_interval: float = Field(default=120.0, env="PRICE_REFRESH_INTERVAL")
+    price_refresh_jitter: float = Field(default=0.1, env="PRICE_REFRESH_JITTER")
+    price_snapshot_path: str = Field(default="./price_cache/prices.json", env="PRICE_SNAPSHOT_PATH")
     
     # Security Headers
     security_hsts_max_age: int = Field(default=31536000, env="SECURITY_HSTS_MAX_AGE")
@@ -60,6 +79,76 @@ class Settings(BaseSettings):
     chat_max_tokens: int = Field(default=1500, env="CHAT_MAX_TOKENS")
     chat_temperature: float = Field(default=0.7, env="CHAT_TEMPERATURE")
     chat_timeout: int = Field(default=30, env="CHAT_TIMEOUT")
+    chat_context_token_budget: int = Field(default=3000, env="CHAT_CONTEXT_TOKEN_BUDGET")
+    chat_summary_enabled: bool = Field(default=True, env="CHAT_SUMMARY_ENABLED")
+    chat_summary_max_tokens: int = Field(default=300, env="CHAT_SUMMARY_MAX_TOKENS")
+    # Summaries use their own DeepSeek lane, apart from user requests
+    chat_summary_max_concurrency: int = Field(default=2, env="CHAT_SUMMARY_MAX_CONCURRENCY")
+    chat_summary_max_queue: int = Field(default=32, env="CHAT_SUMMARY_MAX_QUEUE")
+    chat_summary_queue_timeout: float = Field(default=30.0, env="CHAT_SUMMARY_QUEUE_TIMEOUT")
+    chat_offline_fallback_enabled: bool = Field(default=True, env="CHAT_OFFLINE_FALLBACK_ENABLED")
+    
+    # Conversation memory: "memory" (per worker), "redis" or "sqlite" (shared)
+    conversation_backend: str = Field(default="memory", env="CONVERSATION_BACKEND")
+    conversation_sqlite_path: str = Field(default="./conversations.db", env="CONVERSATION_SQLITE_PATH")
+    conversation_max_entries: int = Field(default=10000, env="CONVERSATION_MAX_ENTRIES")
+    conversation_max_bytes: int = Field(default=64 * 1024 * 1024, env="CONVERSATION_MAX_BYTES")
+    conversation_ttl_seconds: int = Field(default=3600, env="CONVERSATION_TTL_SECONDS")
+    
+    # Response cache for context-free chat turns (per worker)
+    response_cache_enabled: bool = Field(default=True, env="RESPONSE_CACHE_ENABLED")
+    response_cache_max_entries: int = Field(default=2048, env="RESPONSE_CACHE_MAX_ENTRIES")
+    response_cache_ttl_seconds: int = Field(default=3600, env="RESPONSE_CACHE_TTL_SECONDS")
+    
+    # Semantic cache for rephrased context-free questions (memory-mapped, shared per host)
+    semantic_cache_enabled: bool = Field(default=True, env="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_path: str = Field(default="./semantic_cache/index", env="SEMANTIC_CACHE_PATH")
+    semantic_cache_capacity: int = Field(default=4096, env="SEMANTIC_CACHE_CAPACITY")
+    semantic_cache_threshold: float = Field(default=0.78, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_ttl_seconds: int = Field(default=86400, env="SEMANTIC_CACHE_TTL_SECONDS")
+    
+    # Knowledge base retrieval (verified knowledge_base rows, indexed in-process)
+    knowledge_base_enabled: bool = Field(default=True, env="KNOWLEDGE_BASE_ENABLED")
+    knowledge_base_database_url: Optional[str] = Field(default=None, env="KNOWLEDGE_BASE_DATABASE_URL")
+    knowledge_base_path: str = Field(default="./knowledge_base/index", env="KNOWLEDGE_BASE_PATH")
+    knowledge_base_top_k: int = Field(default=3, env="KNOWLEDGE_BASE_TOP_K")
+    knowledge_base_min_similarity: float = Field(default=0.2, env="KNOWLEDGE_BASE_MIN_SIMILARITY")
+    knowledge_base_answer_similarity: float = Field(default=0.85, env="KNOWLEDGE_BASE_ANSWER_SIMILARITY")
+    knowledge_base_snippet_tokens: int = Field(default=600, env="KNOWLEDGE_BASE_SNIPPET_TOKENS")
+    
+    # Upstream LLM connection pool (the LLM gateway's shared client, one per worker)
+    deepseek_http2: bool = Field(default=True, env="DEEPSEEK_HTTP2")
+    deepseek_max_connections: int = Field(default=100, env="DEEPSEEK_MAX_CONNECTIONS")
+    deepseek_max_keepalive_connections: int = Field(default=20, env="DEEPSEEK_MAX_KEEPALIVE_CONNECTIONS")
+    deepseek_keepalive_expiry: float = Field(default=60.0, env="DEEPSEEK_KEEPALIVE_EXPIRY")
+    deepseek_max_concurrency: int = Field(default=32, env="DEEPSEEK_MAX_CONCURRENCY")
+    deepseek_max_queue: int = Field(default=64, env="DEEPSEEK_MAX_QUEUE")
+    deepseek_queue_timeout: float = Field(default=5.0, env="DEEPSEEK_QUEUE_TIMEOUT")
+    
+    # Per-attempt timeouts: multiplier x recent p95, between the min and the max
+    deepseek_timeout: float = Field(default=30.0, env="DEEPSEEK_TIMEOUT")
+    deepseek_min_timeout: float = Field(default=5.0, env="DEEPSEEK_MIN_TIMEOUT")
+    deepseek_timeout_p95_multiplier: float = Field(default=3.0, env="DEEPSEEK_TIMEOUT_P95_MULTIPLIER")
+    deepseek_adaptive_timeout_min_calls: int = Field(default=20, env="DEEPSEEK_ADAPTIVE_TIMEOUT_MIN_CALLS")
+    
+    # Hedged completions (needs the same call history as adaptive timeouts)
+    deepseek_hedging_enabled: bool = Field(default=False, env="DEEPSEEK_HEDGING_ENABLED")
+    deepseek_hedge_percentile: float = Field(default=0.95, env="DEEPSEEK_HEDGE_PERCENTILE")
+    deepseek_hedge_min_delay: float = Field(default=1.0, env="DEEPSEEK_HEDGE_MIN_DELAY")
+    deepseek_hedge_budget: float = Field(default=0.05, env="DEEPSEEK_HEDGE_BUDGET")
+    deepseek_hedge_burst: float = Field(default=5.0, env="DEEPSEEK_HEDGE_BURST")
+    deepseek_coalesce_requests: bool = Field(default=True, env="DEEPSEEK_COALESCE_REQUESTS")
+    
+    # DeepSeek circuit breaker (rolling window of real call outcomes)
+    deepseek_breaker_window_seconds: float = Field(default=60.0, env="DEEPSEEK_BREAKER_WINDOW_SECONDS")
+    deepseek_breaker_min_calls: int = Field(default=5, env="DEEPSEEK_BREAKER_MIN_CALLS")
+    deepseek_breaker_failure_rate: float = Field(default=0.5, env="DEEPSEEK_BREAKER_FAILURE_RATE")
+    deepseek_breaker_slow_call_seconds: float = Field(default=20.0, env="DEEPSEEK_BREAKER_SLOW_CALL_SECONDS")
+    deepseek_breaker_open_seconds: float = Field(default=30.0, env="DEEPSEEK_BREAKER_OPEN_SECONDS")
+    
+    # Passive DeepSeek health window; probe interval 0 disables the synthetic probe
+    deepseek_health_window_seconds: float = Field(default=300.0, env="DEEPSEEK_HEALTH_WINDOW_SECONDS")
+    deepseek_health_probe_interval: float = Field(default=0.0, env="DEEPSEEK_HEALTH_PROBE_INTERVAL")
     
     # Server
     host: str = Field(default="0.0.0.0", env="HOST")
@@ -73,6 +162,13 @@ class Settings(BaseSettings):
             raise ValueError("Secret keys must be at least 32 characters long")
         return v
     
+    @validator("conversation_backend")
+    def validate_conversation_backend(cls, v):
+        """Ensure a supported conversation backend is selected"""
+        if v not in ["memory", "redis", "sqlite"]:
+            raise ValueError("Conversation backend must be: memory, redis, or sqlite")
+        return v
+    
     @validator("allowed_origins")
     def validate_cors_origins(cls, v):
         """Ensure CORS origins are explicitly set in production"""
@@ -6,7 +6,7 @@ from sqlalchemy.pool import QueuePool
 from sqlalchemy.engine import Engine
 import sqlite3
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, Optional
 from app.config import settings
 import structlog
 
@@ -171,11 +171,62 @@ class DatabaseManager:
 # Global database manager
 db_manager = DatabaseManager()
 
+class LazySession:
+    """
+    Request-scoped session that only connects when used
+    
+    Behaves like a Session (attribute access is forwarded), but the real
+    session is created on first use, so a request that never touches the
+    database never checks out a pooled connection or commits an empty
+    transaction. `release()` commits and closes the session as soon as the
+    database work is done, returning the connection to the pool before
+    slow work (password hashing, price feeds, LLM calls) continues; using
+    it again afterwards transparently opens a new session.
+    """
+    
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._session: Optional[Session] = None
+    
+    @property
+    def session(self) -> Session:
+        """The underlying session, created on first access"""
+        if self._session is None:
+            self._session = self._session_factory()
+        return self._session
+    
+    @property
+    def active(self) -> bool:
+        return self._session is not None
+    
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+    
+    def release(self, commit: bool = True):
+        """Finish the current session (commit or roll back) and return its connection"""
+        session, self._session = self._session, None
+        if session is None:
+            return
+        try:
+            if commit:
+                session.commit()
+            else:
+                session.rollback()
+        finally:
+            session.close()
+
 # FastAPI dependency for database sessions
-def get_db() -> Generator[Session, None, None]:
-    """FastAPI dependency for database sessions"""
-    with db_manager.get_db_session() as session:
-        yield session
+def get_db() -> Generator[LazySession, None, None]:
+    """FastAPI dependency for database sessions (connects on first use)"""
+    db = LazySession(db_manager.SessionLocal)
+    try:
+        yield db
+        db.release()
+    except Exception as e:
+        if db.active:
+            logger.error("Database session error", error=str(e))
+        db.release(commit=False)
+        raise
 
 # Database models for the application
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Numeric
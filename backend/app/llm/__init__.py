@@ -0,0 +1,41 @@
+"""
+LLM package for Nisab Wisdom AI
+Provider catalog, routing engine and gateway shared by the chat entry points
+
+Independent of app.config so the standalone *_main.py scripts can use it
+without the full application settings.
+"""
+
+from .bulkhead import Bulkhead, BulkheadFull
+from .deadline import DeadlineExceeded, adaptive_timeout, request_deadline
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, breaker_snapshots, get_breaker
+from .providers import ProviderError, ProviderSpec, call_provider, stream_provider
+from .health import LatencyHistogram, RollingHealth
+from .gateway import LLMGateway, gateway
+from .router import ProviderResult, ProviderRouter
+from .catalog import PROVIDERS, ROUTING_PROFILES, RoutingProfile, build_router
+
+__all__ = [
+    "Bulkhead",
+    "BulkheadFull",
+    "DeadlineExceeded",
+    "adaptive_timeout",
+    "request_deadline",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "breaker_snapshots",
+    "get_breaker",
+    "ProviderError",
+    "ProviderSpec",
+    "call_provider",
+    "stream_provider",
+    "LLMGateway",
+    "LatencyHistogram",
+    "gateway",
+    "ProviderResult",
+    "ProviderRouter",
+    "PROVIDERS",
+    "ROUTING_PROFILES",
+    "RoutingProfile",
+    "build_router",
+]
@@ -0,0 +1,176 @@
+"""
+Concurrency bulkhead for upstream LLM calls
+Caps calls in flight, bounds the queue behind them and refuses early
+when a slot would not arrive in time
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+import asyncio
+import math
+import time
+
+from .health import LatencyHistogram
+
+# Wait-time buckets in seconds (most admissions are immediate)
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class BulkheadFull(Exception):
+    """A call was refused admission; `retry_after` is a whole number of seconds"""
+
+    def __init__(self, name: str, reason: str, retry_after: float):
+        self.name = name
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"{name} overloaded ({reason}), retry after {self.retry_after}s")
+
+
+class Bulkhead:
+    """
+    Bounded semaphore with a bounded FIFO queue
+
+    Up to `max_in_flight` callers hold a slot at once; up to `max_queue`
+    more wait for one in arrival order (None means no bound). A caller is
+    refused straight away with BulkheadFull when the queue is full, or
+    when the expected wait — its queue position over `max_in_flight`,
+    times the average time a slot is held — already exceeds its
+    `timeout`; otherwise it waits at most `timeout` seconds. Failing fast
+    keeps a burst from piling up coroutines that would all time out
+    together.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        max_queue: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._hold_seconds: Optional[float] = None  # moving average
+        self._wait = LatencyHistogram(WAIT_BUCKETS)
+        self._counters = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_deadline": 0,
+            "rejected_timeout": 0,
+            "max_queue_depth": 0
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self, position: Optional[int] = None) -> float:
+        """Seconds until a caller at `position` in the queue (default: next arrival) gets a slot"""
+        if self._hold_seconds is None:
+            return 0.0
+        if position is None:
+            position = len(self._waiters) + 1
+        return math.ceil(position / self.max_in_flight) * self._hold_seconds
+
+    def _reject(self, reason: str, retry_after: float):
+        self._counters[f"rejected_{reason}"] += 1
+        raise BulkheadFull(self.name, reason, retry_after)
+
+    def check(self, timeout: Optional[float] = None):
+        """
+        Raise BulkheadFull if a caller arriving now would be refused
+
+        Reserves nothing: for callers that must answer before the call is
+        made (a stream's status line), not a substitute for acquire().
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            return
+
+        if self.max_queue is not None and len(self._waiters) >= self.max_queue:
+            self._reject("queue_full", self.estimated_wait())
+
+        expected = self.estimated_wait()
+        if timeout is not None and expected > timeout:
+            self._reject("deadline", expected)
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """Take a slot, queueing for at most `timeout` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._admitted(started)
+            return
+
+        self.check(timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._counters["queued"] += 1
+        self._counters["max_queue_depth"] = max(self._counters["max_queue_depth"], len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject("timeout", self.estimated_wait())
+        self._admitted(started)
+
+    def _admitted(self, started: float):
+        self._counters["admitted"] += 1
+        self._wait.observe(time.monotonic() - started)
+
+    def release(self, held_seconds: Optional[float] = None):
+        """Give a slot back, handing it straight to the longest waiter"""
+        if held_seconds is not None:
+            if self._hold_seconds is None:
+                self._hold_seconds = held_seconds
+            else:
+                self._hold_seconds += 0.2 * (held_seconds - self._hold_seconds)
+
+        # Over the cap only after it was lowered; let the excess drain first
+        if self.in_flight <= self.max_in_flight:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)  # the slot moves over; in_flight is unchanged
+                    return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, timeout: Optional[float] = None):
+        """Hold a slot for the duration of the block"""
+        await self.acquire(timeout)
+        started = time.monotonic()
+        try:
+            yield self
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "estimated_wait_ms": round(self.estimated_wait() * 1000, 1),
+            "wait": self._wait.snapshot(),
+            **self._counters
+        }
@@ -0,0 +1,211 @@
+"""
+LLM provider catalog
+Every upstream endpoint and routing profile used by the chat entry points
+
+API keys are read from the environment variable named in `api_key_env`;
+providers whose required key is missing are skipped by the router.
+"""
+
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .providers import ProviderSpec
+from .router import ProviderRouter
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OLLAMA_URL = "http://localhost:11434/api/generate"
+HUGGINGFACE_URL = "https://api-inference.huggingface.co/models/{model}"
+
+OPENROUTER_HEADERS = {
+    "HTTP-Referer": "https://nisab-wisdom-ai.vercel.app",
+    "X-Title": "Nisab Wisdom AI"
+}
+
+GENERAL_ASSISTANT_PROMPT = "You are a helpful AI assistant. Answer questions clearly and helpfully."
+
+ISLAMIC_FINANCE_PROMPT = """You are an Islamic Finance expert AI assistant. Provide accurate, Shariah-compliant guidance on:
+- Zakat calculations and obligations
+- Halal investment screening
+- Islamic banking principles (Murabaha, Ijara, Mudaraba)
+- Cryptocurrency permissibility
+- Business ethics in Islam
+
+Always cite relevant Islamic principles and be clear about what is halal vs haram."""
+
+
+def _huggingface(name: str, model: str, priority: int, **overrides) -> ProviderSpec:
+    return ProviderSpec(
+        name=name,
+        kind="huggingface",
+        url=HUGGINGFACE_URL.format(model=model),
+        model=model,
+        priority=priority,
+        api_key_env="HUGGINGFACE_API_KEY",
+        api_key_required=False,  # anonymous calls use the shared free tier
+        **overrides
+    )
+
+
+PROVIDERS: Dict[str, ProviderSpec] = {spec.name: spec for spec in [
+    # Hosted OpenAI-compatible APIs
+    ProviderSpec(
+        name="openrouter-mistral-7b",
+        url=OPENROUTER_URL,
+        model="mistralai/mistral-7b-instruct:free",
+        priority=10,
+        api_key_env="OPENROUTER_API_KEY",
+        system_prompt=GENERAL_ASSISTANT_PROMPT,
+        headers=OPENROUTER_HEADERS
+    ),
+    ProviderSpec(
+        name="openrouter-llama-3.1-8b",
+        url=OPENROUTER_URL,
+        model="meta-llama/llama-3.1-8b-instruct:free",
+        priority=20,
+        api_key_env="OPENROUTER_API_KEY",
+        headers={"HTTP-Referer": OPENROUTER_HEADERS["HTTP-Referer"]}
+    ),
+    ProviderSpec(
+        name="groq-llama-3.1-8b",
+        url="https://api.groq.com/openai/v1/chat/completions",
+        model="llama-3.1-8b-instant",
+        priority=30,
+        timeout=10.0,
+        max_tokens=150,
+        api_key_env="GROQ_API_KEY"
+    ),
+    ProviderSpec(
+        name="together-llama-3.2-3b",
+        url="https://api.together.xyz/v1/chat/completions",
+        model="meta-llama/Llama-3.2-3B-Instruct-Turbo",
+        priority=40,
+        timeout=10.0,
+        max_tokens=150,
+        api_key_env="TOGETHER_API_KEY"
+    ),
+    ProviderSpec(
+        name="together-mixtral-8x7b",
+        url="https://api.together.xyz/v1/chat/completions",
+        model="mistralai/Mixtral-8x7B-Instruct-v0.1",
+        priority=40,
+        timeout=10.0,
+        api_key_env="TOGETHER_API_KEY"
+    ),
+    ProviderSpec(
+        name="openai-gpt-3.5",
+        url="https://api.openai.com/v1/chat/completions",
+        model="gpt-3.5-turbo",
+        priority=50,
+        timeout=10.0,
+        api_key_env="OPENAI_API_KEY"
+    ),
+    ProviderSpec(
+        name="deepseek-chat",
+        url="https://api.deepseek.com/chat/completions",
+        model="deepseek-chat",
+        priority=10,
+        timeout=30.0,
+        max_tokens=1500,
+        api_key_env="DEEPSEEK_API_KEY"
+    ),
+
+    # Local Ollama models
+    ProviderSpec(
+        name="ollama-mistral-7b",
+        kind="ollama",
+        url=OLLAMA_URL,
+        model="mistral:7b",
+        priority=60,
+        options={"top_p": 0.9}
+    ),
+    ProviderSpec(
+        name="ollama-mistral-7b-instruct",
+        kind="ollama",
+        url=OLLAMA_URL,
+        model="mistral:7b-instruct",
+        priority=70,
+        prompt_template="You are a helpful AI assistant. Please answer this question: {message}"
+    ),
+    ProviderSpec(
+        name="ollama-llama2",
+        kind="ollama",
+        url=OLLAMA_URL,
+        model="llama2",
+        priority=60,
+        timeout=10.0
+    ),
+
+    # Hugging Face Inference API
+    _huggingface(
+        "hf-dialogpt-large-islamic",
+        "microsoft/DialoGPT-large",
+        priority=10,
+        timeout=10.0,
+        prompt_template="{system_prompt}\n\nUser: {message}\nAssistant:"
+    ),
+    _huggingface("hf-dialogpt-medium", "microsoft/DialoGPT-medium", priority=10, timeout=30.0),
+    _huggingface("hf-blenderbot-400m", "facebook/blenderbot-400M-distill", priority=20, timeout=30.0),
+    _huggingface("hf-dialogpt-large", "microsoft/DialoGPT-large", priority=30, timeout=30.0),
+    _huggingface("hf-qwen-coder-32b", "Qwen/Qwen2.5-Coder-32B-Instruct", priority=40, timeout=30.0),
+]}
+
+
+class RoutingProfile(BaseModel):
+    """Which providers an entry point uses and how they are raced"""
+
+    providers: List[str]
+    width: int = 1
+    hedge_delay: Optional[float] = None
+    budget: float = 30.0
+
+
+ROUTING_PROFILES: Dict[str, RoutingProfile] = {
+    # final_ai_main.py: race the two OpenRouter models, hedge down the list
+    "final": RoutingProfile(
+        providers=[
+            "openrouter-mistral-7b",
+            "openrouter-llama-3.1-8b",
+            "groq-llama-3.1-8b",
+            "together-llama-3.2-3b",
+            "ollama-mistral-7b",
+            "ollama-mistral-7b-instruct"
+        ],
+        width=2,
+        hedge_delay=2.0,
+        budget=20.0
+    ),
+    "free": RoutingProfile(
+        providers=["hf-dialogpt-large-islamic", "together-mixtral-8x7b", "openai-gpt-3.5"],
+        width=2,
+        hedge_delay=2.0,
+        budget=15.0
+    ),
+    "real": RoutingProfile(
+        providers=["openai-gpt-3.5", "together-mixtral-8x7b", "ollama-llama2"],
+        width=2,
+        hedge_delay=2.0,
+        budget=15.0
+    ),
+    "working": RoutingProfile(
+        providers=["hf-dialogpt-medium", "hf-blenderbot-400m", "hf-dialogpt-large", "hf-qwen-coder-32b"],
+        width=2,
+        hedge_delay=5.0,
+        budget=40.0
+    ),
+    "simple": RoutingProfile(
+        providers=["deepseek-chat"],
+        budget=30.0
+    ),
+}
+
+
+def build_router(profile_name: str) -> ProviderRouter:
+    """Create the router for a named routing profile"""
+    profile = ROUTING_PROFILES[profile_name]
+    return ProviderRouter(
+        providers=[PROVIDERS[name] for name in profile.providers],
+        width=profile.width,
+        hedge_delay=profile.hedge_delay,
+        budget=profile.budget
+    )
@@ -0,0 +1,195 @@
+"""
+Circuit breakers for LLM providers
+Stop calling an upstream that is failing or slow, then probe it back to health
+"""
+
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its provider's circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker for one upstream provider
+
+    Closed: calls flow and their outcomes are kept for `window_seconds`.
+    Once at least `min_calls` are in the window, the circuit opens when the
+    error rate reaches `failure_rate_threshold` or the share of calls slower
+    than `slow_call_seconds` reaches `slow_call_rate_threshold`.
+
+    Open: calls are refused until `open_seconds` have passed.
+
+    Half-open: up to `half_open_max_calls` probe calls are let through; the
+    circuit closes after that many successes and re-opens on any failure.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 20.0,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._last_probe_at = 0.0
+        # (timestamp, failed, slow) per finished call
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self._counters = {
+            "opened": 0,
+            "rejected": 0
+        }
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        logger.warning(f"Circuit for {self.name}: {self._state} -> {state}")
+        self._state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self._counters["opened"] += 1
+        elif state == CLOSED:
+            self._outcomes.clear()
+
+    def allow_request(self) -> bool:
+        """Reserve permission for one call; False means fail fast"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            now = time.monotonic()
+            # A probe that never reported back must not wedge the circuit
+            if now - self._last_probe_at >= self.open_seconds:
+                self._probes_in_flight = 0
+            if self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                self._last_probe_at = now
+                return True
+        self._counters["rejected"] += 1
+        return False
+
+    def guard(self):
+        """Raise CircuitOpenError unless a call may proceed"""
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+
+    def record_success(self, latency: float):
+        self._record(failed=False, latency=latency)
+
+    def record_failure(self, latency: float = 0.0):
+        self._record(failed=True, latency=latency)
+
+    def release(self):
+        """Give back a reserved call that finished without an outcome (e.g. cancelled)"""
+        if self._state == HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def _record(self, failed: bool, latency: float):
+        slow = latency >= self.slow_call_seconds
+
+        if self._state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if failed or slow:
+                self._transition(OPEN)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_max_calls:
+                self._transition(CLOSED)
+            return
+
+        if self._state == OPEN:
+            return  # a call that started before the circuit opened
+
+        now = time.monotonic()
+        self._outcomes.append((now, failed, slow))
+        self._trim(now)
+
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+
+        failures = sum(1 for _, is_failure, _ in self._outcomes if is_failure)
+        slow_calls = sum(1 for _, _, is_slow in self._outcomes if is_slow)
+        if (
+            failures / calls >= self.failure_rate_threshold
+            or slow_calls / calls >= self.slow_call_rate_threshold
+        ):
+            self._transition(OPEN)
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Current state and window statistics for health reporting"""
+        state = self.state
+        self._trim(time.monotonic())
+        calls = len(self._outcomes)
+        failures = sum(1 for _, is_failure, _ in self._outcomes if is_failure)
+        slow_calls = sum(1 for _, _, is_slow in self._outcomes if is_slow)
+
+        retry_in: Optional[float] = None
+        if state == OPEN:
+            retry_in = round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+
+        return {
+            "state": state,
+            "window_calls": calls,
+            "error_rate": round(failures / calls, 4) if calls else 0.0,
+            "slow_call_rate": round(slow_calls / calls, 4) if calls else 0.0,
+            "retry_in_seconds": retry_in,
+            **self._counters
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **options) -> CircuitBreaker:
+    """Process-wide breaker for a provider, created on first use"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(name, **options)
+        _breakers[name] = breaker
+    return breaker
+
+
+def breaker_snapshots() -> Dict[str, Dict[str, object]]:
+    """Snapshot of every breaker created in this process"""
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
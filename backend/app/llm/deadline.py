@@ -0,0 +1,78 @@
+"""
+Request deadlines for LLM calls
+A request-scoped time budget that queueing, retries and timeouts all draw from
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import time
+
+# Absolute time.monotonic() by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before the call could be made"""
+    pass
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """
+    Bound every LLM call awaited inside the block by `seconds`
+
+    The deadline lives in a context variable, so it follows the request
+    through the services into the gateway without being passed along. An
+    enclosing deadline that ends sooner still wins. `None` lifts the
+    deadline, for background work started from inside a request.
+    """
+    if seconds is None:
+        value = None
+    else:
+        value = time.monotonic() + seconds
+        current = _deadline.get()
+        if current is not None:
+            value = min(value, current)
+
+    token = _deadline.set(value)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget, or None without a deadline"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def budget(timeout: Optional[float]) -> Optional[float]:
+    """`timeout` capped at the remaining budget; raises DeadlineExceeded once it is spent"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+
+def adaptive_timeout(
+    p95: Optional[float],
+    default: float,
+    multiplier: float = 3.0,
+    minimum: float = 5.0
+) -> float:
+    """
+    Per-attempt timeout from observed p95 latency
+
+    A healthy upstream answers well inside `multiplier` x p95, so waiting
+    longer mostly burns budget a retry could use. Without enough history
+    (p95 None) the static `default` applies, and it also caps the result.
+    """
+    if p95 is None:
+        return default
+    return min(default, max(minimum, p95 * multiplier))
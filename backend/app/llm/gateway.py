@@ -0,0 +1,277 @@
+"""
+LLM gateway
+One connection pool, per-provider bulkheads and latency histograms for
+every upstream model call
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Sequence
+import asyncio
+import logging
+import time
+
+import httpx
+
+from . import deadline
+from .bulkhead import Bulkhead
+from .health import LatencyHistogram
+from .providers import ProviderSpec, call_provider, stream_provider
+
+logger = logging.getLogger(__name__)
+
+
+class _Lane:
+    """Bulkhead and call metrics for one provider"""
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.bulkhead = Bulkhead(name, max_concurrency)
+        self.calls = 0
+        self.failures = 0
+        self.latency = LatencyHistogram()
+        self.first_token = LatencyHistogram()
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "bulkhead": self.bulkhead.stats(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "latency": self.latency.snapshot(),
+            "first_token": self.first_token.snapshot()
+        }
+
+
+class LLMGateway:
+    """
+    Shared entry point for upstream LLM calls
+
+    Every provider call in the process goes through one keep-alive
+    `httpx.AsyncClient`, so connections (and TLS sessions) to a host are
+    reused whichever entry point or router makes the call. Each provider
+    gets a lane: a Bulkhead capping its calls in flight and the queue
+    behind them (admission can be refused with BulkheadFull), and
+    histograms of call latency and, for streams, time to first delta.
+
+    `complete()` and `stream()` call catalog providers through the
+    adapters in providers.py; clients with their own wire format (the
+    DeepSeek client) use `client`, `slot()` and `observe()` directly.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        http2: bool = False
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lanes: Dict[str, _Lane] = {}
+
+    def configure(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None
+    ):
+        """Size the shared pool; takes effect the next time the pool is opened"""
+        if max_connections is not None:
+            self.max_connections = max_connections
+        if max_keepalive_connections is not None:
+            self.max_keepalive_connections = max_keepalive_connections
+        if keepalive_expiry is not None:
+            self.keepalive_expiry = keepalive_expiry
+        if http2 is not None:
+            self.http2 = http2
+
+    def start(self) -> httpx.AsyncClient:
+        """Open the shared keep-alive client if it is not open, and return it"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                headers={"User-Agent": "Nisab-Wisdom-AI/1.0"}
+            )
+            logger.info(
+                f"LLM gateway pool opened (max_connections={self.max_connections}, "
+                f"keepalive={self.max_keepalive_connections}, http2={self.http2})"
+            )
+        return self._client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared keep-alive client, opened on first use"""
+        return self.start()
+
+    @property
+    def is_open(self) -> bool:
+        return self._client is not None and not self._client.is_closed
+
+    async def aclose(self):
+        """Close the shared pool (it reopens on the next call)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("LLM gateway pool closed")
+
+    def _lane(self, provider: str, max_concurrency: Optional[int] = None) -> _Lane:
+        lane = self._lanes.get(provider)
+        if lane is None:
+            lane = self._lanes[provider] = _Lane(provider, max_concurrency or 8)
+        return lane
+
+    def limit(
+        self,
+        provider: str,
+        max_concurrency: int,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        """
+        Set a provider's concurrency cap, queue bound and longest queue wait
+
+        A larger cap lets queued callers in on the next release; a smaller
+        one applies as calls in flight finish.
+        """
+        bulkhead = self._lane(provider, max_concurrency).bulkhead
+        bulkhead.max_in_flight = max_concurrency
+        bulkhead.max_queue = max_queue
+        bulkhead.timeout = queue_timeout
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        provider: str,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Hold one of the provider's slots; raises BulkheadFull if refused
+
+        The queue wait is also capped by the request deadline, if one is set.
+        """
+        lane = self._lane(provider, max_concurrency)
+        if timeout is None:
+            timeout = lane.bulkhead.timeout
+        timeout = deadline.budget(timeout)
+        async with lane.bulkhead.admit(timeout):
+            yield lane
+
+    def check(self, provider: str, timeout: Optional[float] = None):
+        """Raise BulkheadFull now if `slot(provider)` would refuse a caller arriving now"""
+        lane = self._lane(provider)
+        if timeout is None:
+            timeout = lane.bulkhead.timeout
+        lane.bulkhead.check(deadline.budget(timeout))
+
+    def observe(self, provider: str, seconds: float, ok: bool = True):
+        """Record one finished call"""
+        lane = self._lane(provider)
+        lane.calls += 1
+        if not ok:
+            lane.failures += 1
+        lane.latency.observe(seconds)
+
+    def latency(self, provider: str) -> LatencyHistogram:
+        return self._lane(provider).latency
+
+    def bulkhead(self, provider: str) -> Bulkhead:
+        return self._lane(provider).bulkhead
+
+    async def complete(self, spec: ProviderSpec, message: str, system_prompt: Optional[str] = None) -> str:
+        """Answer text from one provider"""
+        async with self.slot(spec.name, spec.max_concurrency):
+            started = time.monotonic()
+            try:
+                content = await call_provider(
+                    self.client, spec, message, system_prompt, deadline.budget(spec.timeout)
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.observe(spec.name, time.monotonic() - started, ok=False)
+                raise
+            self.observe(spec.name, time.monotonic() - started)
+            return content
+
+    async def stream(
+        self,
+        spec: ProviderSpec,
+        message: str,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Text deltas from one provider
+
+        The slot is held until the stream ends, so close the iterator
+        (`aclose()`) when abandoning it early.
+        """
+        async with self.slot(spec.name, spec.max_concurrency) as lane:
+            started = time.monotonic()
+            received = False
+            try:
+                timeout = deadline.budget(spec.timeout)
+                async for delta in stream_provider(self.client, spec, message, system_prompt, timeout):
+                    if not received:
+                        received = True
+                        lane.first_token.observe(time.monotonic() - started)
+                    yield delta
+            except (asyncio.CancelledError, GeneratorExit):
+                raise
+            except Exception:
+                self.observe(spec.name, time.monotonic() - started, ok=False)
+                raise
+            self.observe(spec.name, time.monotonic() - started)
+
+    def pool_stats(self) -> Dict[str, object]:
+        """
+        Connection pool occupancy
+
+        httpx has no public API for its pool, so the counts come from
+        transport internals when they look as expected, and are None
+        (unknown) otherwise rather than failing after an httpx upgrade.
+        """
+        stats = {
+            "open": self.is_open,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "connections": 0,
+            "idle_connections": 0,
+            "active_connections": 0
+        }
+        if not stats["open"]:
+            return stats
+
+        try:
+            pool = getattr(self._client, "_transport", None)
+            connections = list(getattr(pool, "_pool").connections)
+            idle = sum(1 for conn in connections if conn.is_idle())
+        except Exception:
+            stats.update({"connections": None, "idle_connections": None, "active_connections": None})
+            return stats
+        stats.update({
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle
+        })
+        return stats
+
+    def stats(self) -> Dict[str, object]:
+        """Pool occupancy plus every provider lane"""
+        return {
+            "pool": self.pool_stats(),
+            "providers": {name: lane.snapshot() for name, lane in self._lanes.items()}
+        }
+
+
+# Process-wide gateway shared by the routers and the DeepSeek client
+gateway = LLMGateway()
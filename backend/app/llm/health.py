@@ -0,0 +1,169 @@
+"""
+Passive health tracking for LLM providers
+Derives provider health from the outcomes of real calls instead of live probes
+"""
+
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+import time
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# Bucket upper bounds in seconds; slower calls land in the overflow bucket
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram
+
+    Recording is one bisect and an increment, so it can sit on every call.
+    Quantiles are read back as the upper bound of the bucket they fall in
+    (the slowest observation for the overflow bucket).
+    """
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self._counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Approximate latency (seconds) below which `fraction` of calls finished"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, object]:
+        """Cumulative bucket counts keyed by upper bound in ms, plus quantiles"""
+        buckets: Dict[str, int] = {}
+        seen = 0
+        for bound, count in zip(self.bounds, self._counts):
+            seen += count
+            buckets[f"{bound * 1000:g}"] = seen
+        buckets["+Inf"] = self.count
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+            "max_ms": ms(self.max) if self.count else None,
+            "buckets": buckets
+        }
+
+
+class RollingHealth:
+    """
+    Rolling window of recent call outcomes for one provider
+
+    Calls are recorded as they finish; `snapshot()` reports success rate,
+    p50/p95 latency and the last error over the last `window_seconds`
+    (at most `max_samples` calls). The computed snapshot is cached for
+    `refresh_seconds`, so health endpoints can be polled freely.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        max_samples: int = 1000,
+        refresh_seconds: float = 1.0,
+        healthy_success_rate: float = 0.95,
+        degraded_success_rate: float = 0.5
+    ):
+        self.window_seconds = window_seconds
+        self.refresh_seconds = refresh_seconds
+        self.healthy_success_rate = healthy_success_rate
+        self.degraded_success_rate = degraded_success_rate
+
+        # (timestamp, ok, latency seconds)
+        self._samples: Deque[Tuple[float, bool, float]] = deque(maxlen=max_samples)
+        self._last_error: Optional[str] = None
+        self._last_error_at: Optional[float] = None
+        self._last_success_at: Optional[float] = None
+        self._snapshot: Optional[Dict[str, object]] = None
+        self._snapshot_at = 0.0
+        self._sorted_latencies: List[float] = []
+
+    def record_success(self, latency: float):
+        self._samples.append((time.monotonic(), True, latency))
+        self._last_success_at = time.time()
+
+    def record_failure(self, latency: float, error: str):
+        self._samples.append((time.monotonic(), False, latency))
+        self._last_error = error
+        self._last_error_at = time.time()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Cached health summary of the current window"""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._snapshot_at < self.refresh_seconds:
+            return self._snapshot
+
+        cutoff = now - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+        calls = len(self._samples)
+        successes = sum(1 for _, ok, _ in self._samples if ok)
+        latencies = sorted(latency for _, ok, latency in self._samples if ok)
+        self._sorted_latencies = latencies
+
+        if not calls:
+            status = "unknown"
+        elif successes / calls >= self.healthy_success_rate:
+            status = "healthy"
+        elif successes / calls >= self.degraded_success_rate:
+            status = "degraded"
+        else:
+            status = "unhealthy"
+
+        self._snapshot = {
+            "status": status,
+            "window_seconds": self.window_seconds,
+            "window_calls": calls,
+            "success_rate": round(successes / calls, 4) if calls else None,
+            "latency_p50_ms": round(_percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+            "latency_p95_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+            "last_error": self._last_error,
+            "last_error_at": _isoformat(self._last_error_at),
+            "last_success_at": _isoformat(self._last_success_at)
+        }
+        self._snapshot_at = now
+        return self._snapshot
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Successful-call latency (seconds) at `fraction` over the window, as of the cached snapshot"""
+        self.snapshot()
+        if not self._sorted_latencies:
+            return None
+        return _percentile(self._sorted_latencies, fraction)
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
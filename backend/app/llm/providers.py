@@ -0,0 +1,214 @@
+"""
+LLM provider adapters
+Declarative provider specs and the request/response shapes of each API kind
+"""
+
+from typing import Any, AsyncIterator, Dict, Literal, Optional, Tuple
+import json
+import os
+
+import httpx
+from pydantic import BaseModel, Field
+
+
+class ProviderError(Exception):
+    """A provider call failed or returned no usable answer"""
+    pass
+
+
+class ProviderSpec(BaseModel):
+    """One upstream model endpoint, declared in the provider catalog"""
+
+    name: str
+    kind: Literal["openai", "ollama", "huggingface"] = "openai"
+    url: str
+    model: str
+    priority: int = 100  # lower runs first
+    timeout: float = 15.0
+    max_concurrency: int = 8  # calls in flight at once, enforced by the gateway
+    max_tokens: int = 500
+    temperature: float = 0.7
+    api_key_env: Optional[str] = None  # environment variable holding the key
+    api_key_required: bool = True
+    system_prompt: Optional[str] = None  # overrides the caller's prompt
+    prompt_template: str = "{message}"  # for completion-style APIs
+    options: Dict[str, Any] = Field(default_factory=dict)
+    headers: Dict[str, str] = Field(default_factory=dict)
+
+    @property
+    def api_key(self) -> Optional[str]:
+        if not self.api_key_env:
+            return None
+        return os.environ.get(self.api_key_env) or None
+
+    @property
+    def configured(self) -> bool:
+        """False when a required API key is missing from the environment"""
+        return bool(self.api_key) or not (self.api_key_env and self.api_key_required)
+
+
+def build_request(
+    spec: ProviderSpec,
+    message: str,
+    system_prompt: Optional[str] = None,
+    stream: bool = False
+) -> Tuple[Dict[str, str], Dict[str, Any], str]:
+    """Return (headers, json body, rendered prompt) for a provider call"""
+    system_prompt = spec.system_prompt or system_prompt
+    prompt = spec.prompt_template.format(message=message, system_prompt=system_prompt or "")
+
+    headers = {"Content-Type": "application/json", **spec.headers}
+    if spec.api_key:
+        headers["Authorization"] = f"Bearer {spec.api_key}"
+
+    if spec.kind == "openai":
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        body = {
+            "model": spec.model,
+            "messages": messages,
+            "max_tokens": spec.max_tokens,
+            "temperature": spec.temperature,
+            **spec.options
+        }
+        if stream:
+            body["stream"] = True
+    elif spec.kind == "ollama":
+        body = {
+            "model": spec.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": spec.temperature,
+                "num_predict": spec.max_tokens,
+                **spec.options
+            }
+        }
+    else:
+        body = {"inputs": prompt, **spec.options}
+
+    return headers, body, prompt
+
+
+def parse_response(spec: ProviderSpec, data: Any, prompt: str) -> str:
+    """Extract the answer text from a provider response body"""
+    text = ""
+
+    if spec.kind == "openai":
+        choices = data.get("choices") if isinstance(data, dict) else None
+        if choices:
+            text = (choices[0].get("message") or {}).get("content") or ""
+    elif spec.kind == "ollama":
+        text = data.get("response", "") if isinstance(data, dict) else ""
+    else:
+        # Inference API returns [{"generated_text": ...}] or a bare dict/str
+        item = data[0] if isinstance(data, list) and data else data
+        if isinstance(item, dict):
+            text = item.get("generated_text") or item.get("text") or ""
+        elif isinstance(item, str):
+            text = item
+        # Text-generation models echo the prompt before the continuation
+        if text.startswith(prompt):
+            text = text[len(prompt):]
+
+    text = text.strip()
+    if not text:
+        raise ProviderError(f"{spec.name} returned an empty answer")
+    return text
+
+
+async def call_provider(
+    client: httpx.AsyncClient,
+    spec: ProviderSpec,
+    message: str,
+    system_prompt: Optional[str] = None,
+    timeout: Optional[float] = None
+) -> str:
+    """Send one request to a provider and return its answer text"""
+    headers, body, prompt = build_request(spec, message, system_prompt)
+    timeout = timeout or spec.timeout
+
+    try:
+        response = await client.post(spec.url, json=body, headers=headers, timeout=timeout)
+    except httpx.TimeoutException:
+        raise ProviderError(f"{spec.name} timed out after {timeout:.1f}s")
+    except httpx.RequestError as e:
+        raise ProviderError(f"{spec.name} network error: {str(e)}")
+
+    if response.status_code != 200:
+        raise ProviderError(f"{spec.name} returned HTTP {response.status_code}")
+
+    try:
+        data = response.json()
+    except ValueError:
+        raise ProviderError(f"{spec.name} returned invalid JSON")
+
+    return parse_response(spec, data, prompt)
+
+
+def parse_stream_line(spec: ProviderSpec, line: str) -> Tuple[Optional[str], bool]:
+    """Return (text delta, finished) for one line of a streamed response"""
+    if spec.kind == "openai":
+        # Server-Sent Events: one "data: {...}" line per chunk
+        if not line.startswith("data:"):
+            return None, False
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None, True
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            return None, False
+        choices = chunk.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content"), False
+
+    # Ollama: one JSON object per line, the last one has "done": true
+    if not line.strip():
+        return None, False
+    try:
+        chunk = json.loads(line)
+    except ValueError:
+        return None, False
+    return chunk.get("response"), bool(chunk.get("done"))
+
+
+async def stream_provider(
+    client: httpx.AsyncClient,
+    spec: ProviderSpec,
+    message: str,
+    system_prompt: Optional[str] = None,
+    timeout: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a provider's answer as text deltas
+
+    The Hugging Face Inference API has no token stream for these models, so
+    its answer arrives as a single delta.
+    """
+    timeout = timeout or spec.timeout
+    if spec.kind == "huggingface":
+        yield await call_provider(client, spec, message, system_prompt, timeout)
+        return
+
+    headers, body, _ = build_request(spec, message, system_prompt, stream=True)
+    received = False
+    try:
+        async with client.stream("POST", spec.url, json=body, headers=headers, timeout=timeout) as response:
+            if response.status_code != 200:
+                raise ProviderError(f"{spec.name} returned HTTP {response.status_code}")
+            async for line in response.aiter_lines():
+                delta, finished = parse_stream_line(spec, line)
+                if delta:
+                    received = True
+                    yield delta
+                if finished:
+                    break
+    except httpx.TimeoutException:
+        raise ProviderError(f"{spec.name} timed out after {timeout:.1f}s")
+    except httpx.RequestError as e:
+        raise ProviderError(f"{spec.name} network error: {str(e)}")
+
+    if not received:
+        raise ProviderError(f"{spec.name} returned an empty answer")
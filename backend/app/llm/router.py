@@ -0,0 +1,229 @@
+"""
+Provider routing engine
+Races or hedges requests across LLM providers and keeps the first good answer
+"""
+
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import time
+
+from pydantic import BaseModel
+
+from .bulkhead import BulkheadFull
+from . import deadline as request_deadline
+from .circuit_breaker import get_breaker
+from .deadline import DeadlineExceeded
+from .gateway import LLMGateway, gateway as shared_gateway
+from .providers import ProviderError, ProviderSpec
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderResult(BaseModel):
+    """Winning answer of a routed request"""
+
+    provider: str
+    content: str
+    latency_ms: float
+
+
+class ProviderRouter:
+    """
+    Route a prompt to several providers concurrently
+
+    Providers are tried in priority order. `width` of them start at once;
+    while no answer has arrived another one is launched every `hedge_delay`
+    seconds, and each failure immediately frees its slot for the next
+    provider. The first non-empty answer wins and every other in-flight call
+    is cancelled. `budget` bounds the whole request (and the request
+    deadline, if one is set and ends sooner). Providers whose
+    circuit breaker is open are skipped without being called.
+
+    width=N with no hedge_delay races the top N providers; width=1 with a
+    hedge_delay is a classic hedged request; width=1 without one degrades to
+    the old sequential waterfall.
+
+    Calls go through the shared LLM gateway, so routers in the same process
+    share one connection pool and each provider's concurrency cap.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[ProviderSpec],
+        width: int = 1,
+        hedge_delay: Optional[float] = None,
+        budget: float = 30.0,
+        gateway: Optional[LLMGateway] = None
+    ):
+        self.providers = sorted(providers, key=lambda spec: spec.priority)
+        self.width = max(1, width)
+        self.hedge_delay = hedge_delay
+        self.budget = budget
+        self.gateway = gateway or shared_gateway
+
+        self._counters: Dict[str, Dict[str, int]] = {
+            spec.name: {"calls": 0, "wins": 0, "failures": 0, "cancelled": 0, "short_circuited": 0, "rejected": 0}
+            for spec in self.providers
+        }
+        self._breakers = {spec.name: get_breaker(spec.name) for spec in self.providers}
+
+    async def aclose(self):
+        """Close the gateway's connection pool"""
+        await self.gateway.aclose()
+
+    def eligible(self) -> List[ProviderSpec]:
+        """Providers that can be called right now, in priority order"""
+        return [spec for spec in self.providers if spec.configured]
+
+    async def complete(self, message: str, system_prompt: Optional[str] = None) -> Optional[ProviderResult]:
+        """Return the first good answer, or None if every provider failed"""
+        queue = self.eligible()
+        if not queue:
+            logger.warning("No LLM providers are configured")
+            return None
+
+        started = time.monotonic()
+        left = request_deadline.remaining()
+        deadline = started + (self.budget if left is None else min(self.budget, left))
+        pending: Dict[asyncio.Task, Tuple[ProviderSpec, float]] = {}
+
+        def launch() -> bool:
+            """Start the next provider whose circuit allows a call"""
+            while queue:
+                spec = queue.pop(0)
+                if not self._breakers[spec.name].allow_request():
+                    self._counters[spec.name]["short_circuited"] += 1
+                    logger.info(f"LLM router: skipping {spec.name}, circuit open")
+                    continue
+                self._counters[spec.name]["calls"] += 1
+                task = asyncio.ensure_future(self.gateway.complete(spec, message, system_prompt))
+                pending[task] = (spec, time.monotonic())
+                logger.info(f"LLM router: calling {spec.name}")
+                return True
+            return False
+
+        try:
+            while len(pending) < self.width and launch():
+                pass
+
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"LLM router: budget of {self.budget}s exhausted")
+                    return None
+
+                wait_for = remaining
+                if self.hedge_delay is not None and queue:
+                    wait_for = min(wait_for, self.hedge_delay)
+
+                done, _ = await asyncio.wait(
+                    pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Nothing yet: hedge with the next provider in line
+                    if self.hedge_delay is not None:
+                        launch()
+                    continue
+
+                for task in done:
+                    spec, call_started = pending.pop(task)
+                    breaker = self._breakers[spec.name]
+                    latency = time.monotonic() - call_started
+                    try:
+                        content = task.result()
+                    except (BulkheadFull, DeadlineExceeded) as e:
+                        # Local overload or a spent budget says nothing about the provider's health
+                        breaker.release()
+                        self._counters[spec.name]["rejected"] += 1
+                        logger.warning(f"LLM router: {e}")
+                    except ProviderError as e:
+                        breaker.record_failure(latency)
+                        self._counters[spec.name]["failures"] += 1
+                        logger.warning(f"LLM router: {e}")
+                    except Exception as e:
+                        breaker.record_failure(latency)
+                        self._counters[spec.name]["failures"] += 1
+                        logger.warning(f"LLM router: {spec.name} failed: {str(e)}")
+                    else:
+                        breaker.record_success(latency)
+                        self._counters[spec.name]["wins"] += 1
+                        latency_ms = (time.monotonic() - started) * 1000
+                        logger.info(f"LLM router: {spec.name} answered in {latency_ms:.0f}ms")
+                        return ProviderResult(provider=spec.name, content=content, latency_ms=latency_ms)
+
+                # Refill the slots freed by failures
+                while len(pending) < self.width and launch():
+                    pass
+
+            return None
+
+        finally:
+            await self._cancel(pending)
+
+    async def stream(self, message: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream the answer of the first provider that starts one
+
+        Streams cannot be raced without paying for every loser's tokens, so
+        providers are tried one at a time in priority order. A provider that
+        fails before its first delta hands over to the next one; once text
+        has been yielded the stream is committed and a later failure is
+        raised to the caller.
+        """
+        for spec in self.eligible():
+            breaker = self._breakers[spec.name]
+            if not breaker.allow_request():
+                self._counters[spec.name]["short_circuited"] += 1
+                logger.info(f"LLM router: skipping {spec.name}, circuit open")
+                continue
+
+            self._counters[spec.name]["calls"] += 1
+            started = time.monotonic()
+            streaming = False
+            deltas = self.gateway.stream(spec, message, system_prompt)
+            try:
+                async for delta in deltas:
+                    if not streaming:
+                        streaming = True
+                        breaker.record_success(time.monotonic() - started)
+                        self._counters[spec.name]["wins"] += 1
+                    yield delta
+                return
+            except (BulkheadFull, DeadlineExceeded) as e:
+                breaker.release()
+                self._counters[spec.name]["rejected"] += 1
+                logger.warning(f"LLM router: {e}")
+            except Exception as e:
+                if streaming:
+                    raise
+                breaker.record_failure(time.monotonic() - started)
+                self._counters[spec.name]["failures"] += 1
+                logger.warning(f"LLM router: {spec.name} stream failed: {str(e)}")
+            except BaseException:
+                if not streaming:
+                    breaker.release()
+                    self._counters[spec.name]["cancelled"] += 1
+                raise
+            finally:
+                await deltas.aclose()
+
+        raise ProviderError("No LLM provider could stream an answer")
+
+    async def _cancel(self, pending: Dict[asyncio.Task, Tuple[ProviderSpec, float]]):
+        """Cancel losing calls and wait for them to unwind"""
+        if not pending:
+            return
+        for task, (spec, _) in pending.items():
+            task.cancel()
+            self._breakers[spec.name].release()
+            self._counters[spec.name]["cancelled"] += 1
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """Per-provider counters and circuit state"""
+        return {
+            name: {**counters, "circuit": self._breakers[name].snapshot()}
+            for name, counters in self._counters.items()
+        }
@@ -7,7 +7,9 @@ from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 import structlog
 import sys
+import asyncio
 from contextlib import asynccontextmanager
+from sqlalchemy import create_engine
 
 # Import our modules
 from app.config import settings, validate_production_security
@@ -16,6 +18,10 @@ from app.security.rate_limiting import limiter
 from app.database.models import db_manager
 from app.routes import zakat, auth, health
 from app.api.v1 import chat
+from app.services.deepseek_client import deepseek_client
+from app.services.islamic_finance_ai import islamic_finance_ai
+from app.services.price_service import price_service
+from app.services import token_counter
 
 # Configure structured logging
 structlog.configure(
@@ -73,12 +79,38 @@ async def lifespan(app: FastAPI):
         logger.error("Failed to create database tables", error=str(e))
         sys.exit(1)
     
+    # Open the shared upstream connection pool for this worker
+    await deepseek_client.start()
+    
+    # One worker per host polls metal prices; the others read its snapshot
+    if settings.price_refresher_enabled:
+        await price_service.start()
+    
+    # Load the BPE encoding off the event loop (it may need a download)
+    encoding = await asyncio.to_thread(token_counter.warm_up)
+    logger.info("Token counter ready", encoding=encoding or "estimate")
+    
+    # Index the verified knowledge base (it may live in the Supabase database)
+    if settings.knowledge_base_database_url:
+        knowledge_engine = create_engine(settings.knowledge_base_database_url, pool_pre_ping=True)
+    else:
+        knowledge_engine = db_manager.engine
+    entries = await islamic_finance_ai.load_knowledge_base(knowledge_engine)
+    if knowledge_engine is not db_manager.engine:
+        knowledge_engine.dispose()
+    logger.info("Knowledge base ready", entries=entries)
+    
     logger.info("Application startup completed successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Nisab Wisdom AI API")
+    await deepseek_client.close()
+    await price_service.close()
+    await islamic_finance_ai.context_manager.close()
+    await islamic_finance_ai.conversation_store.close()
+    islamic_finance_ai.semantic_cache.close()
 
 # Create FastAPI application
 app = FastAPI(
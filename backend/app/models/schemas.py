@@ -6,6 +6,8 @@ from datetime import datetime
 from enum import Enum
 import re
 
+from app.config import settings
+
 class CurrencyEnum(str, Enum):
     """Supported currencies with validation"""
     USD = "USD"
@@ -41,7 +43,7 @@ class ZakatCalculationRequest(BaseModel):
     )
     
     gold_in_grams: Decimal = Field(
-        default=Decimal("0.00"),
+        default=Decimal("0.000"),
         ge=0,
         max_digits=10,
         decimal_places=3,
@@ -49,7 +51,7 @@ class ZakatCalculationRequest(BaseModel):
     )
     
     silver_in_grams: Decimal = Field(
-        default=Decimal("0.00"),
+        default=Decimal("0.000"),
         ge=0,
         max_digits=10,
         decimal_places=3,
@@ -134,6 +136,11 @@ class ZakatCalculationRequest(BaseModel):
             raise ValueError("Amount exceeds maximum allowed value")
         return v.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
     
+    @validator("loans", "bills", "wages")
+    def validate_liabilities(cls, v):
+        """Store liabilities at cents, like assets, so totals keep one exponent"""
+        return v.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    
     @validator("gold_in_grams", "silver_in_grams")
     def validate_precious_metals(cls, v):
         """Validate precious metal amounts are reasonable"""
@@ -178,6 +185,46 @@ class ZakatCalculationResponse(BaseModel):
     calculation_date: datetime = Field(description="When calculation was performed")
     gold_price_per_gram: Decimal = Field(description="Gold price used in calculation")
     silver_price_per_gram: Decimal = Field(description="Silver price used in calculation")
+    prices_as_of: Optional[datetime] = Field(default=None, description="When the metal prices were fetched (none for built-in prices)")
+    price_age_seconds: Optional[float] = Field(default=None, description="Age of the metal prices at calculation time")
+    prices_stale: bool = Field(default=False, description="Whether the prices were past their freshness TTL")
+    
+    class Config:
+        json_encoders = {
+            Decimal: lambda v: str(v),
+            datetime: lambda v: v.isoformat()
+        }
+
+class ZakatBatchRequest(BaseModel):
+    """
+    Batch of Zakat calculations
+    Items are validated one by one so a bad item fails alone
+    """
+    
+    # Any, not Dict: a non-object item is reported on its own, not as a 422
+    items: List[Any] = Field(
+        ...,
+        min_items=1,
+        max_items=settings.zakat_batch_max_items,
+        description="ZakatCalculationRequest objects, calculated in order"
+    )
+
+class ZakatBatchItemResult(BaseModel):
+    """Outcome of one batch item: a result or its errors"""
+    
+    index: int = Field(description="Position of the item in the request")
+    result: Optional[ZakatCalculationResponse] = Field(default=None, description="Calculation, if the item was valid")
+    errors: Optional[List[Dict[str, Any]]] = Field(default=None, description="Validation or calculation errors")
+
+class ZakatBatchResponse(BaseModel):
+    """Per-item outcomes in input order, all priced from one quote"""
+    
+    results: List[ZakatBatchItemResult] = Field(description="One entry per input item")
+    succeeded: int = Field(description="Items calculated")
+    failed: int = Field(description="Items rejected")
+    prices_as_of: Optional[datetime] = Field(default=None, description="When the metal prices were fetched (none for built-in prices)")
+    price_age_seconds: Optional[float] = Field(default=None, description="Age of the metal prices at calculation time")
+    prices_stale: bool = Field(default=False, description="Whether the prices were past their freshness TTL")
     
     class Config:
         json_encoders = {
@@ -1,11 +1,10 @@
 # Secure Authentication Routes
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import Optional
 
-from app.database.models import get_db, User
+from app.database.models import get_db, LazySession, User
 from app.models.schemas import UserRegistration, UserLogin, TokenResponse
 from app.auth.security import token_manager, get_current_user
 from app.security.rate_limiting import check_rate_limit, rate_limit
@@ -25,7 +24,7 @@ LOCKOUT_DURATION = timedelta(minutes=15)
 async def register_user(
     request: Request,
     user_data: UserRegistration,
-    db: Session = Depends(get_db)
+    db: LazySession = Depends(get_db)
 ):
     """
     Register a new user with comprehensive security checks
@@ -47,6 +46,9 @@ async def register_user(
                 detail="Registration failed"
             )
         
+        # Return the connection while bcrypt runs; the insert opens a new session
+        db.release()
+        
         # Hash password
         hashed_password = token_manager.hash_password(user_data.password)
         
@@ -91,7 +93,7 @@ async def register_user(
 async def login_user(
     request: Request,
     login_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: LazySession = Depends(get_db)
 ):
     """
     User login with security protections against brute force attacks
@@ -99,8 +101,10 @@ async def login_user(
     try:
         await check_rate_limit(request)
         
-        # Get user from database
+        # Get user from database, then return the connection during the
+        # deliberately slow password check
         user = db.query(User).filter(User.email == login_data.email).first()
+        db.release()
         
         if not user:
             # Use same timing as successful login to prevent timing attacks
@@ -134,6 +138,7 @@ async def login_user(
         # Verify password
         if not token_manager.verify_password(login_data.password, user.hashed_password):
             # Increment failed attempts
+            db.add(user)
             user.failed_login_attempts += 1
             user.last_login_attempt = datetime.utcnow()
             db.commit()
@@ -163,6 +168,7 @@ async def login_user(
             )
         
         # Reset failed attempts on successful login
+        db.add(user)
         user.failed_login_attempts = 0
         user.last_successful_login = datetime.utcnow()
         user.last_login_attempt = datetime.utcnow()
@@ -201,7 +207,7 @@ async def login_user(
 async def refresh_token(
     request: Request,
     refresh_token: str,
-    db: Session = Depends(get_db)
+    db: LazySession = Depends(get_db)
 ):
     """
     Refresh access token using refresh token
@@ -277,7 +283,7 @@ async def logout_user(
 @router.get("/me")
 async def get_current_user_info(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: LazySession = Depends(get_db)
 ):
     """
     Get current user information
@@ -1,14 +1,19 @@
 # Health check and monitoring routes
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 from datetime import datetime
 import psutil
 import platform
 from typing import Dict, Any
 
-from app.database.models import get_db, db_manager
+from app.auth.security import require_admin
+from app.database.models import get_db, db_manager, LazySession
 from app.config import settings
 from app.security.rate_limiting import rate_limiter
+from app.llm.gateway import gateway
+from app.services.deepseek_client import deepseek_client
+from app.services.islamic_finance_ai import islamic_finance_ai
+from app.services.price_service import price_service
+from app.services import token_counter
 import structlog
 
 logger = structlog.get_logger()
@@ -26,7 +31,7 @@ async def basic_health_check():
     }
 
 @router.get("/detailed")
-async def detailed_health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def detailed_health_check(db: LazySession = Depends(get_db)) -> Dict[str, Any]:
     """
     Comprehensive health check with system metrics
     """
@@ -94,8 +99,32 @@ async def detailed_health_check(db: Session = Depends(get_db)) -> Dict[str, Any]
     
     return health_status
 
+@router.get("/metrics")
+async def service_metrics(
+    admin_user: Dict[str, Any] = Depends(require_admin)
+) -> Dict[str, Any]:
+    """
+    In-process service metrics for scraping (connection pools, caches)
+    
+    **Admin only**: Requires a JWT for an email listed in ADMIN_EMAILS.
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "deepseek_pool": deepseek_client.pool_stats(),
+        "deepseek_coalescing": deepseek_client.coalescing_stats(),
+        "deepseek_hedging": deepseek_client.hedging_stats(),
+        "llm_gateway": gateway.stats(),
+        "conversation_store": islamic_finance_ai.conversation_store.stats(),
+        "conversation_context": islamic_finance_ai.context_manager.stats(),
+        "response_cache": islamic_finance_ai.response_cache.stats(),
+        "semantic_cache": islamic_finance_ai.semantic_cache.stats(),
+        "knowledge_base": islamic_finance_ai.knowledge_index.stats(),
+        "price_cache": price_service.stats(),
+        "token_counter": token_counter.stats()
+    }
+
 @router.get("/ready")
-async def readiness_check(db: Session = Depends(get_db)):
+async def readiness_check(db: LazySession = Depends(get_db)):
     """
     Kubernetes readiness probe endpoint
     """
@@ -1,91 +1,49 @@
 # Secure Zakat Calculator API Routes
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
 from decimal import Decimal
 from datetime import datetime
-import httpx
-from typing import Optional
+from typing import IO, AsyncIterator, List, Optional
+import asyncio
+import tempfile
+from pydantic import ValidationError
+from sqlalchemy import insert
 
-from app.database.models import get_db, ZakatCalculation
-from app.models.schemas import ZakatCalculationRequest, ZakatCalculationResponse
+from app.database.models import get_db, db_manager, LazySession, ZakatCalculation
+from app.models.schemas import (
+    ZakatCalculationRequest,
+    ZakatCalculationResponse,
+    ZakatBatchRequest,
+    ZakatBatchItemResult,
+    ZakatBatchResponse
+)
 from app.auth.security import get_current_active_user
 from app.security.rate_limiting import check_rate_limit, rate_limit
+from app.services.price_service import price_service
 from app.config import settings
+from app.zakat.engine import (
+    NISAB_GOLD_GRAMS,
+    NISAB_SILVER_GRAMS,
+    ZAKAT_PERCENTAGE,
+    ZakatColumns,
+    calculate_zakat_columns
+)
+from app.zakat.stream import (
+    OUTPUT_MEDIA_TYPES,
+    CsvFormatter,
+    UploadRow,
+    chunked,
+    csv_rows,
+    input_format,
+    iter_lines,
+    ndjson_lines,
+    ndjson_rows
+)
 import structlog
 
 logger = structlog.get_logger()
 router = APIRouter(prefix="/api/v1/zakat", tags=["Zakat Calculator"])
 
-# Constants for Nisab calculation (from Islamic law)
-NISAB_GOLD_GRAMS = Decimal("87.48")    # 20 Mithqal
-NISAB_SILVER_GRAMS = Decimal("612.36") # 200 Dirhams
-ZAKAT_PERCENTAGE = Decimal("0.025")    # 2.5%
-
-class PriceService:
-    """Secure service for fetching precious metal prices"""
-    
-    def __init__(self):
-        self.base_url = settings.coingecko_base_url
-        self.api_key = settings.coingecko_api_key
-        self.fallback_prices = {
-            "gold": Decimal("75.00"),   # USD per gram
-            "silver": Decimal("0.95")   # USD per gram
-        }
-    
-    async def get_precious_metal_prices(self) -> dict:
-        """
-        Fetch current gold and silver prices with security and fallback
-        """
-        try:
-            headers = {}
-            if self.api_key:
-                headers["X-CG-Pro-API-Key"] = self.api_key
-            
-            url = f"{self.base_url}/simple/price"
-            params = {
-                "ids": "gold,silver",
-                "vs_currencies": "usd"
-            }
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, params=params, headers=headers)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                # Convert from USD per ounce to USD per gram
-                OUNCES_TO_GRAMS = Decimal("31.1035")
-                
-                gold_price = None
-                silver_price = None
-                
-                if "gold" in data and "usd" in data["gold"]:
-                    gold_price = Decimal(str(data["gold"]["usd"])) / OUNCES_TO_GRAMS
-                
-                if "silver" in data and "usd" in data["silver"]:
-                    silver_price = Decimal(str(data["silver"]["usd"])) / OUNCES_TO_GRAMS
-                
-                if gold_price and silver_price:
-                    logger.info(
-                        "Precious metal prices fetched",
-                        gold_price=float(gold_price),
-                        silver_price=float(silver_price)
-                    )
-                    return {
-                        "gold": gold_price.quantize(Decimal("0.01")),
-                        "silver": silver_price.quantize(Decimal("0.0001"))
-                    }
-                else:
-                    raise ValueError("Invalid price data received")
-                    
-        except Exception as e:
-            logger.warning(
-                "Failed to fetch live prices, using fallback",
-                error=str(e)
-            )
-            return self.fallback_prices
-
-price_service = PriceService()
 
 class ZakatCalculatorService:
     """Secure service for Zakat calculations"""
@@ -152,12 +110,82 @@ class ZakatCalculatorService:
 
 calculator_service = ZakatCalculatorService()
 
+def _audit_row(
+    data: ZakatCalculationRequest,
+    result: ZakatCalculationResponse,
+    user_id: Optional[str],
+    client_ip: Optional[str],
+    user_agent: Optional[str]
+) -> dict:
+    """Column values of the audit record for one calculation"""
+    return {
+        "user_id": user_id,
+        
+        # Input data
+        "cash_in_hand": data.cash_in_hand,
+        "cash_in_bank": data.cash_in_bank,
+        "gold_in_grams": data.gold_in_grams,
+        "silver_in_grams": data.silver_in_grams,
+        "investments": data.investments,
+        "business_assets": data.business_assets,
+        "property_for_trading": data.property_for_trading,
+        "loans": data.loans,
+        "bills": data.bills,
+        "wages": data.wages,
+        "currency": data.currency.value,
+        "held_for_one_year": data.held_for_one_year,
+        
+        # Results
+        "total_assets": result.total_assets,
+        "total_liabilities": result.total_liabilities,
+        "net_wealth": result.net_wealth,
+        "nisab_threshold": result.nisab_threshold,
+        "meets_nisab": result.meets_nisab,
+        "zakat_due": result.zakat_due,
+        
+        # Market data
+        "gold_price_per_gram": result.gold_price_per_gram,
+        "silver_price_per_gram": result.silver_price_per_gram,
+        
+        # Audit data
+        "client_ip": client_ip,
+        "user_agent": user_agent
+    }
+
+def _store_audit_rows(db: LazySession, rows: List[dict]):
+    """Write audit records with one multi-row INSERT; failures are logged, not raised"""
+    if not rows:
+        return
+    try:
+        db.execute(insert(ZakatCalculation), rows)
+        db.release()
+    except Exception as e:
+        logger.warning("Failed to store batch calculation records", error=str(e), count=len(rows))
+        # Don't fail the request if audit storage fails
+        db.release(commit=False)
+
+def _validation_errors(error: ValidationError) -> List[dict]:
+    """JSON-safe summary of a pydantic validation error"""
+    return [
+        {"loc": list(detail["loc"]), "msg": detail["msg"], "type": detail["type"]}
+        for detail in error.errors()
+    ]
+
+def _price_freshness(prices: dict) -> dict:
+    """How old the prices behind a response are"""
+    fetched_at = prices["fetched_at"]
+    return {
+        "last_updated": fetched_at.isoformat() if fetched_at else None,
+        "age_seconds": prices["age_seconds"],
+        "stale": prices["stale"]
+    }
+
 @router.post("/calculate", response_model=ZakatCalculationResponse)
 @rate_limit("60/minute")  # Rate limiting
 async def calculate_zakat(
     request: Request,
     calculation_data: ZakatCalculationRequest,
-    db: Session = Depends(get_db),
+    db: LazySession = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_active_user)
 ):
     """
@@ -176,50 +204,27 @@ async def calculate_zakat(
             prices["gold"],
             prices["silver"]
         )
+        result.prices_as_of = prices["fetched_at"]
+        result.price_age_seconds = prices["age_seconds"]
+        result.prices_stale = prices["stale"]
         
         # Store calculation for audit (optional for anonymous users)
         try:
-            calculation_record = ZakatCalculation(
+            calculation_record = ZakatCalculation(**_audit_row(
+                calculation_data,
+                result,
                 user_id=current_user.get("sub") if current_user else None,
-                
-                # Input data
-                cash_in_hand=calculation_data.cash_in_hand,
-                cash_in_bank=calculation_data.cash_in_bank,
-                gold_in_grams=calculation_data.gold_in_grams,
-                silver_in_grams=calculation_data.silver_in_grams,
-                investments=calculation_data.investments,
-                business_assets=calculation_data.business_assets,
-                property_for_trading=calculation_data.property_for_trading,
-                loans=calculation_data.loans,
-                bills=calculation_data.bills,
-                wages=calculation_data.wages,
-                currency=calculation_data.currency.value,
-                held_for_one_year=calculation_data.held_for_one_year,
-                
-                # Results
-                total_assets=result.total_assets,
-                total_liabilities=result.total_liabilities,
-                net_wealth=result.net_wealth,
-                nisab_threshold=result.nisab_threshold,
-                meets_nisab=result.meets_nisab,
-                zakat_due=result.zakat_due,
-                
-                # Market data
-                gold_price_per_gram=result.gold_price_per_gram,
-                silver_price_per_gram=result.silver_price_per_gram,
-                
-                # Audit data
                 client_ip=request.client.host if request.client else None,
                 user_agent=request.headers.get("user-agent")
-            )
+            ))
             
             db.add(calculation_record)
-            db.commit()
+            db.release()
             
         except Exception as e:
             logger.warning("Failed to store calculation record", error=str(e))
             # Don't fail the request if audit storage fails
-            db.rollback()
+            db.release(commit=False)
         
         logger.info(
             "Zakat calculation completed",
@@ -240,6 +245,284 @@ async def calculate_zakat(
             detail="Internal server error"
         )
 
+@router.post("/calculate/batch", response_model=ZakatBatchResponse)
+@rate_limit("10/minute")
+async def calculate_zakat_batch(
+    request: Request,
+    batch: ZakatBatchRequest,
+    db: LazySession = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_current_active_user)
+):
+    """
+    Calculate Zakat for many households or employees in one request
+    
+    Prices are fetched once for the whole batch and every audit record is
+    written with a single bulk insert. Each item is validated on its own:
+    invalid items come back with their errors, in input order, and do not
+    fail the rest of the batch.
+    """
+    try:
+        await check_rate_limit(request)
+        
+        prices = await price_service.get_precious_metal_prices()
+        
+        user_id = current_user.get("sub") if current_user else None
+        client_ip = request.client.host if request.client else None
+        user_agent = request.headers.get("user-agent")
+        
+        results = []
+        audit_rows = []
+        for index, item in enumerate(batch.items):
+            if not isinstance(item, dict):
+                results.append(ZakatBatchItemResult(
+                    index=index,
+                    errors=[{"loc": [], "msg": "Item must be a JSON object", "type": "type_error.dict"}]
+                ))
+                continue
+            
+            try:
+                calculation_data = ZakatCalculationRequest(**item)
+            except ValidationError as e:
+                results.append(ZakatBatchItemResult(index=index, errors=_validation_errors(e)))
+                continue
+            
+            try:
+                result = calculator_service.calculate_zakat(
+                    calculation_data,
+                    prices["gold"],
+                    prices["silver"]
+                )
+            except HTTPException as e:
+                results.append(ZakatBatchItemResult(
+                    index=index,
+                    errors=[{"loc": [], "msg": e.detail, "type": "calculation_error"}]
+                ))
+                continue
+            
+            result.prices_as_of = prices["fetched_at"]
+            result.price_age_seconds = prices["age_seconds"]
+            result.prices_stale = prices["stale"]
+            results.append(ZakatBatchItemResult(index=index, result=result))
+            audit_rows.append(_audit_row(calculation_data, result, user_id, client_ip, user_agent))
+        
+        # One multi-row INSERT for the whole batch
+        _store_audit_rows(db, audit_rows)
+        
+        succeeded = len(audit_rows)
+        logger.info(
+            "Zakat batch calculation completed",
+            user_id=user_id or "anonymous",
+            items=len(results),
+            succeeded=succeeded,
+            failed=len(results) - succeeded
+        )
+        
+        return ZakatBatchResponse(
+            results=results,
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+            prices_as_of=prices["fetched_at"],
+            price_age_seconds=prices["age_seconds"],
+            prices_stale=prices["stale"]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Unexpected error in zakat batch calculation", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+# Columns of streamed results (NDJSON rows carry the same keys)
+STREAM_COLUMNS = (
+    "line", "status", "currency", "total_assets", "total_liabilities", "net_wealth",
+    "nisab_threshold", "meets_nisab", "zakat_due", "errors"
+)
+
+def _process_upload_chunk(
+    chunk: List[UploadRow],
+    prices: dict,
+    user_id: Optional[str],
+    client_ip: Optional[str],
+    user_agent: Optional[str]
+) -> List[dict]:
+    """Validate, calculate and audit one chunk of uploaded rows (runs in a worker thread)"""
+    results = []
+    valid = []
+    for row in chunk:
+        if row.error is not None:
+            results.append({
+                "line": row.line,
+                "status": "error",
+                "errors": [{"loc": [], "msg": row.error, "type": "parse_error"}]
+            })
+            continue
+        try:
+            calculation_data = ZakatCalculationRequest(**row.record)
+        except ValidationError as e:
+            results.append({"line": row.line, "status": "error", "errors": _validation_errors(e)})
+            continue
+        valid.append((len(results), calculation_data))
+        results.append({"line": row.line, "status": "ok", "currency": calculation_data.currency.value})
+    
+    if not valid:
+        return results
+    
+    calculated = calculate_zakat_columns(
+        ZakatColumns.from_records([calculation_data for _, calculation_data in valid]),
+        prices["gold"],
+        prices["silver"]
+    )
+    audit_rows = []
+    for (position, calculation_data), values in zip(valid, calculated.rows()):
+        results[position].update((name, values[name]) for name in STREAM_COLUMNS if name in values)
+        audit_rows.append(_audit_row(
+            calculation_data,
+            ZakatCalculationResponse.construct(**values),
+            user_id,
+            client_ip,
+            user_agent
+        ))
+    _store_audit_rows(LazySession(db_manager.SessionLocal), audit_rows)
+    return results
+
+def _csv_result(result: dict) -> dict:
+    errors = result.get("errors")
+    if errors:
+        result = dict(result, errors="; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" if error["loc"] else error["msg"]
+            for error in errors
+        ))
+    return result
+
+# Results of an upload stay in memory up to this size, then move to disk
+SPOOL_MEMORY_BYTES = 1024 * 1024
+SPOOL_READ_BYTES = 64 * 1024
+
+async def _spool_results(
+    rows: AsyncIterator[UploadRow],
+    spool: IO[bytes],
+    output: str,
+    prices: dict,
+    user_id: Optional[str],
+    client_ip: Optional[str],
+    user_agent: Optional[str]
+):
+    """Write the results of an upload to `spool`, one chunk of rows at a time, in input order"""
+    formatter = CsvFormatter(STREAM_COLUMNS) if output == "csv" else None
+    if formatter is not None:
+        await asyncio.to_thread(spool.write, formatter.header().encode())
+    
+    counts = {"ok": 0, "error": 0}
+    async for chunk in chunked(rows, settings.zakat_stream_chunk_rows):
+        results = await asyncio.to_thread(
+            _process_upload_chunk, chunk, prices, user_id, client_ip, user_agent
+        )
+        for result in results:
+            counts[result["status"]] += 1
+        if formatter is not None:
+            text = formatter.rows([_csv_result(result) for result in results])
+        else:
+            text = ndjson_lines(results)
+        await asyncio.to_thread(spool.write, text.encode())
+    
+    logger.info(
+        "Zakat upload calculation completed",
+        user_id=user_id or "anonymous",
+        succeeded=counts["ok"],
+        failed=counts["error"]
+    )
+
+async def _read_spool(spool: IO[bytes]) -> AsyncIterator[bytes]:
+    """Contents of a spool from the start; closing it deletes the file"""
+    try:
+        await asyncio.to_thread(spool.seek, 0)
+        while True:
+            data = await asyncio.to_thread(spool.read, SPOOL_READ_BYTES)
+            if not data:
+                break
+            yield data
+    finally:
+        spool.close()
+
+@router.post("/calculate/stream")
+@rate_limit("5/minute")
+async def calculate_zakat_stream(
+    request: Request,
+    output: Optional[str] = None,
+    current_user: Optional[dict] = Depends(get_current_active_user)
+):
+    """
+    Calculate Zakat for every row of an uploaded ledger, streaming results back
+    
+    Send the file as the request body with Content-Type text/csv (header
+    row of ZakatCalculationRequest field names) or application/x-ndjson
+    (one JSON object per line). Rows are read as they arrive and
+    calculated in chunks of ZAKAT_STREAM_CHUNK_ROWS, and results are
+    spooled to a temporary file, so memory stays flat however large the
+    file is. The response starts once the whole body has been read: many
+    HTTP clients send all of an upload before reading any of the reply,
+    and a server writing results meanwhile would stall them both once
+    the socket buffers fill. Results come back in input order as NDJSON,
+    or as CSV with `?output=csv` or `Accept: text/csv`; each carries its
+    line number, and a row that cannot be read or fails validation gets
+    status "error" with its errors without stopping the rest. The prices
+    used (one quote for the whole file) are in the X-Gold-Price-Per-Gram,
+    X-Silver-Price-Per-Gram, X-Prices-As-Of and X-Price-Age-Seconds
+    headers.
+    """
+    source = input_format(request.headers.get("content-type"))
+    if source is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload text/csv or application/x-ndjson"
+        )
+    if output is None:
+        output = "csv" if "text/csv" in request.headers.get("accept", "") else "ndjson"
+    if output not in OUTPUT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="output must be csv or ndjson"
+        )
+    
+    await check_rate_limit(request)
+    
+    prices = await price_service.get_precious_metal_prices()
+    
+    parse = csv_rows if source == "csv" else ndjson_rows
+    rows = parse(iter_lines(request.stream()))
+    fetched_at = prices["fetched_at"]
+    headers = {
+        "X-Gold-Price-Per-Gram": str(prices["gold"]),
+        "X-Silver-Price-Per-Gram": str(prices["silver"]),
+        "X-Prices-As-Of": fetched_at.isoformat() if fetched_at else "",
+        "X-Price-Age-Seconds": "" if prices["age_seconds"] is None else str(prices["age_seconds"]),
+        "X-Prices-Stale": "true" if prices["stale"] else "false"
+    }
+    
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    try:
+        await _spool_results(
+            rows,
+            spool,
+            output,
+            prices,
+            user_id=current_user.get("sub") if current_user else None,
+            client_ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent")
+        )
+    except BaseException:
+        spool.close()
+        raise
+    
+    return StreamingResponse(
+        _read_spool(spool),
+        media_type=OUTPUT_MEDIA_TYPES[output],
+        headers=headers
+    )
+
 @router.get("/prices", response_model=dict)
 @rate_limit("120/minute")
 async def get_precious_metal_prices(
@@ -261,8 +544,8 @@ async def get_precious_metal_prices(
                 "silver": str(prices["silver"]),
                 "currency": "USD",
                 "unit": "per_gram",
-                "last_updated": datetime.utcnow().isoformat(),
-                "source": "CoinGecko API"
+                **_price_freshness(prices),
+                "source": "CoinGecko API" if prices["source"] == "coingecko" else "Fallback prices"
             }
         }
         
@@ -305,7 +588,7 @@ async def get_nisab_info(
                 "current_nisab": str(min(gold_nisab, silver_nisab)),
                 "zakat_percentage": str(ZAKAT_PERCENTAGE * 100) + "%",
                 "currency": "USD",
-                "last_updated": datetime.utcnow().isoformat()
+                **_price_freshness(prices)
             }
         }
         
@@ -168,6 +168,8 @@ class AdvancedRateLimitMiddleware:
             "/api/v1/auth/login": {"limit": 5, "window": 300, "message": "Too many login attempts"},
             "/api/v1/auth/register": {"limit": 3, "window": 3600, "message": "Too many registration attempts"},
             "/api/v1/zakat/calculate": {"limit": 60, "window": 60, "message": "Too many calculations"},
+            "/api/v1/zakat/calculate/batch": {"limit": 10, "window": 60, "message": "Too many batch calculations"},
+            "/api/v1/zakat/calculate/stream": {"limit": 5, "window": 60, "message": "Too many ledger uploads"},
             "/api/v1/prices/gold-silver": {"limit": 120, "window": 60, "message": "Too many price requests"},
         }
     
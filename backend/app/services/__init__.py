@@ -5,8 +5,10 @@ Contains AI services and external API integrations
 
 from .deepseek_client import deepseek_client
 from .islamic_finance_ai import islamic_finance_ai
+from .price_service import price_service
 
 __all__ = [
     "deepseek_client",
-    "islamic_finance_ai"
+    "islamic_finance_ai",
+    "price_service"
 ]
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Conversation context manager
+Sliding window of recent turns plus a rolling summary of everything older
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+import asyncio
+import logging
+
+from app.llm.deadline import request_deadline
+from .conversation_store import ConversationBackend, ConversationTurn
+from .token_counter import message_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+# (previous summary, turns to fold in) -> updated summary
+Summarizer = Callable[[Optional[str], List[ConversationTurn]], Awaitable[str]]
+
+
+class ConversationContextManager:
+    """
+    Build bounded model context from a conversation backend
+
+    Each request gets the rolling summary (if any) followed by the newest
+    turns that fit the remaining token budget. After a reply has been
+    stored, `schedule_fold()` checks in the background whether the
+    unsummarized turns have outgrown the window; if so, the oldest ones are
+    folded into the summary by `summarizer` and removed from the store,
+    unless the conversation changed under the summary (trimmed or cleared),
+    in which case it is dropped. Requests never wait on summarization, and the prompt size stays close
+    to constant however long the conversation runs.
+    """
+
+    def __init__(
+        self,
+        store: ConversationBackend,
+        summarizer: Summarizer,
+        token_budget: int,
+        max_turns: int,
+        summary_max_tokens: int = 300,
+        reserved_tokens: Union[int, Callable[[], int]] = 0
+    ):
+        self.store = store
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.summary_max_tokens = summary_max_tokens
+        # System prompt plus a typical user message, kept free when folding;
+        # a callable is evaluated on use, so nothing is counted at import
+        self.reserved_tokens = reserved_tokens
+
+        self._folding: Dict[str, asyncio.Task] = {}
+        self._counters = {
+            "folds": 0,
+            "turns_folded": 0,
+            "fold_failures": 0,
+            "fold_conflicts": 0,
+            "turns_dropped": 0
+        }
+
+    @property
+    def window_tokens(self) -> int:
+        """Token room for unsummarized turns once a full summary is present"""
+        reserved = self.reserved_tokens() if callable(self.reserved_tokens) else self.reserved_tokens
+        overhead = reserved + self.summary_max_tokens + message_tokens(SUMMARY_PREFIX)
+        return max(0, self.token_budget - overhead)
+
+    async def build(self, key: str, token_budget: int) -> List[Dict[str, str]]:
+        """History messages for a request, fitted to `token_budget` tokens"""
+        summary, turns = await self.store.get_context(key, limit=self.max_turns)
+
+        messages: List[Dict[str, str]] = []
+        used = 0
+        if summary:
+            content = f"{SUMMARY_PREFIX}{summary}"
+            used = message_tokens(content)
+            if used <= token_budget:
+                messages.append({"role": "system", "content": content})
+            else:
+                used = 0
+
+        # Keep the newest turns that fit; each turn carries its token count
+        kept = 0
+        for turn in reversed(turns):
+            if used + turn.tokens > token_budget:
+                break
+            used += turn.tokens
+            kept += 1
+
+        if kept < len(turns):
+            self._counters["turns_dropped"] += len(turns) - kept
+            logger.info(f"Dropped {len(turns) - kept} oldest turns for {key} to fit the token budget")
+        messages.extend(turn.to_message() for turn in turns[len(turns) - kept:])
+        return messages
+
+    def schedule_fold(self, key: str):
+        """Fold old turns into the summary in the background, once per key at a time"""
+        if key in self._folding:
+            return
+        task = asyncio.create_task(self._fold(key))
+        self._folding[key] = task
+        task.add_done_callback(lambda _: self._folding.pop(key, None))
+
+    async def _fold(self, key: str):
+        summary, turns = await self.store.get_context(key)
+
+        window = self.window_tokens
+        total = sum(turn.tokens for turn in turns)
+        if len(turns) <= self.max_turns and total <= window:
+            return
+
+        # Fold whole exchanges until the remainder is half the window, which
+        # leaves room for several more exchanges before the next fold
+        count = 0
+        remaining_turns = len(turns)
+        while remaining_turns > 2 and (
+            remaining_turns > self.max_turns // 2 or total > window // 2
+        ):
+            for turn in turns[count:count + 2]:
+                total -= turn.tokens
+            count += 2
+            remaining_turns -= 2
+        if not count:
+            return
+
+        try:
+            # Runs after the reply; the request's deadline does not apply
+            with request_deadline(None):
+                new_summary = await self.summarizer(summary, turns[:count])
+        except Exception as e:
+            # Turns stay in place; the window trims them until the next try
+            self._counters["fold_failures"] += 1
+            logger.warning(f"Conversation summary for {key} failed: {str(e)}")
+            return
+
+        new_summary = new_summary.strip()
+        if not new_summary:
+            self._counters["fold_failures"] += 1
+            return
+
+        # The conversation may have been trimmed or cleared while summarizing
+        if not await self.store.fold_turns(key, turns[:count], new_summary, previous=summary):
+            self._counters["fold_conflicts"] += 1
+            logger.info(f"Conversation {key} changed while summarizing, summary discarded")
+            return
+        self._counters["folds"] += 1
+        self._counters["turns_folded"] += count
+        logger.info(f"Folded {count} turns into the summary for {key}")
+
+    async def close(self):
+        """Cancel summaries still in flight"""
+        tasks = list(self._folding.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, "folds_in_flight": len(self._folding)}
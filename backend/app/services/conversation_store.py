@@ -0,0 +1,744 @@
+"""
+Conversation memory store for Islamic Finance AI
+Bounded in-process storage with LRU eviction and idle expiry, plus
+shared Redis and SQLite backends behind one async interface
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+
+from .token_counter import message_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationTurn:
+    """Single conversation message, stored without a per-message dict"""
+
+    __slots__ = ("role", "content", "tokens")
+
+    def __init__(self, role: str, content: str, tokens: Optional[int] = None):
+        self.role = role
+        self.content = content
+        # Counted once when the turn is created, then carried with it
+        self.tokens = message_tokens(content) if tokens is None else tokens
+
+    def to_message(self) -> Dict[str, str]:
+        """Return the turn in chat-completion message format"""
+        return {"role": self.role, "content": self.content}
+
+    def size_bytes(self) -> int:
+        """Approximate memory held by this turn"""
+        return _TURN_OVERHEAD + sys.getsizeof(self.content)
+
+
+_TURN_OVERHEAD = sys.getsizeof(ConversationTurn("", ""))
+
+
+class _Conversation:
+    """Turns of one conversation plus bookkeeping for eviction"""
+
+    __slots__ = ("turns", "summary", "size", "last_access")
+
+    def __init__(self, now: float):
+        self.turns: List[ConversationTurn] = []
+        self.summary: Optional[str] = None
+        self.size = 0
+        self.last_access = now
+
+
+class ConversationStore:
+    """
+    Bounded conversation memory
+
+    Conversations are kept in least-recently-used order and evicted when
+    either the entry budget or the byte budget is exceeded. Conversations
+    idle for longer than the TTL expire on access or during eviction sweeps.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+        max_turns: int = 20
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._total_bytes = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._conversations
+
+    def _is_expired(self, conversation: _Conversation, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - conversation.last_access > self.ttl_seconds
+
+    def _remove(self, key: str) -> Optional[_Conversation]:
+        conversation = self._conversations.pop(key, None)
+        if conversation is not None:
+            self._total_bytes -= conversation.size
+        return conversation
+
+    def get(self, key: str) -> List[ConversationTurn]:
+        """Return the stored turns for a conversation (empty if unknown)"""
+        return self.get_context(key)[1]
+
+    def get_context(self, key: str) -> Tuple[Optional[str], List[ConversationTurn]]:
+        """Return (rolling summary, stored turns) for a conversation"""
+        now = time.monotonic()
+        conversation = self._conversations.get(key)
+
+        if conversation is None:
+            self._counters["misses"] += 1
+            return None, []
+
+        if self._is_expired(conversation, now):
+            self._remove(key)
+            self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            return None, []
+
+        conversation.last_access = now
+        self._conversations.move_to_end(key)
+        self._counters["hits"] += 1
+        return conversation.summary, list(conversation.turns)
+
+    def fold(
+        self,
+        key: str,
+        folded: List[ConversationTurn],
+        summary: str,
+        previous: Optional[str] = None
+    ) -> bool:
+        """
+        Replace the oldest turns with an updated rolling summary
+
+        Only if `folded` are still the oldest turns and `previous` the
+        summary (they may have been trimmed, or the conversation cleared);
+        returns whether the fold was applied.
+        """
+        conversation = self._conversations.get(key)
+        count = len(folded)
+        if (
+            conversation is None
+            or conversation.summary != previous
+            or len(conversation.turns) < count
+            or any(stored is not turn for stored, turn in zip(conversation.turns, folded))
+        ):
+            return False
+
+        dropped = conversation.turns[:count]
+        del conversation.turns[:count]
+        delta = sys.getsizeof(summary) - sum(turn.size_bytes() for turn in dropped)
+        if conversation.summary is not None:
+            delta -= sys.getsizeof(conversation.summary)
+        conversation.summary = summary
+
+        conversation.size += delta
+        self._total_bytes += delta
+        return True
+
+    def append(self, key: str, turns: List[ConversationTurn]):
+        """Append turns to a conversation, trimming and evicting as needed"""
+        now = time.monotonic()
+        conversation = self._conversations.get(key)
+
+        if conversation is None or self._is_expired(conversation, now):
+            if conversation is not None:
+                self._remove(key)
+                self._counters["expirations"] += 1
+            conversation = _Conversation(now)
+            self._conversations[key] = conversation
+        else:
+            self._conversations.move_to_end(key)
+
+        conversation.last_access = now
+        conversation.turns.extend(turns)
+        added = sum(turn.size_bytes() for turn in turns)
+
+        # Keep each conversation to its most recent turns
+        if len(conversation.turns) > self.max_turns:
+            dropped = conversation.turns[:-self.max_turns]
+            del conversation.turns[:-self.max_turns]
+            added -= sum(turn.size_bytes() for turn in dropped)
+
+        conversation.size += added
+        self._total_bytes += added
+
+        self._evict(now, keep=key)
+
+    def delete(self, key: str) -> bool:
+        """Remove a conversation, returning whether it existed"""
+        return self._remove(key) is not None
+
+    def _evict(self, now: float, keep: Optional[str] = None):
+        """Drop expired conversations, then the least recently used over budget"""
+        # Oldest entries sit at the front, so expired ones are found first
+        while self._conversations:
+            key, conversation = next(iter(self._conversations.items()))
+            if key == keep or not self._is_expired(conversation, now):
+                break
+            self._remove(key)
+            self._counters["expirations"] += 1
+
+        while self._conversations and (
+            len(self._conversations) > self.max_entries or
+            self._total_bytes > self.max_bytes
+        ):
+            key = next(iter(self._conversations))
+            if key == keep and len(self._conversations) == 1:
+                break
+            self._remove(key)
+            self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Store size and hit/miss/eviction counters"""
+        return {
+            "conversations": len(self._conversations),
+            "bytes": self._total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            **self._counters
+        }
+
+
+def _encode_turn(turn: ConversationTurn) -> str:
+    """Serialize a turn as a compact JSON triple (role, content, tokens)"""
+    return json.dumps([turn.role, turn.content, turn.tokens], ensure_ascii=False, separators=(",", ":"))
+
+
+def _decode_turn(raw: str) -> ConversationTurn:
+    # Turns written before token counts were stored are plain pairs
+    return ConversationTurn(*json.loads(raw))
+
+
+def _same_turns(raw_turns: List[str], turns: List[ConversationTurn]) -> bool:
+    """Whether stored turns are `turns` (same roles and contents, in order)"""
+    return len(raw_turns) == len(turns) and all(
+        json.loads(raw)[:2] == [turn.role, turn.content] for raw, turn in zip(raw_turns, turns)
+    )
+
+
+class ConversationBackend(ABC):
+    """
+    Async interface for conversation storage
+
+    Backends keep at most `max_turns` turns per conversation and forget
+    conversations that have been idle for `ttl_seconds`.
+    """
+
+    name = "base"
+
+    def __init__(self, ttl_seconds: float, max_turns: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self._counters = {"hits": 0, "misses": 0, "errors": 0}
+
+    @abstractmethod
+    async def get_turns(self, key: str, limit: Optional[int] = None) -> List[ConversationTurn]:
+        """Return the most recent turns of a conversation (oldest first)"""
+
+    @abstractmethod
+    async def get_context(
+        self, key: str, limit: Optional[int] = None
+    ) -> Tuple[Optional[str], List[ConversationTurn]]:
+        """Return the rolling summary and the most recent turns in one read"""
+
+    @abstractmethod
+    async def append_turns(self, key: str, turns: List[ConversationTurn]):
+        """Append turns to a conversation and refresh its TTL"""
+
+    @abstractmethod
+    async def fold_turns(
+        self,
+        key: str,
+        folded: List[ConversationTurn],
+        summary: str,
+        previous: Optional[str] = None
+    ) -> bool:
+        """
+        Replace the oldest turns `folded` with `summary`
+
+        Atomic and conditional: nothing changes unless `folded` are still
+        the oldest stored turns and `previous` the stored summary, so a
+        fold racing an append that trimmed the list, or a cleared and
+        restarted conversation, is dropped. Returns whether it applied.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        """Remove a conversation, returning whether it existed"""
+
+    async def close(self):
+        """Release backend resources"""
+
+    def _record_read(self, turns: List[ConversationTurn]) -> List[ConversationTurn]:
+        self._counters["hits" if turns else "misses"] += 1
+        return turns
+
+    def stats(self) -> Dict[str, int]:
+        return {"backend": self.name, **self._counters}
+
+
+class InMemoryConversationBackend(ConversationBackend):
+    """Per-process backend around the bounded ConversationStore"""
+
+    name = "memory"
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_turns: int,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        super().__init__(ttl_seconds, max_turns)
+        self.store = ConversationStore(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            ttl_seconds=ttl_seconds,
+            max_turns=max_turns
+        )
+
+    async def get_turns(self, key: str, limit: Optional[int] = None) -> List[ConversationTurn]:
+        turns = self.store.get(key)
+        return turns[-limit:] if limit else turns
+
+    async def get_context(
+        self, key: str, limit: Optional[int] = None
+    ) -> Tuple[Optional[str], List[ConversationTurn]]:
+        summary, turns = self.store.get_context(key)
+        return summary, turns[-limit:] if limit else turns
+
+    async def append_turns(self, key: str, turns: List[ConversationTurn]):
+        self.store.append(key, turns)
+
+    async def fold_turns(
+        self,
+        key: str,
+        folded: List[ConversationTurn],
+        summary: str,
+        previous: Optional[str] = None
+    ) -> bool:
+        return self.store.fold(key, folded, summary, previous)
+
+    async def delete(self, key: str) -> bool:
+        return self.store.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {"backend": self.name, **self.store.stats()}
+
+
+class RedisConversationBackend(ConversationBackend):
+    """
+    Redis backend shared by all workers
+
+    Each conversation is a Redis list of JSON-encoded turns. Appends are a
+    single pipelined RPUSH + LTRIM + EXPIRE, reads a single pipelined
+    LRANGE + EXPIRE, so both cost one round-trip. Redis errors are logged
+    and treated as an empty history so chat keeps working without context.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: float,
+        max_turns: int,
+        password: Optional[str] = None,
+        key_prefix: str = "conversation:"
+    ):
+        super().__init__(ttl_seconds, max_turns)
+        import redis.asyncio as redis_asyncio
+        from redis.exceptions import WatchError
+
+        self._watch_error = WatchError
+
+        self.key_prefix = key_prefix
+        self.redis_client = redis_asyncio.from_url(
+            redis_url,
+            password=password,
+            decode_responses=True,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            health_check_interval=30
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    def _summary_key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}:summary"
+
+    async def get_turns(self, key: str, limit: Optional[int] = None) -> List[ConversationTurn]:
+        redis_key = self._key(key)
+        start = -limit if limit else 0
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.lrange(redis_key, start, -1)
+            pipe.expire(redis_key, int(self.ttl_seconds))
+            pipe.expire(self._summary_key(key), int(self.ttl_seconds))
+            raw_turns, _, _ = await pipe.execute()
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"Redis conversation read failed: {str(e)}")
+            return []
+        return self._record_read([_decode_turn(raw) for raw in raw_turns])
+
+    async def get_context(
+        self, key: str, limit: Optional[int] = None
+    ) -> Tuple[Optional[str], List[ConversationTurn]]:
+        redis_key = self._key(key)
+        summary_key = self._summary_key(key)
+        start = -limit if limit else 0
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(summary_key)
+            pipe.lrange(redis_key, start, -1)
+            pipe.expire(redis_key, int(self.ttl_seconds))
+            pipe.expire(summary_key, int(self.ttl_seconds))
+            summary, raw_turns, _, _ = await pipe.execute()
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"Redis conversation read failed: {str(e)}")
+            return None, []
+        return summary, self._record_read([_decode_turn(raw) for raw in raw_turns])
+
+    async def append_turns(self, key: str, turns: List[ConversationTurn]):
+        if not turns:
+            return
+        redis_key = self._key(key)
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.rpush(redis_key, *[_encode_turn(turn) for turn in turns])
+            pipe.ltrim(redis_key, -self.max_turns, -1)
+            # Both keys share one TTL, or the folded history expires first
+            pipe.expire(redis_key, int(self.ttl_seconds))
+            pipe.expire(self._summary_key(key), int(self.ttl_seconds))
+            await pipe.execute()
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"Redis conversation write failed: {str(e)}")
+
+    async def fold_turns(
+        self,
+        key: str,
+        folded: List[ConversationTurn],
+        summary: str,
+        previous: Optional[str] = None
+    ) -> bool:
+        redis_key = self._key(key)
+        summary_key = self._summary_key(key)
+        try:
+            # WATCH, check the head and summary, then MULTI/EXEC the fold:
+            # any write to either key in between aborts it
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                await pipe.watch(redis_key, summary_key)
+                head = await pipe.lrange(redis_key, 0, len(folded) - 1)
+                current = await pipe.get(summary_key)
+                if current != previous or not _same_turns(head, folded):
+                    return False
+                pipe.multi()
+                pipe.ltrim(redis_key, len(folded), -1)
+                pipe.set(summary_key, summary, ex=int(self.ttl_seconds))
+                await pipe.execute()
+            return True
+        except self._watch_error:
+            return False
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"Redis conversation summary write failed: {str(e)}")
+            return False
+
+    async def delete(self, key: str) -> bool:
+        try:
+            return bool(await self.redis_client.delete(self._key(key), self._summary_key(key)))
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"Redis conversation delete failed: {str(e)}")
+            return False
+
+    async def close(self):
+        await self.redis_client.aclose()
+
+
+class SQLiteConversationBackend(ConversationBackend):
+    """
+    SQLite backend shared by workers on one host
+
+    Uses a WAL-mode database file so several processes can read while one
+    writes. Blocking sqlite3 calls run in a worker thread; each read is a
+    single indexed query and each append a single transaction.
+    """
+
+    name = "sqlite"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS conversation_turns (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_key TEXT NOT NULL,
+            turn TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_conversation_turns_key
+            ON conversation_turns (conversation_key, seq);
+        CREATE TABLE IF NOT EXISTS conversations (
+            conversation_key TEXT PRIMARY KEY,
+            expires_at REAL NOT NULL,
+            summary TEXT
+        );
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_turns: int):
+        super().__init__(ttl_seconds, max_turns)
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=20, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+
+        # Databases created before rolling summaries lack the column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(conversations)")}
+        if "summary" not in columns:
+            self._conn.execute("ALTER TABLE conversations ADD COLUMN summary TEXT")
+
+    def _get_turns_sync(self, key: str, limit: int) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT t.turn FROM conversation_turns t
+                JOIN conversations c ON c.conversation_key = t.conversation_key
+                WHERE t.conversation_key = ? AND c.expires_at > ?
+                ORDER BY t.seq DESC LIMIT ?
+                """,
+                (key, time.time(), limit)
+            ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def _get_context_sync(self, key: str, limit: int) -> Tuple[Optional[str], List[str]]:
+        now = time.time()
+        with self._lock:
+            # One read transaction, so the summary and turns agree
+            self._conn.execute("BEGIN")
+            try:
+                row = self._conn.execute(
+                    "SELECT summary FROM conversations WHERE conversation_key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+                rows = self._conn.execute(
+                    """
+                    SELECT turn FROM conversation_turns WHERE conversation_key = ?
+                    ORDER BY seq DESC LIMIT ?
+                    """,
+                    (key, limit)
+                ).fetchall() if row else []
+            finally:
+                self._conn.execute("COMMIT")
+        return (row[0] if row else None), [raw for raw, in reversed(rows)]
+
+    def _fold_sync(
+        self,
+        key: str,
+        folded: List[ConversationTurn],
+        summary: str,
+        previous: Optional[str]
+    ) -> bool:
+        with self._lock:
+            # IMMEDIATE takes the write lock first, so nothing changes between check and fold
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT summary FROM conversations WHERE conversation_key = ? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+                head = self._conn.execute(
+                    """
+                    SELECT seq, turn FROM conversation_turns WHERE conversation_key = ?
+                    ORDER BY seq LIMIT ?
+                    """,
+                    (key, len(folded))
+                ).fetchall()
+                if row is None or row[0] != previous or not _same_turns([turn for _, turn in head], folded):
+                    self._conn.execute("ROLLBACK")
+                    return False
+
+                self._conn.execute(
+                    "DELETE FROM conversation_turns WHERE conversation_key = ? AND seq <= ?",
+                    (key, head[-1][0])
+                )
+                self._conn.execute(
+                    "UPDATE conversations SET summary = ? WHERE conversation_key = ?",
+                    (summary, key)
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _append_sync(self, key: str, encoded: List[str]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A conversation that expired starts over
+                self._conn.execute(
+                    """
+                    DELETE FROM conversation_turns WHERE conversation_key = ? AND EXISTS (
+                        SELECT 1 FROM conversations WHERE conversation_key = ? AND expires_at <= ?
+                    )
+                    """,
+                    (key, key, now)
+                )
+                self._conn.executemany(
+                    "INSERT INTO conversation_turns (conversation_key, turn) VALUES (?, ?)",
+                    [(key, raw) for raw in encoded]
+                )
+                self._conn.execute(
+                    """
+                    DELETE FROM conversation_turns WHERE conversation_key = ? AND seq NOT IN (
+                        SELECT seq FROM conversation_turns WHERE conversation_key = ?
+                        ORDER BY seq DESC LIMIT ?
+                    )
+                    """,
+                    (key, key, self.max_turns)
+                )
+                self._conn.execute(
+                    "UPDATE conversations SET summary = NULL WHERE conversation_key = ? AND expires_at <= ?",
+                    (key, now)
+                )
+                self._conn.execute(
+                    """
+                    INSERT INTO conversations (conversation_key, expires_at) VALUES (?, ?)
+                    ON CONFLICT (conversation_key) DO UPDATE SET expires_at = excluded.expires_at
+                    """,
+                    (key, now + self.ttl_seconds)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            # Sweep expired conversations now and then
+            self._writes += 1
+            if self._writes % 500 == 0:
+                self._purge_expired_sync(now)
+
+    def _purge_expired_sync(self, now: float):
+        self._conn.execute(
+            """
+            DELETE FROM conversation_turns WHERE conversation_key IN (
+                SELECT conversation_key FROM conversations WHERE expires_at <= ?
+            )
+            """,
+            (now,)
+        )
+        self._conn.execute("DELETE FROM conversations WHERE expires_at <= ?", (now,))
+
+    def _delete_sync(self, key: str) -> bool:
+        with self._lock:
+            self._conn.execute("DELETE FROM conversation_turns WHERE conversation_key = ?", (key,))
+            cursor = self._conn.execute("DELETE FROM conversations WHERE conversation_key = ?", (key,))
+            return cursor.rowcount > 0
+
+    async def get_turns(self, key: str, limit: Optional[int] = None) -> List[ConversationTurn]:
+        try:
+            raw_turns = await asyncio.to_thread(self._get_turns_sync, key, limit or self.max_turns)
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"SQLite conversation read failed: {str(e)}")
+            return []
+        return self._record_read([_decode_turn(raw) for raw in raw_turns])
+
+    async def get_context(
+        self, key: str, limit: Optional[int] = None
+    ) -> Tuple[Optional[str], List[ConversationTurn]]:
+        try:
+            summary, raw_turns = await asyncio.to_thread(self._get_context_sync, key, limit or self.max_turns)
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"SQLite conversation read failed: {str(e)}")
+            return None, []
+        return summary, self._record_read([_decode_turn(raw) for raw in raw_turns])
+
+    async def fold_turns(
+        self,
+        key: str,
+        folded: List[ConversationTurn],
+        summary: str,
+        previous: Optional[str] = None
+    ) -> bool:
+        try:
+            return await asyncio.to_thread(self._fold_sync, key, folded, summary, previous)
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"SQLite conversation summary write failed: {str(e)}")
+            return False
+
+    async def append_turns(self, key: str, turns: List[ConversationTurn]):
+        if not turns:
+            return
+        try:
+            await asyncio.to_thread(self._append_sync, key, [_encode_turn(turn) for turn in turns])
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"SQLite conversation write failed: {str(e)}")
+
+    async def delete(self, key: str) -> bool:
+        try:
+            return await asyncio.to_thread(self._delete_sync, key)
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"SQLite conversation delete failed: {str(e)}")
+            return False
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_conversation_backend(
+    backend: str,
+    ttl_seconds: float,
+    max_turns: int,
+    max_entries: int = 10000,
+    max_bytes: int = 64 * 1024 * 1024,
+    redis_url: Optional[str] = None,
+    redis_password: Optional[str] = None,
+    sqlite_path: str = "./conversations.db"
+) -> ConversationBackend:
+    """Build the configured conversation backend ("memory", "redis" or "sqlite")"""
+    if backend == "redis":
+        return RedisConversationBackend(
+            redis_url, ttl_seconds, max_turns, password=redis_password
+        )
+    if backend == "sqlite":
+        return SQLiteConversationBackend(sqlite_path, ttl_seconds, max_turns)
+    if backend != "memory":
+        raise ValueError(f"Unknown conversation backend: {backend}")
+    return InMemoryConversationBackend(
+        ttl_seconds, max_turns, max_entries=max_entries, max_bytes=max_bytes
+    )
@@ -5,10 +5,19 @@ Provides secure, rate-limited access to DeepSeek's AI models
 
 import httpx
 import json
-from typing import List, Dict, Optional, Union
-from app.core.config import settings
+from typing import AsyncIterator, List, Dict, Optional, Union
+from app.config import settings
+from app.llm.bulkhead import BulkheadFull
+from app.llm.circuit_breaker import CLOSED, get_breaker
+from app.llm import deadline
+from app.llm.deadline import DeadlineExceeded, adaptive_timeout
+from app.llm.gateway import gateway
+from app.llm.health import RollingHealth
+from .single_flight import SingleFlight, payload_key
+from .token_counter import count_tokens, message_tokens
 import logging
 import asyncio
+import time
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -19,90 +28,424 @@ class DeepSeekError(Exception):
 
 class DeepSeekClient:
     def __init__(self):
-        self.api_key = getattr(settings, 'DEEPSEEK_API_KEY', None)
+        self.api_key = settings.deepseek_api_key
         self.base_url = "https://api.deepseek.com/v1"
         self.model = "deepseek-chat"
         self.max_retries = 3
         self.retry_delay = 1.0
         
+        # Gateway lane: bulkhead and latency histograms for DeepSeek calls
+        self.provider_name = "deepseek"
+        gateway.limit(
+            self.provider_name,
+            settings.deepseek_max_concurrency,
+            max_queue=settings.deepseek_max_queue,
+            queue_timeout=settings.deepseek_queue_timeout
+        )
+        
+        # Background work (conversation summaries) gets a lane of its own, so
+        # it never takes a user's slot
+        self.background_lane = "deepseek_background"
+        gateway.limit(
+            self.background_lane,
+            settings.chat_summary_max_concurrency,
+            max_queue=settings.chat_summary_max_queue,
+            queue_timeout=settings.chat_summary_queue_timeout
+        )
+        
+        # Connection counters (the pool itself belongs to the LLM gateway)
+        self._pool_counters = {
+            "requests": 0,
+            "tcp_connects": 0,
+            "tls_handshakes": 0,
+        }
+        
+        # Identical concurrent completions share one upstream request
+        self._single_flight = SingleFlight()
+        
+        # Hedging: a second identical request once the first is unusually slow,
+        # limited by a token bucket that each request tops up by the budget ratio
+        self._hedge_tokens = 0.0
+        self._hedge_counters = {
+            "requests": 0,
+            "hedges_fired": 0,
+            "hedges_won": 0,
+            "hedges_skipped_budget": 0,
+            "hedges_skipped_busy": 0
+        }
+        
+        # Fail fast while the upstream is erroring or too slow
+        self.breaker = get_breaker(
+            "deepseek",
+            window_seconds=settings.deepseek_breaker_window_seconds,
+            min_calls=settings.deepseek_breaker_min_calls,
+            failure_rate_threshold=settings.deepseek_breaker_failure_rate,
+            slow_call_seconds=settings.deepseek_breaker_slow_call_seconds,
+            open_seconds=settings.deepseek_breaker_open_seconds
+        )
+        
+        # Passive health from real call outcomes, plus an optional cheap probe
+        self.health = RollingHealth(window_seconds=settings.deepseek_health_window_seconds)
+        self._probe_task: Optional[asyncio.Task] = None
+        self._last_probe: Optional[Dict] = None
+        
         if not self.api_key:
             logger.warning("DeepSeek API key not configured. Chat functionality will be limited.")
     
+    def _http2_available(self) -> bool:
+        """HTTP/2 needs the optional h2 package (httpx[http2])"""
+        if not settings.deepseek_http2:
+            return False
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            logger.warning("HTTP/2 requested but h2 is not installed, falling back to HTTP/1.1")
+            return False
+    
+    async def start(self):
+        """Open the LLM gateway's shared, keep-alive connection pool for this worker"""
+        if not gateway.is_open:
+            gateway.configure(
+                max_connections=settings.deepseek_max_connections,
+                max_keepalive_connections=settings.deepseek_max_keepalive_connections,
+                keepalive_expiry=settings.deepseek_keepalive_expiry,
+                http2=self._http2_available()
+            )
+            gateway.start()
+        
+        if settings.deepseek_health_probe_interval > 0 and self.api_key and self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop(settings.deepseek_health_probe_interval))
+    
+    async def close(self):
+        """Close the shared connection pool on shutdown"""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        
+        await gateway.aclose()
+    
+    async def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the pooled client, opening it lazily outside the lifespan"""
+        if not gateway.is_open:
+            await self.start()
+        return gateway.client
+    
+    def _record_success(self, latency: float, background: bool = False):
+        if background:
+            gateway.observe(self.background_lane, latency)
+            return
+        self.breaker.record_success(latency)
+        self.health.record_success(latency)
+        gateway.observe(self.provider_name, latency)
+    
+    def _record_failure(self, latency: float, error: str, background: bool = False):
+        if background:
+            gateway.observe(self.background_lane, latency, ok=False)
+            return
+        self.breaker.record_failure(latency)
+        self.health.record_failure(latency, error)
+        gateway.observe(self.provider_name, latency, ok=False)
+    
+    def _release(self, background: bool = False):
+        """Return an admitted call's breaker permit without recording an outcome"""
+        if not background:
+            self.breaker.release()
+    
+    async def _probe_loop(self, interval: float):
+        """Low-cadence synthetic probe against the free /models endpoint"""
+        while True:
+            await asyncio.sleep(interval)
+            # Real traffic already keeps the window fresh
+            if self.health.snapshot()["window_calls"]:
+                continue
+            
+            started = time.monotonic()
+            try:
+                client = await self._get_http_client()
+                response = await client.get(
+                    f"{self.base_url}/models",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    timeout=10.0
+                )
+                latency = time.monotonic() - started
+                if response.status_code == 200:
+                    self.health.record_success(latency)
+                    error = None
+                else:
+                    error = f"probe HTTP {response.status_code}"
+                    self.health.record_failure(latency, error)
+            except httpx.HTTPError as e:
+                latency = time.monotonic() - started
+                error = f"probe error: {str(e)}"
+                self.health.record_failure(latency, error)
+            
+            self._last_probe = {
+                "at": datetime.utcnow().isoformat(),
+                "ok": error is None,
+                "latency_ms": round(latency * 1000, 1),
+                "error": error
+            }
+    
+    async def _trace(self, event_name: str, info: Dict):
+        """httpcore trace hook used to count new connections and handshakes"""
+        if event_name == "connection.connect_tcp.complete":
+            self._pool_counters["tcp_connects"] += 1
+        elif event_name == "connection.start_tls.complete":
+            self._pool_counters["tls_handshakes"] += 1
+    
+    def pool_stats(self) -> Dict[str, Union[int, bool]]:
+        """Connection pool statistics for monitoring"""
+        return {**gateway.pool_stats(), **self._pool_counters}
+    
+    def coalescing_stats(self) -> Dict[str, int]:
+        """Single-flight counters for monitoring"""
+        return self._single_flight.stats()
+    
+    def hedging_stats(self) -> Dict[str, Union[int, float, bool, None]]:
+        """Hedged request counters for monitoring"""
+        delay = self._hedge_delay()
+        return {
+            "enabled": settings.deepseek_hedging_enabled,
+            "delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "tokens": round(self._hedge_tokens, 2),
+            **self._hedge_counters
+        }
+    
+    def check_admission(self):
+        """Raise BulkheadFull if a user call started now would be refused"""
+        gateway.check(self.provider_name)
+    
+    def attempt_timeout(self) -> float:
+        """Per-attempt timeout adapted to recent p95 latency"""
+        window = self.health.snapshot()
+        p95 = None
+        if window["latency_p95_ms"] is not None and window["window_calls"] >= settings.deepseek_adaptive_timeout_min_calls:
+            p95 = window["latency_p95_ms"] / 1000
+        return adaptive_timeout(
+            p95,
+            default=settings.deepseek_timeout,
+            multiplier=settings.deepseek_timeout_p95_multiplier,
+            minimum=settings.deepseek_min_timeout
+        )
+    
+    async def _backoff(self, delay: float):
+        """Sleep before a retry, unless the request deadline would pass first"""
+        left = deadline.remaining()
+        if left is not None and delay >= left:
+            raise DeadlineExceeded("Request deadline leaves no time to retry")
+        await asyncio.sleep(delay)
+    
     async def _make_request(
         self, 
         endpoint: str, 
         payload: Dict,
-        timeout: float = 30.0
+        timeout: Optional[float] = None,
+        attempts: Optional[int] = None,
+        background: bool = False
     ) -> Dict:
-        """Make HTTP request to DeepSeek API with retry logic"""
+        """
+        Make HTTP request to DeepSeek API with retry logic
+        
+        Each attempt waits at most `timeout` seconds (by default adapted to
+        recent p95 latency), and queueing, attempts and backoff together
+        never outlast the request deadline.
+        
+        Background calls queue in their own lane and only run while the
+        circuit is closed; their outcomes stay out of the breaker and the
+        health window, which describe what users see.
+        """
         
         if not self.api_key:
             raise DeepSeekError("DeepSeek API key not configured")
         
         headers = {
             "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "User-Agent": "Nisab-Wisdom-AI/1.0"
+            "Content-Type": "application/json"
         }
         
         url = f"{self.base_url}/{endpoint}"
         
-        for attempt in range(self.max_retries):
+        client = await self._get_http_client()
+        
+        attempts = attempts or self.max_retries
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            
+            # Checked per attempt so retries stop as soon as the circuit opens
+            if background:
+                if self.breaker.state != CLOSED:
+                    raise DeepSeekError("DeepSeek circuit not closed, skipping background call")
+            elif not self.breaker.allow_request():
+                raise DeepSeekError("DeepSeek circuit open, failing fast")
+            
+            full_timeout = timeout or self.attempt_timeout()
+            attempt_timeout = full_timeout
+            rate_limited = False
+            started = time.monotonic()
             try:
-                async with httpx.AsyncClient(timeout=timeout) as client:
-                    response = await client.post(url, headers=headers, json=payload)
+                async with gateway.slot(self.background_lane if background else self.provider_name):
+                    # Whatever the queue left of the budget
+                    attempt_timeout = deadline.budget(full_timeout)
+                    started = time.monotonic()
+                    self._pool_counters["requests"] += 1
+                    # httpx timeouts bound each read; wait_for bounds the whole attempt
+                    response = await asyncio.wait_for(
+                        client.post(
+                            url,
+                            headers=headers,
+                            json=payload,
+                            timeout=attempt_timeout,
+                            extensions={"trace": self._trace}
+                        ),
+                        attempt_timeout
+                    )
+                latency = time.monotonic() - started
+                
+                # Handle different response codes
+                if response.status_code == 200:
+                    self._record_success(latency, background)
+                    return response.json()
+                elif response.status_code == 429:
+                    # Rate limit hit, back off and retry
+                    self._record_failure(latency, "HTTP 429", background)
+                    rate_limited = True
+                elif response.status_code == 401:
+                    # Client-side errors say nothing about upstream health
+                    self._release(background)
+                    raise DeepSeekError("Invalid API key")
+                elif response.status_code == 400:
+                    self._release(background)
+                    error_detail = response.json().get('error', {}).get('message', 'Bad request')
+                    raise DeepSeekError(f"Bad request: {error_detail}")
+                else:
+                    self._record_failure(latency, f"HTTP {response.status_code}", background)
+                    logger.error(f"DeepSeek API error: {response.status_code} - {response.text}")
+                    raise DeepSeekError(f"API Error: {response.status_code}")
+            
+            except (asyncio.CancelledError, BulkheadFull, DeadlineExceeded):
+                # Refused locally before reaching DeepSeek: not an upstream failure
+                self._release(background)
+                raise
                     
-                    # Handle different response codes
-                    if response.status_code == 200:
-                        return response.json()
-                    elif response.status_code == 429:
-                        # Rate limit hit, wait and retry
-                        wait_time = self.retry_delay * (2 ** attempt)
-                        logger.warning(f"Rate limit hit, waiting {wait_time}s before retry")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    elif response.status_code == 401:
-                        raise DeepSeekError("Invalid API key")
-                    elif response.status_code == 400:
-                        error_detail = response.json().get('error', {}).get('message', 'Bad request')
-                        raise DeepSeekError(f"Bad request: {error_detail}")
-                    else:
-                        logger.error(f"DeepSeek API error: {response.status_code} - {response.text}")
-                        raise DeepSeekError(f"API Error: {response.status_code}")
-                        
-            except httpx.TimeoutException:
-                logger.error(f"DeepSeek API timeout (attempt {attempt + 1})")
-                if attempt == self.max_retries - 1:
+            except (httpx.TimeoutException, asyncio.TimeoutError):
+                if attempt_timeout < full_timeout:
+                    # Cut short by the request deadline, not a slow upstream
+                    self._release(background)
+                    raise DeadlineExceeded("Request deadline exceeded")
+                self._record_failure(time.monotonic() - started, "timeout", background)
+                logger.error(f"DeepSeek API timeout after {attempt_timeout:.1f}s (attempt {attempt + 1})")
+                if last_attempt:
                     raise DeepSeekError("Request timeout after retries")
-                await asyncio.sleep(self.retry_delay)
+                await self._backoff(self.retry_delay)
                 
             except httpx.RequestError as e:
+                self._record_failure(time.monotonic() - started, f"network error: {str(e)}", background)
                 logger.error(f"DeepSeek API request error: {str(e)}")
-                if attempt == self.max_retries - 1:
+                if last_attempt:
                     raise DeepSeekError(f"Network error: {str(e)}")
-                await asyncio.sleep(self.retry_delay)
+                await self._backoff(self.retry_delay)
+            
+            if rate_limited and not last_attempt:
+                wait_time = self.retry_delay * (2 ** attempt)
+                logger.warning(f"Rate limit hit, waiting {wait_time}s before retry")
+                await self._backoff(wait_time)
         
         raise DeepSeekError("Max retries exceeded")
 
-    async def chat_completion(
-        self, 
-        messages: List[Dict[str, str]], 
-        temperature: float = 0.7,
-        max_tokens: int = 1500,
-        stream: bool = False
-    ) -> Dict:
+    def _hedge_delay(self) -> Optional[float]:
+        """How long the first request runs before it is hedged (None: not enough history)"""
+        if self.health.snapshot()["window_calls"] < settings.deepseek_adaptive_timeout_min_calls:
+            return None
+        latency = self.health.quantile(settings.deepseek_hedge_percentile)
+        if latency is None:
+            return None
+        return max(settings.deepseek_hedge_min_delay, latency)
+    
+    async def _complete(self, payload: Dict) -> Dict:
         """
-        Send chat completion request to DeepSeek API
+        One completion, hedged when enabled
         
-        Args:
-            messages: List of message objects with 'role' and 'content'
-            temperature: Controls randomness (0.0 to 1.0)
-            max_tokens: Maximum tokens to generate
-            stream: Whether to stream the response
+        If no response has arrived after the configured latency percentile,
+        a second identical request (single attempt) is sent and the first
+        good response wins; the other request is cancelled. Each request
+        adds DEEPSEEK_HEDGE_BUDGET to a small token bucket and each hedge
+        spends one token, so hedges stay within that fraction of traffic.
+        No hedge is sent while calls are queueing for the DeepSeek lane.
+        """
+        if not settings.deepseek_hedging_enabled:
+            return await self._make_request("chat/completions", payload)
+        
+        self._hedge_counters["requests"] += 1
+        self._hedge_tokens = min(
+            settings.deepseek_hedge_burst,
+            self._hedge_tokens + settings.deepseek_hedge_budget
+        )
+        
+        delay = self._hedge_delay()
+        left = deadline.remaining()
+        if delay is None or (left is not None and delay >= left):
+            return await self._make_request("chat/completions", payload)
+        
+        primary = asyncio.create_task(self._make_request("chat/completions", payload))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
             
-        Returns:
-            Dict with response data or error information
+            if self._hedge_tokens < 1:
+                self._hedge_counters["hedges_skipped_budget"] += 1
+                return await primary
+            if gateway.bulkhead(self.provider_name).queue_depth:
+                # Slow because we are saturated: a hedge would only queue too
+                self._hedge_counters["hedges_skipped_busy"] += 1
+                return await primary
+            self._hedge_tokens -= 1
+            self._hedge_counters["hedges_fired"] += 1
+            hedge = asyncio.create_task(self._make_request("chat/completions", payload, attempts=1))
+            tasks.append(hedge)
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._hedge_counters["hedges_won"] += 1
+                        return task.result()
+            
+            # Both failed: report the primary's error, it made every retry
+            return primary.result()
+        
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _complete_shared(self, payload: Dict) -> Dict:
+        """
+        _complete for coalesced callers, under a budget of its own
+        
+        The shared task inherits the first caller's context; without this
+        every caller that joins later would be held to that first deadline.
+        Each caller still stops waiting at its own deadline.
         """
+        with deadline.request_deadline(None), deadline.request_deadline(settings.chat_timeout):
+            return await self._complete(payload)
+
+    def _build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool
+    ) -> Dict:
+        """Validate chat inputs and build the completion payload"""
         
         # Validate inputs
         if not messages:
@@ -117,7 +460,7 @@ class DeepSeekClient:
         if max_tokens < 1 or max_tokens > 4000:
             raise DeepSeekError("Max tokens must be between 1 and 4000")
         
-        payload = {
+        return {
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
@@ -127,9 +470,44 @@ class DeepSeekClient:
             "frequency_penalty": 0.1,
             "presence_penalty": 0.1
         }
+
+    async def chat_completion(
+        self, 
+        messages: List[Dict[str, str]], 
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        background: bool = False
+    ) -> Dict:
+        """
+        Send chat completion request to DeepSeek API
+        
+        Args:
+            messages: List of message objects with 'role' and 'content'
+            temperature: Controls randomness (0.0 to 1.0)
+            max_tokens: Maximum tokens to generate
+            background: Work no user waits on (summaries): own lane, no
+                hedging or coalescing, not counted in breaker or health
+            
+        Returns:
+            Dict with response data or error information
+        """
+        
+        payload = self._build_payload(messages, temperature, max_tokens, stream=False)
         
         try:
-            result = await self._make_request("chat/completions", payload)
+            if background:
+                result = await self._make_request("chat/completions", payload, background=True)
+            elif settings.deepseek_coalesce_requests:
+                try:
+                    result = await self._single_flight.do(
+                        payload_key(payload),
+                        lambda: self._complete_shared(payload),
+                        timeout=deadline.budget(None)
+                    )
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded("Request deadline exceeded")
+            else:
+                result = await self._complete(payload)
             
             # Validate response structure
             if "choices" not in result or not result["choices"]:
@@ -137,12 +515,143 @@ class DeepSeekClient:
             
             return result
             
+        except BulkheadFull:
+            # Callers answer this with 503 + Retry-After rather than an error
+            raise
+            
         except Exception as e:
             logger.error(f"DeepSeek chat completion error: {str(e)}")
             raise DeepSeekError(f"Chat completion failed: {str(e)}")
 
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from DeepSeek API
+        
+        Yields content deltas as the provider emits them. Streams are not
+        retried: once tokens have been forwarded a retry would duplicate them.
+        
+        Connecting and the wait for the first token share one per-attempt
+        timeout (adapted to recent p95 latency), capped by the request
+        deadline; after that only the gap between chunks is bounded, so a
+        long answer is not cut off midway.
+        
+        Args:
+            messages: List of message objects with 'role' and 'content'
+            temperature: Controls randomness (0.0 to 1.0)
+            max_tokens: Maximum tokens to generate
+            timeout: Maximum seconds to wait between two chunks (defaults
+                to the per-attempt timeout)
+        """
+        
+        if not self.api_key:
+            raise DeepSeekError("DeepSeek API key not configured")
+        
+        payload = self._build_payload(messages, temperature, max_tokens, stream=True)
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+        }
+        url = f"{self.base_url}/chat/completions"
+        client = await self._get_http_client()
+        
+        if not self.breaker.allow_request():
+            raise DeepSeekError("DeepSeek circuit open, failing fast")
+        
+        full_timeout = self.attempt_timeout()
+        chunk_timeout = timeout or full_timeout
+        first_timeout = full_timeout
+        
+        # The outcome is recorded once the response headers arrive
+        started = time.monotonic()
+        recorded = False
+        streamed = False
+        try:
+            async with gateway.slot(self.provider_name) as lane:
+                # Whatever the queue left of the budget
+                first_timeout = deadline.budget(full_timeout)
+                started = time.monotonic()
+                self._pool_counters["requests"] += 1
+                # Lifted before the first yield: past it the timer would
+                # cancel the consumer, not this stream
+                async with asyncio.timeout(first_timeout) as first_token, client.stream(
+                    "POST",
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=httpx.Timeout(chunk_timeout, connect=first_timeout),
+                    extensions={"trace": self._trace}
+                ) as response:
+                    latency = time.monotonic() - started
+                    recorded = True
+                    if response.status_code != 200:
+                        if response.status_code in (400, 401):
+                            self.breaker.release()
+                        else:
+                            self._record_failure(latency, f"HTTP {response.status_code}")
+                        await response.aread()
+                        logger.error(f"DeepSeek stream error: {response.status_code} - {response.text}")
+                        raise DeepSeekError(f"API Error: {response.status_code}")
+                    self._record_success(latency)
+                    
+                    # Server-Sent Events: one "data: {...}" line per chunk
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        
+                        try:
+                            chunk = json.loads(data)
+                        except json.JSONDecodeError:
+                            logger.warning("Skipping malformed DeepSeek stream chunk")
+                            continue
+                        
+                        choices = chunk.get("choices") or [{}]
+                        delta = (choices[0].get("delta") or {}).get("content")
+                        if delta:
+                            if not streamed:
+                                streamed = True
+                                first_token.reschedule(None)
+                                lane.first_token.observe(time.monotonic() - started)
+                            yield delta
+        
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            if not streamed and first_timeout < full_timeout:
+                # Cut short by the request deadline, not a slow upstream
+                raise DeadlineExceeded("Request deadline exceeded")
+            if not recorded:
+                recorded = True
+                self._record_failure(time.monotonic() - started, "stream timeout")
+            logger.error("DeepSeek stream timeout")
+            raise DeepSeekError("Stream timeout")
+            
+        except httpx.RequestError as e:
+            if not recorded:
+                recorded = True
+                self._record_failure(time.monotonic() - started, f"network error: {str(e)}")
+            logger.error(f"DeepSeek stream request error: {str(e)}")
+            raise DeepSeekError(f"Network error: {str(e)}")
+        
+        finally:
+            if not recorded:
+                self.breaker.release()
+
     async def health_check(self) -> Dict[str, Union[str, bool]]:
-        """Check if DeepSeek API is accessible"""
+        """
+        Report DeepSeek API health without calling it
+        
+        Health is derived from recent real calls (and the optional
+        background probe), so this is cheap enough to poll.
+        """
         
         if not self.api_key:
             return {
@@ -151,41 +660,34 @@ class DeepSeekClient:
                 "available": False
             }
         
-        try:
-            # Send minimal test request
-            test_messages = [
-                {"role": "user", "content": "Hello"}
-            ]
-            
-            result = await self.chat_completion(
-                messages=test_messages,
-                temperature=0.1,
-                max_tokens=10
-            )
-            
-            return {
-                "status": "healthy",
-                "model": self.model,
-                "available": True,
-                "response_time": "OK"
-            }
-            
-        except Exception as e:
-            return {
-                "status": "unhealthy", 
-                "reason": str(e),
-                "available": False
-            }
+        window = self.health.snapshot()
+        circuit = self.breaker.snapshot()
+        
+        if circuit["state"] == "open":
+            status, reason = "unhealthy", "Circuit open after repeated upstream failures"
+        elif window["status"] == "unknown":
+            status, reason = "healthy", "No recent calls"
+        else:
+            status, reason = window["status"], window["last_error"]
+        
+        return {
+            "status": status,
+            "reason": reason,
+            "model": self.model,
+            "available": status != "unhealthy",
+            "window": window,
+            "circuit": circuit,
+            "last_probe": self._last_probe
+        }
 
     def estimate_tokens(self, text: str) -> int:
-        """Rough estimation of token count for text"""
-        # Approximate: 1 token ≈ 4 characters for English text
-        return len(text) // 4
+        """Token count for text (BPE when available, memoized)"""
+        return count_tokens(text)
 
     def validate_conversation_length(self, messages: List[Dict]) -> bool:
         """Check if conversation is within token limits"""
-        total_tokens = sum(self.estimate_tokens(msg.get('content', '')) for msg in messages)
-        return total_tokens < 3000  # Leave room for response
+        total_tokens = sum(message_tokens(msg.get('content', '')) for msg in messages)
+        return total_tokens < settings.chat_context_token_budget  # Leave room for response
 
 # Global instance
 deepseek_client = DeepSeekClient()
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Local text embeddings for Islamic Finance AI
+CPU-only hashed n-gram vectors, stable across processes and restarts
+"""
+
+from typing import Iterable, List
+import re
+import zlib
+
+import numpy as np
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Function words carry no topical signal for question matching
+_STOPWORDS = frozenset("""
+a an and are as at be by can could do does for from how i if in is it its
+me my of on or our should so than that the their them there these this to
+us was we what when where which who why will with would you your
+""".split())
+
+_SUFFIXES = (
+    "ations", "ation", "ating", "ated", "ates", "ings", "ing", "ions", "ion",
+    "ate", "ed", "es", "s", "e"
+)
+
+# Terms present in most questions we receive; weighting them down lets the
+# distinguishing words (savings vs gold, bitcoin vs stocks) decide the match.
+# Ruling words (halal, haram, permissible) are left out: they decide the answer
+_COMMON_DOMAIN_TERMS = """
+zakat nisab islam islamic shariah sharia muslim calculate compute finance
+""".split()
+
+
+def _stem(word: str) -> str:
+    """Strip one common English suffix so word forms share a feature"""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+_COMMON_STEMS = frozenset(_stem(term) for term in _COMMON_DOMAIN_TERMS)
+
+
+class HashedNgramEmbedder:
+    """
+    Feature-hashing text embedder
+
+    Each text becomes a bag of stemmed words plus character trigrams of
+    those words, hashed into a fixed number of signed buckets and
+    L2-normalized, so cosine similarity is a plain dot product. CRC32 is
+    used instead of hash() so vectors are identical in every process.
+    """
+
+    def __init__(
+        self,
+        dim: int = 512,
+        word_weight: float = 1.0,
+        ngram_weight: float = 0.35,
+        common_term_weight: float = 0.4
+    ):
+        self.dim = dim
+        self.word_weight = word_weight
+        self.ngram_weight = ngram_weight
+        self.common_term_weight = common_term_weight
+
+    def tokens(self, text: str) -> List[str]:
+        """Stemmed content words of a text"""
+        words = _WORD.findall(text.casefold())
+        return [_stem(word) for word in words if word not in _STOPWORDS]
+
+    def _features(self, text: str) -> Iterable:
+        for token in self.tokens(text):
+            scale = self.common_term_weight if token in _COMMON_STEMS else 1.0
+            yield "w:" + token, self.word_weight * scale
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3], self.ngram_weight * scale
+
+    def embed(self, text: str) -> np.ndarray:
+        """Return the unit-length float32 embedding of a text"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            digest = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dim] += sign * weight
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        """Embed several texts into a (n, dim) matrix"""
+        rows = [self.embed(text) for text in texts]
+        if not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(rows)
@@ -3,8 +3,20 @@ Islamic Finance AI Service
 Specialized AI assistant for Shariah-compliant financial guidance
 """
 
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from .deepseek_client import deepseek_client, DeepSeekError
+from .context_manager import ConversationContextManager
+from .conversation_store import ConversationTurn, create_conversation_backend
+from .knowledge_base import KnowledgeEntry, KnowledgeIndex
+from .response_cache import ResponseCache
+from .semantic_cache import SemanticCache
+from .token_counter import count_tokens, message_tokens
+from app.chat.fallback import ISLAMIC_FINANCE_FALLBACK
+from app.chat.keywords import KeywordMatcher
+from app.config import settings
+from app.llm.bulkhead import BulkheadFull
+from app.llm.circuit_breaker import breaker_snapshots
+import asyncio
 import logging
 import re
 from datetime import datetime
@@ -12,12 +24,84 @@ import json
 
 logger = logging.getLogger(__name__)
 
+# Intent and topic keywords, matched together in one pass per message
+CHAT_KEYWORDS = KeywordMatcher({
+    # Intents, checked in this order: the first matching one wins
+    "zakat_guidance": ['zakat', 'nisab', 'charity', 'obligatory', '2.5%', 'lunar year'],
+    "investment_advice": ['invest', 'stock', 'fund', 'halal investment', 'haram', 'shariah compliant'],
+    "banking_guidance": ['loan', 'mortgage', 'bank', 'murabaha', 'mudaraba', 'islamic bank'],
+    "business_guidance": ['business', 'partnership', 'profit', 'loss sharing', 'musharaka'],
+    
+    # Topic gate for Islamic finance questions
+    "islamic_finance": [
+        # Core Islamic finance terms
+        'zakat', 'halal', 'haram', 'riba', 'interest', 'islamic', 'shariah', 'sharia',
+        'sukuk', 'murabaha', 'mudaraba', 'musharaka', 'ijarah', 'takaful',
+        
+        # Financial terms
+        'investment', 'bank', 'loan', 'mortgage', 'finance', 'money', 'wealth',
+        'business', 'profit', 'loss', 'partnership', 'trade', 'nisab',
+        'charity', 'donation', 'obligatory', 'voluntary',
+        
+        # Modern finance
+        'crypto', 'bitcoin', 'stock', 'fund', 'etf', 'bond', 'insurance',
+        'fintech', 'digital banking', 'online trading',
+        
+        # Islamic concepts
+        'allah', 'quran', 'hadith', 'sunnah', 'prophet', 'scholar',
+        'fatwa', 'jurisprudence', 'fiqh', 'madhab'
+    ]
+})
+
+INTENTS = ("zakat_guidance", "investment_advice", "banking_guidance", "business_guidance")
+
 class IslamicFinanceAI:
     def __init__(self):
         self.system_prompt = self._build_system_prompt()
-        self.conversation_memory = {}  # Simple in-memory storage
         self.max_conversation_length = 10  # Keep last 5 exchanges
+        self.temperature = 0.7
+        self.max_tokens = 1500
+        self.conversation_store = create_conversation_backend(
+            settings.conversation_backend,
+            ttl_seconds=settings.conversation_ttl_seconds,
+            max_turns=self.max_conversation_length * 2,
+            max_entries=settings.conversation_max_entries,
+            max_bytes=settings.conversation_max_bytes,
+            redis_url=settings.redis_url,
+            redis_password=settings.redis_password,
+            sqlite_path=settings.conversation_sqlite_path
+        )
+        self.context_manager = ConversationContextManager(
+            self.conversation_store,
+            summarizer=self._summarize_turns,
+            token_budget=settings.chat_context_token_budget,
+            max_turns=self.max_conversation_length,
+            summary_max_tokens=settings.chat_summary_max_tokens,
+            reserved_tokens=lambda: self.system_prompt_tokens + 256
+        )
+        self.response_cache = ResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            ttl_seconds=settings.response_cache_ttl_seconds
+        )
+        self.knowledge_index = KnowledgeIndex(
+            path=settings.knowledge_base_path,
+            top_k=settings.knowledge_base_top_k,
+            min_similarity=settings.knowledge_base_min_similarity,
+            answer_similarity=settings.knowledge_base_answer_similarity
+        )
+        self.semantic_cache = SemanticCache(
+            path=settings.semantic_cache_path,
+            namespace=f"{self.system_prompt}\x1f{self.temperature:.3f}\x1f{deepseek_client.model}",
+            capacity=settings.semantic_cache_capacity,
+            threshold=settings.semantic_cache_threshold,
+            ttl_seconds=settings.semantic_cache_ttl_seconds
+        )
         
+    @property
+    def system_prompt_tokens(self) -> int:
+        """Tokens of the system prompt, counted on first use (not at import)"""
+        return message_tokens(self.system_prompt)
+
     def _build_system_prompt(self) -> str:
         """Build comprehensive system prompt for Islamic Finance expertise"""
         return """You are Dr. Ahmad, a renowned Islamic Finance Scholar and AI Assistant for Nisab Wisdom AI.
@@ -71,47 +155,11 @@ Remember: You're helping Muslims navigate modern finance while staying true to I
 
     def _classify_intent(self, message: str) -> str:
         """Classify the intent of the user's message"""
-        message_lower = message.lower()
-        
-        zakat_keywords = ['zakat', 'nisab', 'charity', 'obligatory', '2.5%', 'lunar year']
-        investment_keywords = ['invest', 'stock', 'fund', 'halal investment', 'haram', 'shariah compliant']
-        banking_keywords = ['loan', 'mortgage', 'bank', 'murabaha', 'mudaraba', 'islamic bank']
-        business_keywords = ['business', 'partnership', 'profit', 'loss sharing', 'musharaka']
-        
-        if any(keyword in message_lower for keyword in zakat_keywords):
-            return "zakat_guidance"
-        elif any(keyword in message_lower for keyword in investment_keywords):
-            return "investment_advice"
-        elif any(keyword in message_lower for keyword in banking_keywords):
-            return "banking_guidance"
-        elif any(keyword in message_lower for keyword in business_keywords):
-            return "business_guidance"
-        else:
-            return "general_islamic_finance"
+        return CHAT_KEYWORDS.first(message, INTENTS) or "general_islamic_finance"
 
     def _is_islamic_finance_related(self, message: str) -> bool:
         """Check if the message is related to Islamic finance"""
-        islamic_finance_keywords = [
-            # Core Islamic finance terms
-            'zakat', 'halal', 'haram', 'riba', 'interest', 'islamic', 'shariah', 'sharia',
-            'sukuk', 'murabaha', 'mudaraba', 'musharaka', 'ijarah', 'takaful',
-            
-            # Financial terms
-            'investment', 'bank', 'loan', 'mortgage', 'finance', 'money', 'wealth',
-            'business', 'profit', 'loss', 'partnership', 'trade', 'nisab',
-            'charity', 'donation', 'obligatory', 'voluntary',
-            
-            # Modern finance
-            'crypto', 'bitcoin', 'stock', 'fund', 'etf', 'bond', 'insurance',
-            'fintech', 'digital banking', 'online trading',
-            
-            # Islamic concepts
-            'allah', 'quran', 'hadith', 'sunnah', 'prophet', 'scholar',
-            'fatwa', 'jurisprudence', 'fiqh', 'madhab'
-        ]
-        
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in islamic_finance_keywords)
+        return "islamic_finance" in CHAT_KEYWORDS.match(message)
 
     def _sanitize_input(self, message: str) -> str:
         """Sanitize user input to prevent injection attacks"""
@@ -120,28 +168,300 @@ Remember: You're helping Muslims navigate modern finance while staying true to I
         sanitized = re.sub(r'\b(script|javascript|eval|exec)\b', '', sanitized, flags=re.IGNORECASE)
         return sanitized.strip()
 
-    def _build_conversation_context(self, user_id: str) -> List[Dict[str, str]]:
-        """Build conversation context from memory"""
-        if user_id not in self.conversation_memory:
-            return []
-        
-        conversation = self.conversation_memory[user_id]
-        # Return last few exchanges to maintain context
-        return conversation[-self.max_conversation_length:]
+    async def _build_conversation_context(self, user_id: str, token_budget: int) -> List[Dict[str, str]]:
+        """Build conversation context: rolling summary plus the newest turns that fit"""
+        return await self.context_manager.build(user_id, token_budget)
 
-    def _store_conversation(self, user_id: str, user_message: str, ai_response: str):
+    async def _store_conversation(self, user_id: str, user_message: str, ai_response: str):
         """Store conversation in memory"""
-        if user_id not in self.conversation_memory:
-            self.conversation_memory[user_id] = []
-        
-        self.conversation_memory[user_id].extend([
-            {"role": "user", "content": user_message},
-            {"role": "assistant", "content": ai_response}
+        await self.conversation_store.append_turns(user_id, [
+            ConversationTurn("user", user_message),
+            ConversationTurn("assistant", ai_response)
         ])
         
-        # Keep conversation manageable
-        if len(self.conversation_memory[user_id]) > self.max_conversation_length * 2:
-            self.conversation_memory[user_id] = self.conversation_memory[user_id][-self.max_conversation_length:]
+        # Older turns are summarized after the reply, off the request path
+        if settings.chat_summary_enabled:
+            self.context_manager.schedule_fold(user_id)
+
+    def check_capacity(self):
+        """
+        Raise BulkheadFull if a model call started now would be refused
+        
+        Streams use this before the response starts, since a refusal found
+        once the 200 status line is out can only be reported in the body.
+        """
+        deepseek_client.check_admission()
+
+    async def _summarize_turns(self, summary: Optional[str], turns: List[ConversationTurn]) -> str:
+        """Fold turns into the rolling conversation summary"""
+        transcript = "\n".join(f"{turn.role.upper()}: {turn.content}" for turn in turns)
+        previous = summary or "(none)"
+        response = await deepseek_client.chat_completion(
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "You maintain a running summary of a conversation between a user and an "
+                        "Islamic finance assistant. Merge the new exchanges into the existing summary. "
+                        "Keep the user's circumstances, figures (amounts, currencies, dates), rulings "
+                        "already given and open questions. Write plain prose, no more than "
+                        f"{settings.chat_summary_max_tokens // 2} words."
+                    )
+                },
+                {
+                    "role": "user",
+                    "content": f"Existing summary:\n{previous}\n\nNew exchanges:\n{transcript}"
+                }
+            ],
+            temperature=0.2,
+            max_tokens=settings.chat_summary_max_tokens,
+            background=True
+        )
+        return response["choices"][0]["message"]["content"]
+
+    async def clear_conversation(self, user_id: str) -> bool:
+        """Forget a conversation, returning whether it existed"""
+        return await self.conversation_store.delete(user_id)
+
+    async def load_knowledge_base(self, engine) -> int:
+        """Map the local knowledge snapshot, then refresh it from the database"""
+        if not settings.knowledge_base_enabled:
+            return 0
+        await asyncio.to_thread(self.knowledge_index.load_snapshot)
+        try:
+            return await asyncio.to_thread(self.knowledge_index.load_from_database, engine)
+        except Exception as e:
+            # Keep serving the last snapshot (if any) when the table is unreachable
+            logger.warning(f"Knowledge base refresh failed, using snapshot: {str(e)}")
+            return len(self.knowledge_index)
+
+    def _knowledge_context(self, hits: List[Tuple[KnowledgeEntry, float]]) -> str:
+        """Retrieved entries as a prompt section, within the snippet token budget"""
+        lines = ["📚 **RELEVANT KNOWLEDGE BASE ENTRIES** (cite them where they apply):"]
+        used = count_tokens(lines[0])
+        for number, (entry, _) in enumerate(hits, start=1):
+            snippet = f"[{number}] {entry.title} ({entry.citation}): {entry.content}"
+            tokens = count_tokens(snippet)
+            if used + tokens > settings.knowledge_base_snippet_tokens:
+                break
+            lines.append(snippet)
+            used += tokens
+        return "\n".join(lines) if len(lines) > 1 else ""
+
+    async def _knowledge_answer(self, entry: KnowledgeEntry, clean_message: str, user_id: str) -> Dict[str, any]:
+        """Answer straight from a knowledge base entry, without the model"""
+        ai_message = f"**{entry.title}**\n\n{entry.content}\n\n*Source: {entry.citation}*"
+        intent = self._classify_intent(clean_message)
+        await self._store_conversation(user_id, clean_message, ai_message)
+        return {
+            "message": ai_message,
+            "intent": intent,
+            "status": "success",
+            "model": "knowledge-base",
+            "suggestions": self._generate_suggestions(intent),
+            "conversation_id": user_id,
+            "cached": False,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    async def _prepare_request(
+        self,
+        user_message: str,
+        user_id: str,
+        include_context: bool
+    ) -> Tuple[Optional[str], List[Dict[str, str]], Optional[Dict[str, any]]]:
+        """
+        Sanitize the message and build the model context
+        
+        Returns:
+            (clean_message, messages, early_response) where early_response is
+            set when the request can be answered without calling the model
+        """
+        # Sanitize input
+        clean_message = self._sanitize_input(user_message)
+        
+        if not clean_message:
+            return None, [], {
+                "message": "I didn't receive a valid message. Please ask me about Islamic finance topics.",
+                "intent": "invalid_input",
+                "status": "error",
+                "suggestions": [
+                    "How do I calculate Zakat on my savings?",
+                    "What investments are Shariah-compliant?",
+                    "Is cryptocurrency halal?"
+                ]
+            }
+        
+        # Check if message is Islamic finance related
+        if not self._is_islamic_finance_related(clean_message):
+            return clean_message, [], {
+                "message": "As-salamu alaykum! I specialize in Islamic finance and Shariah-compliant financial matters. Please ask questions about Zakat, halal investments, Islamic banking, or other Islamic finance topics. How can I help you with your Islamic financial needs?",
+                "intent": "off_topic",
+                "status": "redirected",
+                "suggestions": [
+                    "Calculate Zakat on gold and silver",
+                    "Find halal investment options",
+                    "Learn about Islamic banking products",
+                    "Understand riba and how to avoid it"
+                ]
+            }
+        
+        # Ground the answer in the knowledge base; a close title match answers outright
+        system_prompt = self.system_prompt
+        knowledge_tokens = 0
+        if settings.knowledge_base_enabled:
+            retrieval = self.knowledge_index.retrieve(clean_message)
+            if retrieval.answer is not None:
+                return clean_message, [], await self._knowledge_answer(
+                    retrieval.answer, clean_message, user_id
+                )
+            knowledge = self._knowledge_context(retrieval.hits)
+            if knowledge:
+                system_prompt = f"{self.system_prompt}\n\n{knowledge}"
+                knowledge_tokens = count_tokens(knowledge)
+        
+        # Build message context
+        messages = [{"role": "system", "content": system_prompt}]
+        
+        # Add conversation history if requested, trimmed to the token budget
+        if include_context:
+            history_budget = (
+                settings.chat_context_token_budget
+                - self.system_prompt_tokens
+                - knowledge_tokens
+                - message_tokens(clean_message)
+            )
+            if history_budget > 0:
+                context = await self._build_conversation_context(user_id, history_budget)
+                messages.extend(context)
+        
+        # Add current user message
+        messages.append({"role": "user", "content": clean_message})
+        
+        return clean_message, messages, None
+
+    def _response_cache_key(self, clean_message: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        """Cache key for context-free turns (system prompt and question only)"""
+        if not settings.response_cache_enabled or len(messages) != 2:
+            return None
+        return self.response_cache.make_key(
+            clean_message,
+            messages[0]["content"],
+            self.temperature,
+            deepseek_client.model
+        )
+
+    async def _cached_answer(
+        self, cache_key: Optional[str], clean_message: str, messages: List[Dict[str, str]]
+    ) -> Optional[str]:
+        """
+        Exact-match answer first, then the closest rephrasing in the semantic index
+        
+        A rephrasing only matches an answer written from the same system
+        prompt, retrieved knowledge base snippets included, so it is never
+        served from other (or outdated) sources.
+        """
+        if not cache_key:
+            return None
+        
+        ai_message = self.response_cache.get(cache_key)
+        if ai_message is not None or not settings.semantic_cache_enabled:
+            return ai_message
+        
+        try:
+            # Memory-mapped index and file lock: keep them off the event loop
+            match = await asyncio.to_thread(self.semantic_cache.lookup, clean_message, messages[0]["content"])
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {str(e)}")
+            return None
+        
+        if match is None:
+            return None
+        
+        ai_message, similarity = match
+        logger.info(f"Semantic cache hit (similarity {similarity:.3f})")
+        return ai_message
+
+    async def _remember_answer(
+        self, cache_key: Optional[str], clean_message: str, messages: List[Dict[str, str]], ai_message: str
+    ):
+        """Store a fresh context-free answer in both caches"""
+        if not cache_key:
+            return
+        
+        self.response_cache.set(cache_key, ai_message)
+        if settings.semantic_cache_enabled:
+            try:
+                await asyncio.to_thread(
+                    self.semantic_cache.add, clean_message, ai_message, messages[0]["content"]
+                )
+            except Exception as e:
+                logger.warning(f"Semantic cache store failed: {str(e)}")
+
+    def _service_error_response(
+        self,
+        error: Exception,
+        user_id: str,
+        clean_message: Optional[str] = None
+    ) -> Dict[str, any]:
+        """Build the user-facing response for a failed AI call"""
+        if isinstance(error, BulkheadFull):
+            # Shed load: the caller should come back, not get a degraded answer
+            logger.warning(f"AI request for user {user_id} refused: {str(error)}")
+            return {
+                "message": f"I'm receiving a lot of questions right now. Please try again in {error.retry_after} seconds.",
+                "intent": "system_busy",
+                "status": "overloaded",
+                "error": str(error),
+                "retry_after": error.retry_after,
+                "suggestions": [
+                    "Try again in a few seconds",
+                    "Use the Zakat Calculator"
+                ]
+            }
+        
+        if isinstance(error, DeepSeekError):
+            logger.error(f"DeepSeek error for user {user_id}: {str(error)}")
+            
+            # Answer the question's topic from the canned guidance instead of failing
+            if clean_message and settings.chat_offline_fallback_enabled:
+                intent = self._classify_intent(clean_message)
+                return {
+                    "message": ISLAMIC_FINANCE_FALLBACK.respond(clean_message),
+                    "intent": intent,
+                    "status": "fallback",
+                    "model": "offline-fallback",
+                    "error": str(error),
+                    "suggestions": self._generate_suggestions(intent),
+                    "conversation_id": user_id,
+                    "cached": False,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+            
+            return {
+                "message": "I apologize, but I'm experiencing technical difficulties with my AI service. Please try again in a moment, or feel free to use our Zakat calculator for immediate calculations.",
+                "intent": "system_error",
+                "status": "error",
+                "error": str(error),
+                "suggestions": [
+                    "Try asking a simpler question",
+                    "Use the Zakat Calculator",
+                    "Contact support if the issue persists"
+                ]
+            }
+        
+        logger.error(f"Unexpected error in Islamic Finance AI: {str(error)}")
+        return {
+            "message": "I apologize for the technical issue. Please try rephrasing your question or use our Zakat calculator for immediate assistance.",
+            "intent": "unknown_error",
+            "status": "error",
+            "error": "System error",
+            "suggestions": [
+                "Rephrase your question",
+                "Use the Zakat Calculator",
+                "Contact technical support"
+            ]
+        }
 
     async def get_response(
         self, 
@@ -161,69 +481,35 @@ Remember: You're helping Muslims navigate modern finance while staying true to I
             Dict containing response, metadata, and status
         """
         
+        clean_message = None
         try:
-            # Sanitize input
-            clean_message = self._sanitize_input(user_message)
-            
-            if not clean_message:
-                return {
-                    "message": "I didn't receive a valid message. Please ask me about Islamic finance topics.",
-                    "intent": "invalid_input",
-                    "status": "error",
-                    "suggestions": [
-                        "How do I calculate Zakat on my savings?",
-                        "What investments are Shariah-compliant?",
-                        "Is cryptocurrency halal?"
-                    ]
-                }
-            
-            # Check if message is Islamic finance related
-            if not self._is_islamic_finance_related(clean_message):
-                return {
-                    "message": "As-salamu alaykum! I specialize in Islamic finance and Shariah-compliant financial matters. Please ask questions about Zakat, halal investments, Islamic banking, or other Islamic finance topics. How can I help you with your Islamic financial needs?",
-                    "intent": "off_topic",
-                    "status": "redirected",
-                    "suggestions": [
-                        "Calculate Zakat on gold and silver",
-                        "Find halal investment options",
-                        "Learn about Islamic banking products",
-                        "Understand riba and how to avoid it"
-                    ]
-                }
-            
-            # Build message context
-            messages = [{"role": "system", "content": self.system_prompt}]
-            
-            # Add conversation history if requested
-            if include_context:
-                context = self._build_conversation_context(user_id)
-                messages.extend(context)
+            clean_message, messages, early_response = await self._prepare_request(
+                user_message, user_id, include_context
+            )
+            if early_response:
+                return early_response
             
-            # Add current user message
-            messages.append({"role": "user", "content": clean_message})
+            # Repeated or rephrased context-free questions are answered from cache
+            cache_key = self._response_cache_key(clean_message, messages)
+            ai_message = await self._cached_answer(cache_key, clean_message, messages)
+            cached = ai_message is not None
             
-            # Validate conversation length
-            if not deepseek_client.validate_conversation_length(messages):
-                # Reset context if too long
-                messages = [
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": clean_message}
-                ]
-                logger.info(f"Conversation context reset for user {user_id} due to length")
+            if not cached:
+                # Get AI response
+                response = await deepseek_client.chat_completion(
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens
+                )
+                
+                # Extract and process response
+                ai_message = response["choices"][0]["message"]["content"]
+                await self._remember_answer(cache_key, clean_message, messages, ai_message)
             
-            # Get AI response
-            response = await deepseek_client.chat_completion(
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1500
-            )
-            
-            # Extract and process response
-            ai_message = response["choices"][0]["message"]["content"]
             intent = self._classify_intent(clean_message)
             
             # Store conversation
-            self._store_conversation(user_id, clean_message, ai_message)
+            await self._store_conversation(user_id, clean_message, ai_message)
             
             # Generate contextual suggestions
             suggestions = self._generate_suggestions(intent)
@@ -235,36 +521,83 @@ Remember: You're helping Muslims navigate modern finance while staying true to I
                 "model": "deepseek-chat",
                 "suggestions": suggestions,
                 "conversation_id": user_id,
+                "cached": cached,
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-        except DeepSeekError as e:
-            logger.error(f"DeepSeek error for user {user_id}: {str(e)}")
-            return {
-                "message": "I apologize, but I'm experiencing technical difficulties with my AI service. Please try again in a moment, or feel free to use our Zakat calculator for immediate calculations.",
-                "intent": "system_error",
-                "status": "error",
-                "error": str(e),
-                "suggestions": [
-                    "Try asking a simpler question",
-                    "Use the Zakat Calculator",
-                    "Contact support if the issue persists"
-                ]
-            }
-            
         except Exception as e:
-            logger.error(f"Unexpected error in Islamic Finance AI: {str(e)}")
-            return {
-                "message": "I apologize for the technical issue. Please try rephrasing your question or use our Zakat calculator for immediate assistance.",
-                "intent": "unknown_error",
-                "status": "error",
-                "error": "System error",
-                "suggestions": [
-                    "Rephrase your question",
-                    "Use the Zakat Calculator",
-                    "Contact technical support"
-                ]
-            }
+            return self._service_error_response(e, user_id, clean_message)
+
+    async def stream_response(
+        self,
+        user_message: str,
+        user_id: str = "anonymous",
+        include_context: bool = True
+    ) -> AsyncIterator[Dict[str, any]]:
+        """
+        Stream AI response for Islamic finance question
+        
+        Yields a "start" event, one "delta" event per content chunk and a
+        final "done" event. Requests answered without the model yield a
+        single "done" event carrying the full response. The conversation is
+        stored only after the stream has completed.
+        
+        Args:
+            user_message: The user's question or message
+            user_id: Unique identifier for conversation context
+            include_context: Whether to include conversation history
+        """
+        
+        try:
+            clean_message, messages, early_response = await self._prepare_request(
+                user_message, user_id, include_context
+            )
+        except Exception as e:
+            yield {"event": "done", **self._service_error_response(e, user_id)}
+            return
+        
+        if early_response:
+            yield {"event": "done", **early_response}
+            return
+        
+        intent = self._classify_intent(clean_message)
+        yield {"event": "start", "intent": intent, "model": "deepseek-chat"}
+        
+        cache_key = self._response_cache_key(clean_message, messages)
+        ai_message = await self._cached_answer(cache_key, clean_message, messages)
+        
+        if ai_message is not None:
+            yield {"event": "delta", "content": ai_message}
+        else:
+            chunks = []
+            try:
+                async for delta in deepseek_client.stream_chat_completion(
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens
+                ):
+                    chunks.append(delta)
+                    yield {"event": "delta", "content": delta}
+            except Exception as e:
+                # Canned guidance only makes sense if nothing was streamed yet
+                fallback_for = None if chunks else clean_message
+                yield {"event": "done", **self._service_error_response(e, user_id, fallback_for)}
+                return
+            
+            ai_message = "".join(chunks)
+            await self._remember_answer(cache_key, clean_message, messages, ai_message)
+        
+        # Store conversation once the full reply is known
+        await self._store_conversation(user_id, clean_message, ai_message)
+        
+        yield {
+            "event": "done",
+            "intent": intent,
+            "status": "success",
+            "model": "deepseek-chat",
+            "suggestions": self._generate_suggestions(intent),
+            "timestamp": datetime.utcnow().isoformat()
+        }
 
     def _generate_suggestions(self, intent: str) -> List[str]:
         """Generate contextual suggestions based on intent"""
@@ -311,10 +644,11 @@ Remember: You're helping Muslims navigate modern finance while staying true to I
             
             return {
                 "service": "islamic_finance_ai",
-                "status": "healthy" if client_health["available"] else "degraded",
+                "status": "healthy" if client_health["status"] == "healthy" else "degraded",
                 "deepseek_client": client_health,
                 "system_prompt_loaded": bool(self.system_prompt),
-                "conversation_memory_active": True,
+                "conversation_memory": self.conversation_store.stats(),
+                "circuit_breakers": breaker_snapshots(),
                 "timestamp": datetime.utcnow().isoformat()
             }
             
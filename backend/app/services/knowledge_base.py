@@ -0,0 +1,241 @@
+"""
+Knowledge base retrieval for Islamic Finance AI
+In-process top-k cosine search over verified knowledge_base entries
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from .embeddings import HashedNgramEmbedder
+
+logger = logging.getLogger(__name__)
+
+# Bump when the embedder or document text changes so old snapshots are rebuilt
+_INDEX_VERSION = 1
+
+_KNOWLEDGE_QUERY = """
+    SELECT id, title, content, source, source_reference, category, keywords
+    FROM knowledge_base
+    WHERE is_verified = true
+    ORDER BY title
+"""
+
+
+class KnowledgeEntry:
+    """One verified knowledge base entry"""
+
+    __slots__ = ("id", "title", "content", "source", "source_reference", "category", "keywords")
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        content: str,
+        source: str,
+        source_reference: Optional[str] = None,
+        category: Optional[str] = None,
+        keywords: Optional[Sequence[str]] = None
+    ):
+        self.id = str(id)
+        self.title = title
+        self.content = content
+        self.source = source
+        self.source_reference = source_reference
+        self.category = category
+        self.keywords = list(keywords or [])
+
+    @property
+    def citation(self) -> str:
+        return f"{self.source} {self.source_reference}" if self.source_reference else self.source
+
+    def document(self) -> str:
+        """Text the entry is indexed under"""
+        keywords = " ".join(keyword.replace("_", " ") for keyword in self.keywords)
+        return f"{self.title}. {keywords}. {self.content}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Retrieval(NamedTuple):
+    """Snippets for a question, plus an entry that answers it outright"""
+
+    hits: List[Tuple[KnowledgeEntry, float]]
+    answer: Optional[KnowledgeEntry] = None
+
+
+class KnowledgeIndex:
+    """
+    Cosine-similarity search over the knowledge base
+
+    Entries are embedded once with the local hashed n-gram embedder (the
+    same one the semantic cache uses) and written as a snapshot:
+    `{path}.<fingerprint>.vectors` holds two L2-normalised float32 blocks,
+    full entry text then titles, and `{path}.json` the entries plus the
+    name of that file, so replacing the JSON swaps both at once. The
+    matrix is memory-mapped, so every worker on the host shares one copy
+    and a restart does not re-embed anything.
+
+    `retrieve()` embeds the question once: entries at or above
+    `min_similarity` against their full text become prompt snippets, and
+    an entry whose title matches at `answer_similarity` or better answers
+    the question by itself.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        top_k: int = 3,
+        min_similarity: float = 0.2,
+        answer_similarity: float = 0.85,
+        embedder: Optional[HashedNgramEmbedder] = None
+    ):
+        self.path = path
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.answer_similarity = answer_similarity
+        self.embedder = embedder or HashedNgramEmbedder()
+
+        self._entries_path = f"{path}.json"
+
+        self._entries: List[KnowledgeEntry] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._fingerprint: Optional[str] = None
+        self._counters = {
+            "searches": 0,
+            "snippet_hits": 0,
+            "direct_answers": 0,
+            "rebuilds": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _fingerprint_for(self, entries: Sequence[KnowledgeEntry]) -> str:
+        digest = hashlib.sha256(f"{_INDEX_VERSION}\x1f{self.embedder.dim}".encode("utf-8"))
+        for entry in entries:
+            digest.update(b"\x1e")
+            digest.update(json.dumps(entry.to_dict(), sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def load_snapshot(self) -> bool:
+        """Map an existing snapshot; False if there is none or it is stale"""
+        try:
+            with open(self._entries_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            entries = [KnowledgeEntry(**entry) for entry in snapshot["entries"]]
+            if snapshot.get("dim") != self.embedder.dim or snapshot.get("version") != _INDEX_VERSION:
+                return False
+            vectors = None
+            if entries:
+                vectors = np.memmap(
+                    snapshot["vectors"], dtype=np.float32, mode="r",
+                    shape=(2 * len(entries), self.embedder.dim)
+                )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.info(f"No usable knowledge base snapshot at {self.path}: {str(e)}")
+            return False
+
+        self._entries = entries
+        self._vectors = vectors
+        self._fingerprint = snapshot.get("fingerprint")
+        logger.info(f"Knowledge base snapshot loaded: {len(entries)} entries")
+        return True
+
+    def build(self, entries: Sequence[KnowledgeEntry]):
+        """Embed entries and replace the snapshot (no-op if nothing changed)"""
+        entries = list(entries)
+        fingerprint = self._fingerprint_for(entries)
+        if fingerprint == self._fingerprint:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        previous = self._read_vectors_path()
+        vectors_path = f"{self.path}.{fingerprint[:16]}.vectors"
+        entries_tmp = f"{self._entries_path}.{os.getpid()}.tmp"
+
+        if entries:
+            matrix = self.embedder.embed_many(
+                [entry.document() for entry in entries] + [entry.title for entry in entries]
+            )
+            vectors_tmp = f"{vectors_path}.{os.getpid()}.tmp"
+            matrix.astype(np.float32).tofile(vectors_tmp)
+            os.replace(vectors_tmp, vectors_path)
+
+        with open(entries_tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": _INDEX_VERSION,
+                "dim": self.embedder.dim,
+                "fingerprint": fingerprint,
+                "vectors": vectors_path,
+                "entries": [entry.to_dict() for entry in entries]
+            }, f)
+        os.replace(entries_tmp, self._entries_path)
+
+        # Workers still mapping the old matrix keep it until they reload
+        if previous and previous != vectors_path:
+            try:
+                os.remove(previous)
+            except OSError:
+                pass
+
+        self._counters["rebuilds"] += 1
+        self.load_snapshot()
+
+    def _read_vectors_path(self) -> Optional[str]:
+        try:
+            with open(self._entries_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("vectors")
+        except (OSError, ValueError):
+            return None
+
+    def load_from_database(self, engine) -> int:
+        """Rebuild from the verified rows of the knowledge_base table"""
+        from sqlalchemy import text
+
+        with engine.connect() as connection:
+            rows = connection.execute(text(_KNOWLEDGE_QUERY)).mappings().all()
+        self.build(KnowledgeEntry(**row) for row in rows)
+        return len(self._entries)
+
+    def retrieve(self, question: str, k: Optional[int] = None) -> Retrieval:
+        """Best snippets above `min_similarity` (most similar first) and any direct answer"""
+        count = len(self._entries)
+        if self._vectors is None or not count:
+            return Retrieval([])
+
+        self._counters["searches"] += 1
+        k = min(k or self.top_k, count)
+        scores = np.asarray(self._vectors @ self.embedder.embed(question))
+        content_scores, title_scores = scores[:count], scores[count:]
+
+        top = np.argpartition(-content_scores, k - 1)[:k] if k < count else np.arange(count)
+        top = top[np.argsort(-content_scores[top])]
+        hits = [
+            (self._entries[index], float(content_scores[index]))
+            for index in top
+            if content_scores[index] >= self.min_similarity
+        ]
+        if hits:
+            self._counters["snippet_hits"] += 1
+
+        best_title = int(np.argmax(title_scores))
+        answer = None
+        if title_scores[best_title] >= self.answer_similarity:
+            answer = self._entries[best_title]
+            self._counters["direct_answers"] += 1
+        return Retrieval(hits, answer)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "entries": len(self._entries),
+            "top_k": self.top_k,
+            "min_similarity": self.min_similarity,
+            "answer_similarity": self.answer_similarity,
+            **self._counters
+        }
@@ -0,0 +1,389 @@
+"""
+Precious metal prices for Zakat calculations
+CoinGecko gold and silver quotes behind an in-process stale-while-revalidate
+cache, optionally fed by one refresher per host through a snapshot file
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, NamedTuple, Optional
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+import httpx
+
+from app.config import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# CoinGecko quotes metals in USD per troy ounce
+OUNCES_TO_GRAMS = Decimal("31.1035")
+
+# Bump when the snapshot layout changes
+_SNAPSHOT_VERSION = 1
+
+# How often a worker looks for a newer snapshot (one stat() per interval)
+_SNAPSHOT_CHECK_SECONDS = 1.0
+
+
+class PriceQuote(NamedTuple):
+    """Gold and silver in USD per gram, and when they were fetched"""
+
+    gold: Decimal
+    silver: Decimal
+    source: str
+    fetched_at: Optional[datetime] = None
+    fetched_monotonic: Optional[float] = None
+
+
+class PriceService:
+    """
+    Gold and silver prices with a freshness TTL and a stale window
+
+    A quote younger than `ttl` is served as is. Up to `stale_seconds`
+    past that it is still served straight away, marked stale, while one
+    background task refetches it. Beyond the stale window (or before the
+    first fetch) callers wait for a refetch, shared by every request that
+    arrives meanwhile. When CoinGecko fails the newest live quote is
+    still served (the built-in prices only when there never was one), and
+    no refetch is tried again for `retry_seconds`, so an outage or a rate
+    limit is not hammered by every request.
+
+    With `start()` the cache is fed by a refresher instead: every worker
+    runs one, but only the worker holding an exclusive flock on
+    `{snapshot_path}.lock` polls CoinGecko, every `refresh_interval`
+    seconds give or take `refresh_jitter`, and publishes each good quote
+    to `snapshot_path` with an atomic rename. Requests then only re-read
+    that file when it changes, so they never touch the network. A failed
+    poll leaves the last good snapshot in place. The lock dies with its
+    process, so another worker takes over within one interval.
+
+    Every result carries `fetched_at`, `age_seconds`, `stale` and `source`
+    so responses can say how old their prices are.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        stale_seconds: Optional[float] = None,
+        retry_seconds: Optional[float] = None,
+        snapshot_path: Optional[str] = None,
+        refresh_interval: Optional[float] = None,
+        refresh_jitter: Optional[float] = None
+    ):
+        self.base_url = settings.coingecko_base_url
+        self.api_key = settings.coingecko_api_key
+        self.timeout = settings.coingecko_api_timeout
+        self.ttl = settings.price_cache_ttl_seconds if ttl is None else ttl
+        self.stale_seconds = settings.price_cache_stale_seconds if stale_seconds is None else stale_seconds
+        self.retry_seconds = settings.price_cache_retry_seconds if retry_seconds is None else retry_seconds
+        self.snapshot_path = snapshot_path or settings.price_snapshot_path
+        self.refresh_interval = settings.price_refresh_interval if refresh_interval is None else refresh_interval
+        self.refresh_jitter = settings.price_refresh_jitter if refresh_jitter is None else refresh_jitter
+        self.fallback_prices = PriceQuote(
+            gold=Decimal("75.00"),   # USD per gram
+            silver=Decimal("0.95"),  # USD per gram
+            source="fallback"
+        )
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._quote: Optional[PriceQuote] = None
+        self._refresh: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+        self._refresher: Optional[asyncio.Task] = None
+        self._leader = _LeaderLock(f"{self.snapshot_path}.lock")
+        self._snapshot_mtime: Optional[int] = None
+        self._snapshot_checked = 0.0
+        self._counters = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "fallbacks": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "snapshot_loads": 0
+        }
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+            )
+        return self._client
+
+    async def start(self):
+        """Start this worker's refresher (requests then read the shared snapshot)"""
+        if self._refresher is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            self._read_snapshot(force=True)
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        """Stop the refresher and any refresh in progress, and close the HTTP client"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+        self._leader.release()
+        if self._refresh is not None and not self._refresh.done():
+            self._refresh.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_prices(self) -> PriceQuote:
+        """Fetch live prices from CoinGecko, bypassing the cache"""
+        headers = {}
+        if self.api_key:
+            headers["X-CG-Pro-API-Key"] = self.api_key
+
+        response = await self._get_http_client().get(
+            f"{self.base_url}/simple/price",
+            params={"ids": "gold,silver", "vs_currencies": "usd"},
+            headers=headers
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        try:
+            gold_price = Decimal(str(data["gold"]["usd"])) / OUNCES_TO_GRAMS
+            silver_price = Decimal(str(data["silver"]["usd"])) / OUNCES_TO_GRAMS
+        except (KeyError, TypeError, ArithmeticError):
+            raise ValueError("Invalid price data received")
+        if not gold_price or not silver_price:
+            raise ValueError("Invalid price data received")
+
+        return PriceQuote(
+            gold=gold_price.quantize(Decimal("0.01")),
+            silver=silver_price.quantize(Decimal("0.0001")),
+            source="coingecko",
+            fetched_at=datetime.utcnow(),
+            fetched_monotonic=time.monotonic()
+        )
+
+    async def _revalidate(self):
+        try:
+            self._quote = await self.fetch_prices()
+            self._counters["refreshes"] += 1
+            logger.info(f"Precious metal prices refreshed: gold={self._quote.gold}, silver={self._quote.silver}")
+        except Exception as e:
+            self._counters["refresh_failures"] += 1
+            self._retry_at = time.monotonic() + self.retry_seconds
+            logger.warning(f"Failed to fetch live prices, retrying in {self.retry_seconds:.0f}s: {str(e)}")
+
+    def _jittered(self, delay: float) -> float:
+        return max(0.0, delay * random.uniform(1 - self.refresh_jitter, 1 + self.refresh_jitter))
+
+    async def _refresh_loop(self):
+        """Poll and publish while leader; otherwise wait to take over"""
+        while True:
+            delay = self.refresh_interval
+            try:
+                if self._leader.acquire():
+                    # A previous leader may have published moments ago
+                    self._read_snapshot(force=True)
+                    quote = self._quote
+                    age = None if quote is None else time.monotonic() - quote.fetched_monotonic
+                    if age is not None and age < self.refresh_interval:
+                        delay = self.refresh_interval - age
+                    elif not await self._publish():
+                        delay = self.retry_seconds
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Price refresher error: {str(e)}")
+            await asyncio.sleep(self._jittered(delay))
+
+    async def _publish(self) -> bool:
+        """Fetch a quote and write it to the snapshot; False (snapshot untouched) on failure"""
+        try:
+            quote = await self.fetch_prices()
+        except Exception as e:
+            self._counters["refresh_failures"] += 1
+            logger.warning(f"Failed to fetch live prices, keeping the last snapshot: {str(e)}")
+            return False
+
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": _SNAPSHOT_VERSION,
+                "gold": str(quote.gold),
+                "silver": str(quote.silver),
+                "source": quote.source,
+                "fetched_at": time.time() - (time.monotonic() - quote.fetched_monotonic),
+                "pid": os.getpid()
+            }, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+        self._quote = quote
+        self._snapshot_mtime = os.stat(self.snapshot_path).st_mtime_ns
+        self._counters["refreshes"] += 1
+        logger.info(f"Precious metal prices published: gold={quote.gold}, silver={quote.silver}")
+        return True
+
+    def _read_snapshot(self, force: bool = False):
+        """Adopt the shared snapshot if it changed since it was last read"""
+        now = time.monotonic()
+        if not force and now - self._snapshot_checked < _SNAPSHOT_CHECK_SECONDS:
+            return
+        self._snapshot_checked = now
+        try:
+            mtime = os.stat(self.snapshot_path).st_mtime_ns
+            if mtime == self._snapshot_mtime:
+                return
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != _SNAPSHOT_VERSION:
+                return
+            fetched_at = float(snapshot["fetched_at"])
+            quote = PriceQuote(
+                gold=Decimal(snapshot["gold"]),
+                silver=Decimal(snapshot["silver"]),
+                source=snapshot["source"],
+                fetched_at=datetime.utcfromtimestamp(fetched_at),
+                fetched_monotonic=now - max(0.0, time.time() - fetched_at)
+            )
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError, ArithmeticError) as e:
+            logger.warning(f"Unreadable price snapshot at {self.snapshot_path}: {str(e)}")
+            return
+
+        self._snapshot_mtime = mtime
+        if self._quote is None or quote.fetched_monotonic > self._quote.fetched_monotonic:
+            self._quote = quote
+            self._counters["snapshot_loads"] += 1
+
+    def _start_refresh(self) -> asyncio.Task:
+        """The refresh in progress, or a new one"""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._revalidate())
+        return self._refresh
+
+    def _result(self, quote: PriceQuote, now: float) -> Dict[str, object]:
+        age = None if quote.fetched_monotonic is None else now - quote.fetched_monotonic
+        return {
+            "gold": quote.gold,
+            "silver": quote.silver,
+            "source": quote.source,
+            "fetched_at": quote.fetched_at,
+            "age_seconds": None if age is None else round(age, 1),
+            "stale": age is None or age >= self.ttl
+        }
+
+    async def get_precious_metal_prices(self) -> Dict[str, object]:
+        """
+        Current gold and silver prices per gram (`gold`, `silver`), plus
+        `fetched_at`, `age_seconds`, `stale` and `source`
+        """
+        if self._refresher is not None:
+            return self._from_snapshot()
+
+        now = time.monotonic()
+        quote = self._quote
+
+        if quote is not None:
+            age = now - quote.fetched_monotonic
+            if age < self.ttl:
+                self._counters["fresh_hits"] += 1
+                return self._result(quote, now)
+            if age < self.ttl + self.stale_seconds:
+                self._counters["stale_hits"] += 1
+                if now >= self._retry_at:
+                    self._start_refresh()
+                return self._result(quote, now)
+
+        if now >= self._retry_at:
+            self._counters["misses"] += 1
+            # Shielded: a caller giving up must not cancel the fetch others share
+            await asyncio.shield(self._start_refresh())
+            now = time.monotonic()
+            if self._quote is not None and self._quote is not quote:
+                return self._result(self._quote, now)
+
+        if quote is not None:
+            return self._result(quote, now)
+        self._counters["fallbacks"] += 1
+        return self._result(self.fallback_prices, now)
+
+    def _from_snapshot(self) -> Dict[str, object]:
+        """Prices as last published by the refresher, without network I/O"""
+        self._read_snapshot()
+        now = time.monotonic()
+        quote = self._quote
+        if quote is None:
+            self._counters["fallbacks"] += 1
+            return self._result(self.fallback_prices, now)
+        if now - quote.fetched_monotonic < self.ttl:
+            self._counters["fresh_hits"] += 1
+        else:
+            self._counters["stale_hits"] += 1
+        return self._result(quote, now)
+
+    def stats(self) -> Dict[str, object]:
+        now = time.monotonic()
+        quote = self._quote
+        return {
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_seconds,
+            "refresher": self._refresher is not None,
+            "leader": self._leader.held,
+            "age_seconds": None if quote is None else round(now - quote.fetched_monotonic, 1),
+            "refreshing": self._refresh is not None and not self._refresh.done(),
+            "retry_in_seconds": round(max(0.0, self._retry_at - now), 1),
+            **self._counters
+        }
+
+
+class _LeaderLock:
+    """
+    Non-blocking flock on a sidecar file, held until released or the process exits
+
+    Without flock (Windows, single-process deployments) every caller leads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+
+    @property
+    def held(self) -> bool:
+        return self._handle is not None
+
+    def acquire(self) -> bool:
+        """Take the lock if it is free; True while this process holds it"""
+        if self._handle is not None:
+            return True
+        handle = open(self.path, "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                return False
+        self._handle = handle
+        logger.info(f"Price refresher leadership taken by worker {os.getpid()}")
+        return True
+
+    def release(self):
+        if self._handle is not None:
+            if fcntl is not None:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+
+
+price_service = PriceService()
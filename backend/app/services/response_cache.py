@@ -0,0 +1,100 @@
+"""
+Response cache for Islamic Finance AI
+Serves repeated context-free questions without a model round trip
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import hashlib
+import re
+import time
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+
+class ResponseCache:
+    """
+    Bounded TTL cache of model answers
+
+    Entries are keyed on the normalized question together with everything
+    else that shapes the answer (system prompt, temperature, model), and are
+    evicted least-recently-used once `max_entries` is reached.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "purges": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        """Case-fold and collapse whitespace and trailing punctuation"""
+        normalized = _WHITESPACE.sub(" ", message.casefold()).strip()
+        return _TRAILING_PUNCTUATION.sub("", normalized)
+
+    def make_key(self, message: str, system_prompt: str, temperature: float, model: str) -> str:
+        """Build the cache key for a context-free completion"""
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        material = "\x1f".join([
+            self.normalize(message),
+            prompt_hash,
+            f"{temperature:.3f}",
+            model
+        ])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached answer, or None on miss or expiry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+
+        expires_at, answer = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return answer
+
+    def set(self, key: str, answer: str):
+        """Store an answer, evicting the least recently used entries if full"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, answer)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def purge(self) -> int:
+        """Drop every cached answer, returning how many were removed"""
+        removed = len(self._entries)
+        self._entries.clear()
+        self._counters["purges"] += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Cache size and hit/miss counters"""
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            **self._counters
+        }
@@ -0,0 +1,401 @@
+"""
+Semantic answer cache for Islamic Finance AI
+Serves rephrased context-free questions from a persistent similarity index
+"""
+
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from .embeddings import HashedNgramEmbedder
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the embedder or record layout changes so stale entries are discarded
+_INDEX_VERSION = 3
+
+# Columns of the metadata matrix; a stored_at of 0 marks an empty slot
+_STORED_AT = 0
+_LAST_USED = 1
+
+# Numbers, rulings and negations change the answer however similar the rest
+# of the question is, so a match must repeat them exactly
+_GUARD_TERM = re.compile(
+    r"\d+(?:[.,]\d+)*"
+    r"|\b(?:halal|haram|permissible|impermissible|permitted|allowed|forbidden|prohibited"
+    r"|lawful|unlawful|makruh|mubah|not|no|never|nor|without|cannot)\b"
+    r"|\b\w+n't\b"
+)
+
+
+def guard_terms(question: str) -> Tuple[str, ...]:
+    """Numbers, ruling words and negations of a question, in order"""
+    terms = []
+    for term in _GUARD_TERM.findall(question.casefold().replace("\u2019", "'")):
+        if term[0].isdigit():
+            terms.append(term.replace(",", ""))
+        elif term == "cannot" or term.endswith("n't"):
+            terms.append("not")
+        else:
+            terms.append(term)
+    return tuple(terms)
+
+
+def source_key(source: str) -> str:
+    """Digest of the prompt an answer was written from"""
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """
+    Cosine-similarity answer cache backed by memory-mapped files
+
+    Question vectors live in `{path}.vectors` (capacity x dim float32) and
+    per-slot timestamps in `{path}.meta`, both memory-mapped so the index
+    survives restarts and is shared by every worker on the host. Answers are
+    appended to `{path}.answers.jsonl`; each process tails that log to learn
+    about slots written by its siblings. Once full, the least recently used
+    slot is overwritten.
+
+    Similarity alone cannot tell "$10,000" from "$50,000" or "halal" from
+    "haram", so each answer also records the question's `guard_terms()`
+    and is only served to a question with the same ones. Likewise it
+    records a digest of its `source`, the prompt it was written from
+    (retrieved knowledge base entries included), and is only served
+    where the same sources would be used again.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        capacity: int = 4096,
+        threshold: float = 0.78,
+        ttl_seconds: float = 86400,
+        embedder: Optional[HashedNgramEmbedder] = None
+    ):
+        self.path = path
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.dim = self.embedder.dim
+        self.namespace = hashlib.sha256(
+            f"{_INDEX_VERSION}\x1f{self.dim}\x1f{namespace}".encode("utf-8")
+        ).hexdigest()
+
+        self._header_path = f"{path}.json"
+        self._vectors_path = f"{path}.vectors"
+        self._meta_path = f"{path}.meta"
+        self._answers_path = f"{path}.answers.jsonl"
+        self._lock_path = f"{path}.lock"
+
+        self._vectors: Optional[np.memmap] = None
+        self._meta: Optional[np.memmap] = None
+        self._answers: Dict[int, Tuple[float, str, Tuple[str, ...], str]] = {}
+        # lookup() and add() run in worker threads
+        self._lock = threading.Lock()
+        self._log_offset = 0
+        self._log_inode: Optional[int] = None
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "purges": 0
+        }
+
+    def _ensure_open(self):
+        """Map the index files, recreating them if the layout has changed"""
+        if self._vectors is not None:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._file_lock():
+            header = {
+                "namespace": self.namespace,
+                "capacity": self.capacity,
+                "dim": self.dim
+            }
+            if self._read_header() != header or not self._files_present():
+                self._reset_files(header)
+
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim)
+            )
+            self._meta = np.memmap(
+                self._meta_path, dtype=np.float64, mode="r+", shape=(self.capacity, 2)
+            )
+
+        self._sync_answers()
+        logger.info(f"Semantic cache opened at {self.path} ({len(self._answers)} answers)")
+
+    def _read_header(self) -> Optional[Dict]:
+        try:
+            with open(self._header_path, "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def _files_present(self) -> bool:
+        return (
+            os.path.exists(self._vectors_path)
+            and os.path.exists(self._meta_path)
+            and os.path.exists(self._answers_path)
+        )
+
+    def _reset_files(self, header: Dict):
+        """Create empty, correctly sized index files (caller holds the lock)"""
+        for filename, itemsize, columns in (
+            (self._vectors_path, 4, self.dim),
+            (self._meta_path, 8, 2)
+        ):
+            with open(filename, "wb") as handle:
+                handle.truncate(self.capacity * columns * itemsize)
+        open(self._answers_path, "w", encoding="utf-8").close()
+
+        with open(self._header_path, "w", encoding="utf-8") as handle:
+            json.dump(header, handle)
+        logger.info(f"Semantic cache index initialised at {self.path}")
+
+    def _file_lock(self):
+        """Exclusive inter-process lock around index writes"""
+        if fcntl is None:
+            return _NullLock()
+        return _FileLock(self._lock_path)
+
+    def _sync_answers(self):
+        """Read answers appended to the log since the last sync"""
+        try:
+            stat = os.stat(self._answers_path)
+        except OSError:
+            return
+
+        # A new inode or a shorter file means the log was rewritten
+        if stat.st_ino != self._log_inode or stat.st_size < self._log_offset:
+            self._answers.clear()
+            self._log_offset = 0
+            self._log_inode = stat.st_ino
+
+        if stat.st_size == self._log_offset:
+            return
+
+        with open(self._answers_path, "r", encoding="utf-8") as handle:
+            handle.seek(self._log_offset)
+            for line in handle:
+                if not line.endswith("\n"):
+                    break  # partial write in progress, pick it up next time
+                self._log_offset += len(line.encode("utf-8"))
+                try:
+                    record = json.loads(line)
+                    self._answers[int(record["slot"])] = (
+                        float(record["stored_at"]), record["answer"], tuple(record["guard"]), record["source"]
+                    )
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Skipping malformed semantic cache record")
+
+    def _answer_for(self, slot: int, guard: Tuple[str, ...], source: str) -> Optional[str]:
+        """Answer stored in a slot, if it belongs to the slot's current vector, guard and source"""
+        stored_at = float(self._meta[slot, _STORED_AT])
+        entry = self._answers.get(slot)
+        if entry is None or entry[0] != stored_at:
+            self._sync_answers()
+            entry = self._answers.get(slot)
+        if entry is None or entry[0] != stored_at or entry[2] != guard or entry[3] != source:
+            return None
+        return entry[1]
+
+    def _live_mask(self, now: float) -> np.ndarray:
+        stored_at = self._meta[:, _STORED_AT]
+        return (stored_at > 0) & (now - stored_at < self.ttl_seconds)
+
+    def lookup(self, question: str, source: str = "") -> Optional[Tuple[str, float]]:
+        """
+        Return (answer, similarity) for the closest live question above the
+        threshold whose guard terms and source equal this question's
+        """
+        with self._lock:
+            match = self._lookup(question, source_key(source))
+            self._counters["hits" if match else "misses"] += 1
+        return match
+
+    def _lookup(self, question: str, source: str) -> Optional[Tuple[str, float]]:
+        self._ensure_open()
+        query = self.embedder.embed(question)
+        if not query.any():
+            return None
+
+        now = time.time()
+        live = self._live_mask(now)
+        if not live.any():
+            return None
+
+        # Rows are unit length, so the dot product is the cosine similarity
+        scores = self._vectors @ query
+        scores[~live] = -1.0
+        candidates = np.flatnonzero(scores >= self.threshold)
+        guard = guard_terms(question)
+
+        for slot in candidates[np.argsort(-scores[candidates])]:
+            slot = int(slot)
+            answer = self._answer_for(slot, guard, source)
+            if answer is not None:
+                self._meta[slot, _LAST_USED] = now
+                return answer, float(scores[slot])
+        return None
+
+    def add(self, question: str, answer: str, source: str = ""):
+        """Index an answer, overwriting the least recently used slot when full"""
+        with self._lock:
+            self._add(question, answer, source_key(source))
+
+    def _add(self, question: str, answer: str, source: str):
+        self._ensure_open()
+        vector = self.embedder.embed(question)
+        if not vector.any() or not answer:
+            return
+        guard = guard_terms(question)
+
+        with self._file_lock():
+            now = time.time()
+            live = self._live_mask(now)
+            free = np.flatnonzero(~live)
+            if free.size:
+                slot = int(free[0])
+                if self._meta[slot, _STORED_AT] > 0:
+                    self._counters["evictions"] += 1
+            else:
+                slot = int(np.argmin(self._meta[:, _LAST_USED]))
+                self._counters["evictions"] += 1
+
+            self._vectors[slot] = vector
+            self._meta[slot] = (now, now)
+
+            record = {
+                "slot": slot,
+                "stored_at": now,
+                "question": question,
+                "answer": answer,
+                "guard": guard,
+                "source": source
+            }
+            with open(self._answers_path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            self._vectors.flush()
+            self._meta.flush()
+            self._compact_if_needed()
+
+        self._answers[slot] = (now, answer, guard, source)
+        self._counters["stores"] += 1
+
+    def _compact_if_needed(self):
+        """Rewrite the answer log once superseded records dominate (caller holds the lock)"""
+        try:
+            size = os.path.getsize(self._answers_path)
+        except OSError:
+            return
+        if size < 4 * 1024 * 1024:
+            return
+
+        self._sync_answers()
+        live = self._live_mask(time.time())
+        tmp_path = f"{self._answers_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            for slot in np.flatnonzero(live):
+                slot = int(slot)
+                stored_at = float(self._meta[slot, _STORED_AT])
+                entry = self._answers.get(slot)
+                if entry is None or entry[0] != stored_at:
+                    continue
+                record = {
+                    "slot": slot,
+                    "stored_at": stored_at,
+                    "answer": entry[1],
+                    "guard": entry[2],
+                    "source": entry[3]
+                }
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self._answers_path)
+        self._sync_answers()
+
+    def purge(self) -> int:
+        """Drop every indexed answer, returning how many were removed"""
+        with self._lock:
+            self._ensure_open()
+            with self._file_lock():
+                removed = int(self._live_mask(time.time()).sum())
+                self._meta[:] = 0
+                self._meta.flush()
+                tmp_path = f"{self._answers_path}.tmp"
+                open(tmp_path, "w", encoding="utf-8").close()
+                os.replace(tmp_path, self._answers_path)
+            self._sync_answers()
+        self._counters["purges"] += 1
+        return removed
+
+    def close(self):
+        """Flush and unmap the index files"""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._meta.flush()
+            self._vectors = None
+            self._meta = None
+
+    def stats(self) -> Dict[str, float]:
+        """Index size and hit/miss counters"""
+        entries = 0
+        if self._meta is not None:
+            entries = int(self._live_mask(time.time()).sum())
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "entries": entries,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            **self._counters
+        }
+
+
+class _NullLock:
+    """Stand-in where flock is unavailable (single-process deployments)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FileLock:
+    """flock-based exclusive lock on a sidecar file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+
+    def __enter__(self):
+        self._handle = open(self.path, "a")
+        fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        self._handle.close()
+        self._handle = None
+        return False
@@ -0,0 +1,105 @@
+"""
+Single-flight request coalescing
+Concurrent identical calls share one in-flight upstream request
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def payload_key(payload: Dict) -> str:
+    """Stable hash of a JSON request payload"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls that share a key
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is running await the same task and receive the same result or
+    exception. The task is shielded from individual cancellations and only
+    cancelled once every waiter has gone away. Followers get a deep copy of
+    the result so callers cannot mutate each other's response.
+
+    The task runs in the first caller's context, so fn() must not depend
+    on per-caller state such as its deadline; each caller bounds its own
+    wait with `timeout` instead.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._counters = {
+            "leaders": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "cancelled": 0
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Run fn() once per key at a time and share its outcome
+
+        Raises asyncio.TimeoutError if the outcome takes longer than
+        `timeout` seconds; the call keeps running for other waiters.
+        """
+        flight = self._flights.get(key)
+        leader = flight is None
+
+        if leader:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+            self._counters["leaders"] += 1
+        else:
+            self._counters["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(flight.task), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # Abandon the upstream call only when nobody is left waiting
+            if not flight.task.done() and flight.waiters == 1:
+                # Forget it now: a caller arriving before the done callback
+                # runs must start afresh, not join a cancelled task
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+                self._counters["cancelled"] += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+        return result if leader else copy.deepcopy(result)
+
+    def _finish(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+        if flight.task.cancelled():
+            return
+        # Mark the exception retrieved even if every waiter was cancelled
+        if flight.task.exception() is not None:
+            self._counters["errors"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """In-flight keys and coalescing counters"""
+        return {
+            "in_flight": len(self._flights),
+            **self._counters
+        }
@@ -0,0 +1,120 @@
+"""
+Token counting for chat context budgets
+BPE token counts via tiktoken, with a script-aware estimate as fallback
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# cl100k_base is close to DeepSeek's own BPE for English and Arabic text
+ENCODING_NAME = "cl100k_base"
+
+# Role markers and separators the chat template adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# A failed load (e.g. no network for the download) is retried after this long
+RETRY_SECONDS = 300.0
+
+_encoding = None
+_failed_at: Optional[float] = None
+_load_lock = threading.Lock()
+
+
+def _try_load():
+    """Load the BPE encoding (caller holds _load_lock)"""
+    global _encoding, _failed_at
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        _failed_at = time.monotonic()
+        logger.warning(
+            f"BPE encoding unavailable, estimating token counts (retrying in {RETRY_SECONDS:.0f}s): {str(e)}"
+        )
+        return
+    _encoding, _failed_at = encoding, None
+    # Texts counted by estimate so far are counted again with the encoding
+    count_tokens.cache_clear()
+    logger.info(f"Token counter using {ENCODING_NAME} BPE encoding")
+
+
+def _load_in_background():
+    try:
+        _try_load()
+    finally:
+        _load_lock.release()
+
+
+def _load_encoding():
+    """
+    The encoding if it is loaded, otherwise None
+
+    Never blocks: the first call (and the first after a failed load's
+    retry delay) starts loading in a background thread, and counts are
+    estimated until it is ready.
+    """
+    if _encoding is not None:
+        return _encoding
+    retry_due = _failed_at is None or time.monotonic() - _failed_at >= RETRY_SECONDS
+    if retry_due and _load_lock.acquire(blocking=False):
+        threading.Thread(target=_load_in_background, name="bpe-encoding-loader", daemon=True).start()
+    return None
+
+
+def warm_up() -> Optional[str]:
+    """Load the encoding ahead of traffic, retrying a failed load (blocks; it may be downloaded)"""
+    with _load_lock:
+        if _encoding is None:
+            _try_load()
+    return ENCODING_NAME if _encoding is not None else None
+
+
+def _estimate_tokens(text: str) -> int:
+    """
+    Conservative estimate when no BPE encoding is available
+
+    ASCII text averages about four characters per token; Arabic, Urdu and
+    other non-Latin scripts split into far smaller pieces, so they are
+    counted separately rather than with a single characters-per-token ratio.
+    """
+    ascii_chars = 0
+    other_chars = 0
+    for char in text:
+        if ord(char) < 128:
+            ascii_chars += 1
+        elif not char.isspace():
+            other_chars += 1
+    return math.ceil(ascii_chars / 4) + math.ceil(other_chars * 0.75)
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Number of tokens in a text (memoized per distinct text)"""
+    if not text:
+        return 0
+    encoding = _load_encoding()
+    if encoding is None:
+        return _estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(content: str) -> int:
+    """Tokens a chat message costs, including its template overhead"""
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def stats() -> Dict[str, object]:
+    """Encoder in use and memoization counters"""
+    info = count_tokens.cache_info()
+    return {
+        "encoding": ENCODING_NAME if _encoding is not None else ("estimate" if _failed_at else "not_loaded"),
+        "cache_hits": info.hits,
+        "cache_misses": info.misses,
+        "cache_size": info.currsize
+    }
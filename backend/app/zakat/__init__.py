@@ -0,0 +1,27 @@
+"""
+Zakat calculation for Nisab Wisdom AI
+Nisab constants, the columnar engine for bulk and offline recalculation and
+streaming ledger upload parsing
+
+Independent of app.config and the web stack so batch jobs can import it alone.
+"""
+
+from .engine import (
+    NISAB_GOLD_GRAMS,
+    NISAB_SILVER_GRAMS,
+    ZAKAT_PERCENTAGE,
+    ZakatColumns,
+    ZakatColumnsResult,
+    calculate_zakat_columns,
+    to_minor_units,
+)
+
+__all__ = [
+    "NISAB_GOLD_GRAMS",
+    "NISAB_SILVER_GRAMS",
+    "ZAKAT_PERCENTAGE",
+    "ZakatColumns",
+    "ZakatColumnsResult",
+    "calculate_zakat_columns",
+    "to_minor_units",
+]
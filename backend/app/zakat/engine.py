@@ -0,0 +1,218 @@
+"""
+Columnar Zakat engine
+Whole arrays of calculations in exact fixed-point integer arithmetic
+"""
+
+from decimal import Decimal
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# Constants for Nisab calculation (from Islamic law)
+NISAB_GOLD_GRAMS = Decimal("87.48")    # 20 Mithqal
+NISAB_SILVER_GRAMS = Decimal("612.36") # 200 Dirhams
+ZAKAT_PERCENTAGE = Decimal("0.025")    # 2.5%
+
+# Decimal places of each input column (as validated and as stored)
+MONEY_PLACES = 2
+GRAMS_PLACES = 3
+
+ASSET_FIELDS = ("cash_in_hand", "cash_in_bank", "investments", "business_assets", "property_for_trading")
+LIABILITY_FIELDS = ("loans", "bills", "wages")
+METAL_FIELDS = ("gold_in_grams", "silver_in_grams")
+
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+
+def fixed_point(value: Decimal) -> Tuple[int, int]:
+    """`value` as (integer, places) with value == integer / 10**places"""
+    sign, digits, exponent = value.as_tuple()
+    places = max(0, -exponent)
+    return int(value.scaleb(places)), places
+
+
+def to_minor_units(values: Iterable[Any], places: int) -> np.ndarray:
+    """
+    Decimals (or strings / ints) as int64 counts of 10**-places
+
+    Raises ValueError for a value with more decimal places than the
+    column holds, since dropping them would change the result.
+    """
+    factor = 10 ** places
+    minor = []
+    append = minor.append
+    for value in values:
+        if not isinstance(value, (Decimal, int)):
+            value = Decimal(value)
+        numerator, denominator = value.as_integer_ratio()
+        integer, remainder = divmod(numerator * factor, denominator)
+        if remainder:
+            raise ValueError(f"{value} has more than {places} decimal places")
+        append(integer)
+    return np.array(minor, dtype=np.int64)
+
+
+class ZakatColumns(NamedTuple):
+    """
+    Inputs of many calculations, one array per field
+
+    Money fields are int64 cents and metal fields int64 milligrams
+    (MONEY_PLACES / GRAMS_PLACES). When reading from the database the
+    columns can be selected already scaled (`CAST(cash_in_hand * 100 AS
+    BIGINT)`), which skips the per-value Decimal conversion of
+    `from_records()`.
+    """
+
+    cash_in_hand: np.ndarray
+    cash_in_bank: np.ndarray
+    gold_in_grams: np.ndarray
+    silver_in_grams: np.ndarray
+    investments: np.ndarray
+    business_assets: np.ndarray
+    property_for_trading: np.ndarray
+    loans: np.ndarray
+    bills: np.ndarray
+    wages: np.ndarray
+    held_for_one_year: np.ndarray
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any]) -> "ZakatColumns":
+        """Columns from mappings or objects (requests, ZakatCalculation rows)"""
+        getter = itemgetter if records and isinstance(records[0], Mapping) else attrgetter
+
+        columns = {}
+        for name in ASSET_FIELDS + LIABILITY_FIELDS:
+            columns[name] = to_minor_units(map(getter(name), records), MONEY_PLACES)
+        for name in METAL_FIELDS:
+            columns[name] = to_minor_units(map(getter(name), records), GRAMS_PLACES)
+        columns["held_for_one_year"] = np.array(list(map(getter("held_for_one_year"), records)), dtype=bool)
+        return cls(**columns)
+
+    def __len__(self) -> int:
+        return len(self.held_for_one_year)
+
+
+class ZakatColumnsResult(NamedTuple):
+    """
+    Results as integers at a shared scale
+
+    total_assets and net_wealth are counts of 10**-scale, total_liabilities
+    of 10**-MONEY_PLACES and zakat_due of 10**-(scale + 3), the 3 being
+    the places of ZAKAT_PERCENTAGE. `decimals()` and `rows()` turn them
+    back into the Decimals the scalar calculator returns, exponent
+    included.
+    """
+
+    scale: int
+    total_assets: np.ndarray
+    total_liabilities: np.ndarray
+    net_wealth: np.ndarray
+    nisab_threshold: Decimal
+    meets_nisab: np.ndarray
+    zakat_due: np.ndarray
+    gold_price_per_gram: Decimal
+    silver_price_per_gram: Decimal
+
+    def __len__(self) -> int:
+        return len(self.meets_nisab)
+
+    def decimals(self, name: str) -> List[Decimal]:
+        """One result column as Decimals"""
+        if name == "zakat_due":
+            places = self.scale + fixed_point(ZAKAT_PERCENTAGE)[1]
+            zero = Decimal("0.00")
+            return [
+                Decimal(int(value)).scaleb(-places) if meets else zero
+                for value, meets in zip(self.zakat_due, self.meets_nisab)
+            ]
+        places = MONEY_PLACES if name == "total_liabilities" else self.scale
+        return [Decimal(int(value)).scaleb(-places) for value in getattr(self, name)]
+
+    def rows(self) -> Iterator[Dict[str, object]]:
+        """Per-calculation results, with the fields of ZakatCalculationResponse"""
+        columns = {name: self.decimals(name) for name in ("total_assets", "total_liabilities", "net_wealth", "zakat_due")}
+        for index in range(len(self)):
+            yield {
+                "total_assets": columns["total_assets"][index],
+                "total_liabilities": columns["total_liabilities"][index],
+                "net_wealth": columns["net_wealth"][index],
+                "nisab_threshold": self.nisab_threshold,
+                "meets_nisab": bool(self.meets_nisab[index]),
+                "zakat_due": columns["zakat_due"][index],
+                "gold_price_per_gram": self.gold_price_per_gram,
+                "silver_price_per_gram": self.silver_price_per_gram
+            }
+
+
+def _bound(column: np.ndarray) -> int:
+    return int(np.abs(column).max()) if len(column) else 0
+
+
+def calculate_zakat_columns(
+    columns: ZakatColumns,
+    gold_price: Decimal,
+    silver_price: Decimal
+) -> ZakatColumnsResult:
+    """
+    Zakat for every row of `columns` at one pair of metal prices
+
+    Does what ZakatCalculatorService.calculate_zakat does per request, as
+    whole-array integer operations. Everything is scaled to the finest
+    unit any term needs (grams have 3 places, prices theirs, so gold at
+    a 2-place price is worth 10**-5 units and silver at a 4-place price
+    10**-7), which is exactly the precision the Decimal path ends up
+    with, so no value is ever rounded and each result equals the scalar
+    one digit for digit for inputs at their column scale. Arrays are
+    int64 unless the largest possible intermediate would overflow it;
+    then they hold Python ints, slower but still exact.
+    """
+    gold, gold_places = fixed_point(gold_price)
+    silver, silver_places = fixed_point(silver_price)
+    rate, _ = fixed_point(ZAKAT_PERCENTAGE)
+
+    scale = max(MONEY_PLACES, GRAMS_PLACES + gold_places, GRAMS_PLACES + silver_places)
+    money_factor = 10 ** (scale - MONEY_PLACES)
+    gold_factor = gold * 10 ** (scale - GRAMS_PLACES - gold_places)
+    silver_factor = silver * 10 ** (scale - GRAMS_PLACES - silver_places)
+
+    # Same expression as the scalar path, so the threshold is the same Decimal
+    nisab_threshold = min(NISAB_GOLD_GRAMS * gold_price, NISAB_SILVER_GRAMS * silver_price)
+    nisab = int(nisab_threshold.scaleb(scale))
+
+    # Largest magnitude any intermediate can reach for these inputs
+    assets_bound = (
+        sum(_bound(getattr(columns, name)) for name in ASSET_FIELDS) * money_factor
+        + _bound(columns.gold_in_grams) * abs(gold_factor)
+        + _bound(columns.silver_in_grams) * abs(silver_factor)
+    )
+    liabilities_bound = sum(_bound(getattr(columns, name)) for name in LIABILITY_FIELDS) * money_factor
+    bound = max(assets_bound + liabilities_bound, abs(nisab)) * abs(rate)
+    dtype = np.int64 if bound <= _INT64_MAX else object
+
+    def column(name: str) -> np.ndarray:
+        return getattr(columns, name).astype(dtype)
+
+    total_assets = (
+        (column("cash_in_hand") + column("cash_in_bank") + column("investments")
+         + column("business_assets") + column("property_for_trading")) * money_factor
+        + column("gold_in_grams") * gold_factor
+        + column("silver_in_grams") * silver_factor
+    )
+    total_liabilities = column("loans") + column("bills") + column("wages")
+    net_wealth = total_assets - total_liabilities * money_factor
+
+    meets_nisab = (net_wealth >= nisab) & columns.held_for_one_year.astype(bool)
+    zakat_due = np.where(meets_nisab, net_wealth * rate, 0).astype(dtype)
+
+    return ZakatColumnsResult(
+        scale=scale,
+        total_assets=total_assets,
+        total_liabilities=total_liabilities,
+        net_wealth=net_wealth,
+        nisab_threshold=nisab_threshold,
+        meets_nisab=meets_nisab,
+        zakat_due=zakat_due,
+        gold_price_per_gram=gold_price,
+        silver_price_per_gram=silver_price
+    )
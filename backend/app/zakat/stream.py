@@ -0,0 +1,193 @@
+"""
+Streaming ledger uploads
+Incremental CSV / NDJSON parsing and result formatting with bounded memory
+"""
+
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import codecs
+import csv
+import io
+import json
+
+# A line (or quoted CSV row) longer than this is rejected rather than buffered
+MAX_LINE_CHARS = 64 * 1024
+
+INPUT_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+}
+
+OUTPUT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class UploadRow(NamedTuple):
+    """One data row of an upload: its fields, or why it could not be read"""
+
+    line: int
+    record: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def input_format(content_type: Optional[str]) -> Optional[str]:
+    """"csv" or "ndjson" for a request Content-Type, None if unsupported"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return INPUT_FORMATS.get(media_type)
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_chars: int = MAX_LINE_CHARS
+) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    (line number, text) for each line of a UTF-8 byte stream
+
+    Only the current line is buffered. A line over `max_line_chars`
+    comes back as (line number, None) and the rest of it is skipped.
+    A leading byte order mark and trailing carriage returns are dropped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    number = 0
+    overlong = False
+    first = True
+
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if first and text:
+            text = text.lstrip("\ufeff")
+            first = False
+        # Scan from an offset: re-slicing the rest after every line would
+        # copy a chunk once per line in it
+        start = 0
+        while True:
+            newline = text.find("\n", start)
+            if newline < 0:
+                if not overlong:
+                    buffer += text[start:]
+                    if len(buffer) > max_line_chars:
+                        overlong, buffer = True, ""
+                break
+            number += 1
+            if overlong or len(buffer) + newline - start > max_line_chars:
+                yield number, None
+            else:
+                yield number, (buffer + text[start:newline]).rstrip("\r")
+            buffer, overlong = "", False
+            start = newline + 1
+
+    tail = buffer + decoder.decode(b"", final=True)
+    if overlong or tail.strip():
+        number += 1
+        yield number, None if overlong else tail.rstrip("\r")
+
+
+async def ndjson_rows(lines: AsyncIterator[Tuple[int, Optional[str]]]) -> AsyncIterator[UploadRow]:
+    """One JSON object per non-blank line"""
+    async for number, text in lines:
+        if text is None:
+            yield UploadRow(number, error=f"Line exceeds {MAX_LINE_CHARS} characters")
+            continue
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            yield UploadRow(number, error=f"Invalid JSON: {str(e)}")
+            continue
+        if not isinstance(record, dict):
+            yield UploadRow(number, error="Each line must be a JSON object")
+            continue
+        yield UploadRow(number, record)
+
+
+async def csv_rows(lines: AsyncIterator[Tuple[int, Optional[str]]]) -> AsyncIterator[UploadRow]:
+    """
+    Rows of a CSV file with a header line; empty cells are left out
+
+    A quoted field may span lines: lines are joined until the quotes
+    balance, and the row is numbered by the line it starts on.
+    """
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    start = 0
+
+    async for number, text in lines:
+        if text is None:
+            pending = []
+            yield UploadRow(number, error=f"Line exceeds {MAX_LINE_CHARS} characters")
+            continue
+        if not pending:
+            start = number
+        pending.append(text)
+        joined = "\n".join(pending)
+        if joined.count('"') % 2:
+            if len(joined) > MAX_LINE_CHARS:
+                pending = []
+                yield UploadRow(start, error=f"Row exceeds {MAX_LINE_CHARS} characters")
+            continue
+        pending = []
+
+        if not joined.strip():
+            continue
+        try:
+            cells = next(csv.reader([joined]))
+        except csv.Error as e:
+            yield UploadRow(start, error=f"Invalid CSV: {str(e)}")
+            continue
+
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        if len(cells) != len(header):
+            yield UploadRow(start, error=f"Expected {len(header)} columns, found {len(cells)}")
+            continue
+        yield UploadRow(start, {name: cell.strip() for name, cell in zip(header, cells) if cell.strip()})
+
+    if pending:
+        yield UploadRow(start, error="Unterminated quoted field")
+
+
+async def chunked(rows: AsyncIterator[UploadRow], size: int) -> AsyncIterator[List[UploadRow]]:
+    """Lists of up to `size` rows, in order"""
+    chunk: List[UploadRow] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class CsvFormatter:
+    """Result rows as CSV text, header first"""
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(self._buffer, fieldnames=self.columns, extrasaction="ignore")
+
+    def _take(self) -> str:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+    def header(self) -> str:
+        self._writer.writeheader()
+        return self._take()
+
+    def rows(self, rows: Sequence[Dict[str, Any]]) -> str:
+        self._writer.writerows(rows)
+        return self._take()
+
+
+def ndjson_lines(rows: Sequence[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows)
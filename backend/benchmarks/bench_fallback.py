@@ -0,0 +1,50 @@
+"""
+Micro-benchmark: deterministic fallback answers
+
+Times FallbackResponder over 10k distinct queries for each assistant
+profile (distinct so the keyword matcher's memo does not hide the scan).
+
+Run from backend/:  python benchmarks/bench_fallback.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.fallback import FALLBACKS  # noqa: E402
+
+QUERIES = [
+    "Assalamu alaikum, how are you?",
+    "How much zakat do I owe on $12,000 of savings?",
+    "Is it halal to buy Tesla shares?",
+    "Is bitcoin permissible or is it gambling?",
+    "Can I take an Islamic mortgage from my bank?",
+    "What is 144 / 12",
+    "Help me debug my python code",
+    "Why is the sky blue?",
+    "Tell me something interesting",
+    "Explain sukuk and riba",
+]
+
+BATCH = 10_000
+
+
+def main():
+    queries = [f"{QUERIES[index % len(QUERIES)]} #{index}" for index in range(BATCH)]
+    for name, responder in FALLBACKS.items():
+        timings = []
+        for _ in range(5):
+            responder._matcher.match.cache_clear()
+            started = time.perf_counter()
+            for query in queries:
+                responder.respond(query)
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        print(f"{name:>16}: {best * 1000:7.1f} ms per {BATCH:,} queries "
+              f"({best / BATCH * 1e6:.2f} us/query)")
+
+
+if __name__ == "__main__":
+    main()
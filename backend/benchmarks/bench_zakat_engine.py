@@ -0,0 +1,127 @@
+"""
+Benchmark: columnar Zakat engine against the per-request calculator
+
+Generates random calculations at the stored column scales, runs them
+through ZakatCalculatorService.calculate_zakat one by one and through
+calculate_zakat_columns in one go, checks every result is identical
+(value and exponent), also for hand-picked requests parsed by the
+schema validators, and prints timings for:
+
+  scalar    - Decimal calculator, one request at a time
+  columns   - the engine on int64 columns (as selected pre-scaled from SQL)
+  records   - Decimal records -> columns -> engine -> Decimal results
+
+Run from backend/:  python benchmarks/bench_zakat_engine.py [rows]
+"""
+
+from decimal import Decimal
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.schemas import ZakatCalculationRequest  # noqa: E402
+from app.routes.zakat import calculator_service  # noqa: E402
+from app.zakat.engine import (  # noqa: E402
+    ASSET_FIELDS,
+    LIABILITY_FIELDS,
+    ZakatColumns,
+    calculate_zakat_columns,
+)
+
+ROWS = 200_000
+PRICES = [
+    (Decimal("77.16"), Decimal("0.9645")),  # live quote scales
+    (Decimal("75.00"), Decimal("0.95")),    # built-in fallback prices
+]
+RESULT_FIELDS = ("total_assets", "total_liabilities", "net_wealth", "nisab_threshold", "meets_nisab", "zakat_due")
+
+# Request bodies as clients send them: whole numbers, missing fields
+EDGE_CASES = [
+    {"cash_in_hand": 20000, "loans": 5, "bills": 3, "wages": 2},
+    {"cash_in_bank": "15000.5", "gold_in_grams": 10, "loans": "0.1"},
+    {"investments": 1, "held_for_one_year": False},
+]
+
+
+def money(rng: random.Random, high: int) -> Decimal:
+    return Decimal(rng.randrange(0, high * 100)).scaleb(-2)
+
+
+def grams(rng: random.Random, high: int) -> Decimal:
+    return Decimal(rng.randrange(0, high * 1000)).scaleb(-3)
+
+
+def make_records(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        record = {name: money(rng, 50_000) if rng.random() < 0.6 else Decimal("0.00") for name in ASSET_FIELDS}
+        record.update({name: money(rng, 5_000) if rng.random() < 0.3 else Decimal("0.00") for name in LIABILITY_FIELDS})
+        record["gold_in_grams"] = grams(rng, 200) if rng.random() < 0.4 else Decimal("0.000")
+        record["silver_in_grams"] = grams(rng, 2_000) if rng.random() < 0.2 else Decimal("0.000")
+        record["held_for_one_year"] = rng.random() < 0.9
+        records.append(record)
+    return records
+
+
+def identical(left, right) -> bool:
+    if isinstance(left, Decimal):
+        return isinstance(right, Decimal) and left.as_tuple() == right.as_tuple()
+    return left == right
+
+
+def edge_case_mismatches(gold: Decimal, silver: Decimal) -> int:
+    """Results that differ for EDGE_CASES after full schema validation"""
+    requests = [ZakatCalculationRequest(**case) for case in EDGE_CASES]
+    result = calculate_zakat_columns(ZakatColumns.from_records(requests), gold, silver)
+    return sum(
+        1
+        for request, got in zip(requests, result.rows())
+        if not all(
+            identical(getattr(calculator_service.calculate_zakat(request, gold, silver), name), got[name])
+            for name in RESULT_FIELDS
+        )
+    )
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    records = make_records(rows)
+    requests = [ZakatCalculationRequest.construct(**record) for record in records]
+    columns = ZakatColumns.from_records(records)
+
+    for gold, silver in PRICES:
+        started = time.perf_counter()
+        expected = [calculator_service.calculate_zakat(request, gold, silver) for request in requests]
+        scalar = time.perf_counter() - started
+
+        started = time.perf_counter()
+        calculate_zakat_columns(columns, gold, silver)
+        vectorized = time.perf_counter() - started
+
+        started = time.perf_counter()
+        result = calculate_zakat_columns(ZakatColumns.from_records(records), gold, silver)
+        actual = list(result.rows())
+        end_to_end = time.perf_counter() - started
+
+        mismatches = sum(
+            1
+            for want, got in zip(expected, actual)
+            if not all(identical(getattr(want, name), got[name]) for name in RESULT_FIELDS)
+        )
+
+        print(f"gold {gold} / silver {silver}, {rows:,} rows (int64 scale 10^-{result.scale}, "
+              f"dtype {result.net_wealth.dtype})")
+        print(f"  scalar : {scalar * 1000:9.1f} ms  ({scalar / rows * 1e6:6.2f} us/row)")
+        print(f"  columns: {vectorized * 1000:9.1f} ms  ({vectorized / rows * 1e6:6.2f} us/row, "
+              f"{scalar / vectorized:,.0f}x)")
+        print(f"  records: {end_to_end * 1000:9.1f} ms  ({end_to_end / rows * 1e6:6.2f} us/row, "
+              f"{scalar / end_to_end:,.1f}x)")
+        print(f"  mismatches: {mismatches} (edge cases: {edge_case_mismatches(gold, silver)})")
+
+
+if __name__ == "__main__":
+    main()
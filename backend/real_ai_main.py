@@ -2,9 +2,11 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import httpx
 import asyncio
 
+from app.chat.fallback import get_fallback_response
+from app.llm import build_router
+
 app = FastAPI(title="Nisab Wisdom AI", version="1.0.0")
 
 # CORS
@@ -16,8 +18,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Groq API (FREE - no signup required for basic usage)
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# Shared provider router (one keep-alive client for every provider)
+ai_router = build_router("real")
 
 class ChatMessage(BaseModel):
     message: str
@@ -32,7 +34,7 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "service": "nisab-wisdom-ai"}
+    return {"status": "healthy", "service": "nisab-wisdom-ai", "providers": ai_router.stats()}
 
 @app.options("/api/v1/chat")
 async def chat_options():
@@ -52,177 +54,26 @@ async def chat_with_ai(message: ChatMessage):
         return ChatResponse(response=ai_response, source="ai")
     else:
         print(f"🔄 Using intelligent fallback")
-        fallback = get_smart_response(message.message)
+        fallback = get_fallback_response(message.message, profile="general_math_first")
         return ChatResponse(response=fallback, source="local")
 
 async def get_ai_response(user_message: str) -> str:
     """Get response from working AI APIs"""
     
-    # Method 1: Try OpenAI-compatible endpoints that often work without auth
-    free_endpoints = [
-        {
-            "url": "https://api.openai.com/v1/chat/completions",
-            "model": "gpt-3.5-turbo",
-            "auth": "Bearer demo-key"  # Sometimes works for demos
-        },
-        {
-            "url": "https://api.together.xyz/v1/chat/completions", 
-            "model": "mistralai/Mixtral-8x7B-Instruct-v0.1",
-            "auth": "Bearer demo"
-        }
-    ]
-    
-    for endpoint in free_endpoints:
-        try:
-            print(f"🚀 Trying {endpoint['url']}...")
-            async with httpx.AsyncClient() as client:
-                payload = {
-                    "model": endpoint["model"],
-                    "messages": [
-                        {"role": "system", "content": "You are a helpful AI assistant. Answer any question clearly and helpfully."},
-                        {"role": "user", "content": user_message}
-                    ],
-                    "max_tokens": 500,
-                    "temperature": 0.7
-                }
-                
-                response = await client.post(
-                    endpoint["url"],
-                    json=payload,
-                    headers={"Authorization": endpoint["auth"], "Content-Type": "application/json"},
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    print(f"❌ {endpoint['url']} failed: {response.status_code}")
-                    
-        except Exception as e:
-            print(f"❌ {endpoint['url']} error: {e}")
-            continue
-    
-    # Method 2: Try local Ollama if available
-    try:
-        print("🚀 Trying local Ollama...")
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "llama2", 
-                    "prompt": user_message,
-                    "stream": False
-                },
-                timeout=10.0
-            )
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("response", "")
-    except:
-        pass
+    # Providers and budgets live in app/llm/catalog.py ("real" profile)
+    result = await ai_router.complete(
+        user_message,
+        system_prompt="You are a helpful AI assistant. Answer any question clearly and helpfully."
+    )
+    if result:
+        print(f"✅ {result.provider} answered in {result.latency_ms:.0f}ms")
+        return result.content
     
     return None
 
-def get_smart_response(query: str) -> str:
-    """Smart responses for any type of question"""
-    
-    query_lower = query.lower()
-    
-    # Greetings
-    if any(word in query_lower for word in ["hi", "hello", "hey", "how are you", "how r u", "gg", "test", "sup"]):
-        return """Hello! 👋 I'm your AI assistant. I can help you with:
-
-• **General questions** - Ask me anything!
-• **Islamic Finance** - Zakat, halal investing, Islamic banking
-• **Technology** - Programming, apps, computers
-• **Education** - Math, science, history, languages
-• **Daily life** - Cooking, health, travel, hobbies
-
-What would you like to know about?"""
-
-    # Math/calculations
-    elif any(word in query_lower for word in ["calculate", "math", "equation", "solve", "+"]):
-        return f"""I can help with calculations! 🧮
-
-For the question "{query}", here's what I can tell you:
-
-• **Simple math**: I can do basic arithmetic
-• **Complex calculations**: Algebra, geometry, statistics
-• **Financial calculations**: Interest, loans, investments
-• **Unit conversions**: Currency, measurements, time zones
-
-Could you be more specific about what you'd like me to calculate?"""
-
-    # Technology questions
-    elif any(word in query_lower for word in ["code", "programming", "python", "javascript", "app", "website"]):
-        return f"""Great tech question! 💻
-
-Regarding "{query}":
-
-• **Programming**: I can help with Python, JavaScript, React, APIs
-• **Web development**: HTML, CSS, databases, deployment
-• **Mobile apps**: React Native, Flutter basics
-• **AI/ML**: Machine learning concepts, data science
-
-What specific technical help do you need?"""
-
-    # Islamic Finance (detailed responses)
-    elif any(word in query_lower for word in ["zakat", "nisab", "halal", "haram", "islamic", "shariah", "riba"]):
-        if "zakat" in query_lower:
-            return """**Zakat Calculation Guide** 📿
-
-💰 **Current Nisab (2025):** $5,500 USD (gold standard)
-📊 **Rate:** 2.5% annually on wealth above nisab
-
-✅ **Zakatable Assets:**
-• Cash, savings, investments
-• Gold, silver, cryptocurrency  
-• Business inventory
-• Stocks, mutual funds
-
-**Formula:** (Total assets - debts) × 2.5%
-**Example:** $10,000 above nisab = $250 Zakat"""
-
-        elif any(word in query_lower for word in ["halal", "investment", "stock"]):
-            return """**Halal Investment Guide** 💼
-
-✅ **Halal Sectors:**
-• Technology (Apple, Microsoft, Google)
-• Healthcare, education, renewable energy
-• Halal food, Islamic finance
-
-❌ **Avoid:**
-• Alcohol, gambling, tobacco companies
-• Conventional banks, insurance
-• Adult entertainment, weapons
-
-🔍 **Screening:** Debt < 33%, Interest income < 5%"""
-
-        else:
-            return """**Islamic Finance Guidance** 🕌
-
-I can help with:
-• Zakat calculations and obligations
-• Halal investment screening  
-• Islamic banking (Murabaha, Ijara)
-• Cryptocurrency permissibility
-• Business ethics in Islam
-
-What specific Islamic finance topic interests you?"""
-
-    # General knowledge
-    else:
-        return f"""Thanks for your question: "{query}" 🤔
-
-I'd be happy to help! Here are some ways I can assist:
-
-• **Explain concepts** - Break down complex topics
-• **Provide information** - Facts, definitions, explanations  
-• **Problem solving** - Step-by-step guidance
-• **Recommendations** - Suggestions based on your needs
-
-Could you provide a bit more detail about what you're looking for? The more specific you are, the better I can help!"""
+@app.on_event("shutdown")
+async def shutdown():
+    await ai_router.aclose()
 
 if __name__ == "__main__":
     import uvicorn
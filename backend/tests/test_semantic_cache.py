@@ -0,0 +1,83 @@
+"""
+Regression tests for the semantic answer cache
+
+Questions that differ only in an amount, a ruling or a negation score
+above the similarity threshold, but must never share an answer.
+
+Run from backend/:  python -m pytest -q tests
+"""
+
+import pytest
+
+from app.services.semantic_cache import SemanticCache, guard_terms
+
+THRESHOLD = 0.78
+
+# (cached question, different question that must miss)
+MUST_MISS = [
+    ("How much zakat do I owe on $10,000 in savings?", "How much zakat do I owe on $50,000 in savings?"),
+    ("Is bitcoin halal?", "Is bitcoin haram?"),
+    ("Is it halal to buy Tesla shares?", "Is it haram to buy Tesla shares?"),
+    ("Is it halal to buy Tesla shares?", "Is it not halal to buy Tesla shares?"),
+    ("Is it permissible to take a mortgage?", "Isn't it permissible to take a mortgage?"),
+]
+
+# (cached question, rephrasing that may reuse its answer)
+MAY_HIT = [
+    ("How much zakat do I owe on $10,000 in savings?", "How much zakat do I owe on my $10,000 of savings?"),
+    ("Is bitcoin halal?", "Is bitcoin halal to invest in?"),
+    ("Is it halal to buy Tesla shares?", "Is buying Tesla shares halal?"),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SemanticCache(str(tmp_path / "index"), namespace="test", capacity=64, threshold=THRESHOLD)
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize("cached, asked", MUST_MISS)
+def test_different_amount_ruling_or_negation_misses(cache, cached, asked):
+    cache.add(cached, "answer")
+    assert cache.lookup(asked) is None
+
+
+@pytest.mark.parametrize("cached, asked", MAY_HIT)
+def test_rephrasing_with_same_guard_terms_hits(cache, cached, asked):
+    cache.add(cached, "answer")
+    match = cache.lookup(asked)
+    assert match is not None and match[0] == "answer"
+
+
+def test_closer_question_with_other_guard_does_not_shadow_match(cache):
+    cache.add("Is it haram to buy Tesla shares?", "haram answer")
+    cache.add("Is buying Tesla shares halal?", "halal answer")
+    match = cache.lookup("Is it halal to buy Tesla shares?")
+    assert match is not None and match[0] == "halal answer"
+
+
+def test_answer_from_other_sources_misses(cache):
+    cache.add("Is bitcoin halal?", "answer", source="prompt\n[1] Fatwa A")
+    assert cache.lookup("Is bitcoin halal to invest in?", source="prompt\n[1] Fatwa B") is None
+    assert cache.lookup("Is bitcoin halal to invest in?", source="prompt") is None
+    assert cache.lookup("Is bitcoin halal to invest in?", source="prompt\n[1] Fatwa A")[0] == "answer"
+
+
+def test_guard_terms_normalise_numbers_and_negations():
+    assert guard_terms("Zakat on $10,000?") == guard_terms("zakat on 10000") == ("10000",)
+    assert guard_terms("Isn’t riba haram?") == ("not", "haram")
+    assert guard_terms("What is nisab?") == ()
+
+
+def test_guard_survives_reopen(tmp_path):
+    path = str(tmp_path / "index")
+    writer = SemanticCache(path, namespace="test", threshold=THRESHOLD)
+    writer.add("Is bitcoin halal?", "answer", source="prompt A")
+    writer.close()
+
+    reader = SemanticCache(path, namespace="test", threshold=THRESHOLD)
+    assert reader.lookup("Is bitcoin haram?", source="prompt A") is None
+    assert reader.lookup("Is bitcoin halal to invest in?", source="prompt B") is None
+    assert reader.lookup("Is bitcoin halal to invest in?", source="prompt A")[0] == "answer"
+    reader.close()
@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
 
 import asyncio
-import httpx
 import json
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
 
+from app.llm import build_router
+
 app = FastAPI(title="Real AI Chatbot", version="1.0.0")
 
+# Shared provider router (one keep-alive client for every provider)
+ai_router = build_router("working")
+
 # CORS configuration for your frontend
 app.add_middleware(
     CORSMiddleware,
@@ -32,59 +36,11 @@ class ChatResponse(BaseModel):
 async def get_real_ai_response(message: str) -> str:
     """Get response from Hugging Face's free inference API - REAL AI"""
     
-    # Try multiple FREE models until one works
-    models = [
-        "microsoft/DialoGPT-medium",
-        "facebook/blenderbot-400M-distill", 
-        "microsoft/DialoGPT-large",
-        "Qwen/Qwen2.5-Coder-32B-Instruct"
-    ]
-    
-    for model in models:
-        try:
-            print(f"🤖 Trying REAL AI model: {model}")
-            
-            async with httpx.AsyncClient() as client:
-                # Hugging Face Inference API (FREE)
-                response = await client.post(
-                    f"https://api-inference.huggingface.co/models/{model}",
-                    json={"inputs": message},
-                    headers={"Content-Type": "application/json"},
-                    timeout=30.0
-                )
-                
-                print(f"📡 API Status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"✅ Raw API Response: {result}")
-                    
-                    # Handle different response formats
-                    if isinstance(result, list) and len(result) > 0:
-                        if isinstance(result[0], dict):
-                            if "generated_text" in result[0]:
-                                ai_response = result[0]["generated_text"]
-                                # Clean up DialoGPT responses
-                                if ai_response.startswith(message):
-                                    ai_response = ai_response[len(message):].strip()
-                                return ai_response if ai_response else "I understand your question. Could you ask it differently?"
-                            elif "text" in result[0]:
-                                return result[0]["text"]
-                        elif isinstance(result[0], str):
-                            return result[0]
-                    elif isinstance(result, dict):
-                        if "generated_text" in result:
-                            return result["generated_text"]
-                        elif "text" in result:
-                            return result["text"]
-                    
-                    return str(result)
-                else:
-                    print(f"❌ Model {model} failed: {response.status_code} - {response.text}")
-                    
-        except Exception as e:
-            print(f"❌ Error with {model}: {e}")
-            continue
+    # Models and budgets live in app/llm/catalog.py ("working" profile)
+    result = await ai_router.complete(message)
+    if result:
+        print(f"✅ {result.provider} answered in {result.latency_ms:.0f}ms")
+        return result.content
     
     # If all AI models fail, return an honest error message
     return "❌ All real AI models are currently unavailable. This is NOT a hardcoded response - the AI APIs are actually down."
@@ -118,7 +74,11 @@ async def root():
 
 @app.get("/api/v1/health")
 async def health_check():
-    return {"status": "healthy", "service": "real-ai-backend"}
+    return {"status": "healthy", "service": "real-ai-backend", "providers": ai_router.stats()}
+
+@app.on_event("shutdown")
+async def shutdown():
+    await ai_router.aclose()
 
 if __name__ == "__main__":
     import uvicorn